@@ -13,21 +13,15 @@ Usage (package style, from repo root):
 from __future__ import annotations
 
 import json
-import os
 import re
 from pathlib import Path
 from typing import Dict, List
 
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-# project-level import – works when run with  -m  or inside other code
-from kb import get_query_engine               # noqa: E402
 
 load_dotenv()
 
 JSON_PATH = Path("memory/brand.json")
-JSON_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 PROMPT = """
 You are a brand-voice analyst.
@@ -45,14 +39,10 @@ CONTEXT
 
 
 def _generate_profile(context: str) -> Dict[str, List[str] | str]:
-    """Call Gemini and robust-parse the JSON block."""
-    llm = ChatGoogleGenerativeAI(
-        model="models/gemini-1.5-flash-latest",
-        temperature=0.3,
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
-        cache=False,
-    )
-    raw = llm.invoke(PROMPT.format(context=context)).content.strip()
+    """Call the LLM (llm_provider) and robust-parse the JSON block."""
+    from llm_provider import chat_model
+
+    raw = chat_model("profile", temperature=0.3).invoke(PROMPT.format(context=context)).content.strip()
     match = re.search(r"\{.*\}", raw, re.S)
     if not match:
         raise ValueError(f"LLM did not return JSON.\n---\n{raw}\n---")
@@ -64,10 +54,14 @@ def build_profile(force: bool = False):
     if JSON_PATH.exists() and not force:
         return json.load(JSON_PATH.open())
 
+    # project-level import – deferred so loading brand.json never touches the KB
+    from kb import get_query_engine
+
     ctx = get_query_engine(top_k=8).query(
         "Summarise 34ML's writing style, customers, and product area in one paragraph."
     )
     data = _generate_profile(str(ctx))
+    JSON_PATH.parent.mkdir(parents=True, exist_ok=True)
     json.dump(data, JSON_PATH.open("w"), indent=2)
     return data
 
@@ -5,18 +5,24 @@ Reads `state["user_input"]` and decides which agent node should run next.
 
 Sets
 ----
-state["route"]      : "generate" | "scheduler" | "kb" | "end"
+state["route"]      : "generate" | "scheduler" | "kb" | "qa" | "end"
 state["channel"]    : "Instagram" | "LinkedIn" | "Facebook" | ...
 state["with_image"] : bool
+state["variants"]   : int – drafts to offer (“variants=3” / “3 variants”)
 """
 
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 # ---------- patterns -------------------------------------------------
 _PAT_SCHED   = re.compile(r"\b(show|schedule|remove|unschedule)\b", re.I)
 _PAT_HISTORY = re.compile(r"\bshow\s+history\b", re.I)
 
+# HITL verbs – only routed to the QA node while a draft is waiting
+_PAT_HITL = re.compile(
+    r"(?:approve|a|reject|r|quit|q|(?:pick|p)\s+\d+|(?:edit|e)\s+.*)", re.I | re.S
+)
+
 # Every supported channel + aliases
 _CHANNEL_RE = (
     r"(instagram|insta|ig|"
@@ -37,6 +43,10 @@ _PAT_POST = re.compile(
     re.I | re.X,
 )
 
+# “… variants=3”, “… in 3 variants” – also used by the generator to strip
+# the phrase from the topic, so both read the request the same way
+PAT_VARIANTS = re.compile(r"\bvariants?\s*=\s*(\d+)|\b(?:in\s+)?(\d+)\s+variants\b", re.I)
+
 _ALIAS_MAP = {
     "insta": "instagram",
     "ig": "instagram",
@@ -47,6 +57,15 @@ _ALIAS_MAP = {
 }
 
 
+def parse_channel(word: Optional[str]) -> Optional[str]:
+    """Channel for a name or alias the post pattern accepts (“ig” → “Instagram”), else None."""
+    m = re.fullmatch(_CHANNEL_RE, (word or "").strip().lower())
+    if not m:
+        return None
+    ch_raw = m.group(1)
+    return _ALIAS_MAP.get(ch_raw, ch_raw).capitalize()
+
+
 def orchestrator(state: Dict) -> Dict:
     user: str = state.get("user_input", "")
 
@@ -64,16 +83,20 @@ def orchestrator(state: Dict) -> Dict:
     # ---------- routing decisions ----------
     text_low = user.lower()
 
+    if state.get("waiting_for_qa") and _PAT_HITL.fullmatch(text_low.strip()):
+        state["route"] = "qa"
+        return state
+
     if _PAT_HISTORY.search(text_low) or _PAT_SCHED.search(text_low):
         state["route"] = "scheduler"
         return state
 
     m = _PAT_POST.search(text_low)
     if m:
-        ch_raw = m.group(1).lower()
-        channel = _ALIAS_MAP.get(ch_raw, ch_raw).capitalize()  # “instagram” → “Instagram”
-        state["channel"] = channel
+        state["channel"] = parse_channel(m.group(1))
         state["with_image"] = "with image" in text_low
+        v = PAT_VARIANTS.search(text_low)
+        state["variants"] = int(v.group(1) or v.group(2)) if v else 1
         state["route"] = "generate"
         return state
 
@@ -1,22 +1,337 @@
 #agent/scraper.py
+"""
+Same-domain web crawler for the RAG knowledge base.
 
+• Async, bounded concurrency over one pooled httpx client
+• Per-host politeness delay + robots.txt
+• Conditional GETs (ETag / Last-Modified) – unchanged pages come back
+  as 304 and are served from data/raw
+• Crawl manifest in data/crawl_manifest.json
+
+`scrape(base_url, depth)` keeps its old signature and returns
+Llama-Index Documents (id = URL).  `crawl(...)` is the async generator
+underneath, yielding pages as they finish; `iter_pages(...)` is its
+synchronous, bounded-queue twin for streaming ingestion.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
-from llama_index.readers.web import SimpleWebPageReader
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set
+from urllib.parse import urldefrag, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import html2text
+import httpx
+from bs4 import BeautifulSoup
 from llama_index.core import Document
 
+logger = logging.getLogger(__name__)
+
 RAW_DIR = Path("data/raw")
+MANIFEST_PATH = RAW_DIR.parent / "crawl_manifest.json"
+USER_AGENT = "34ml-agent-crawler/1.0"
+
+_SKIP_EXT = (
+    ".pdf", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico",
+    ".zip", ".mp4", ".mp3", ".css", ".js", ".xml", ".json",
+)
+
+
+@dataclass
+class Page:
+    url: str
+    text: str
+    depth: int
+    status: str                      # "fetched" | "not_modified" | "cached"
+    links: List[str] = field(default_factory=list)
+
+
+# ── helpers ─────────────────────────────────────────────────────────
+def _normalise(url: str) -> str:
+    url, _ = urldefrag(url)
+    return url if urlparse(url).path else url + "/"
+
+
+def _raw_name(url: str) -> str:
+    return f"page_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]}.txt"
+
+
+def _extract_links(html: str, page_url: str, hosts: Set[str]) -> List[str]:
+    out: List[str] = []
+    for a in BeautifulSoup(html, "html.parser").find_all("a", href=True):
+        url = _normalise(urljoin(page_url, a["href"]))
+        parsed = urlparse(url)
+        if parsed.scheme not in {"http", "https"} or parsed.netloc not in hosts:
+            continue
+        if parsed.path.lower().endswith(_SKIP_EXT):
+            continue
+        out.append(url)
+    return list(dict.fromkeys(out))
+
+
+def _html_to_text(html: str) -> str:
+    conv = html2text.HTML2Text()
+    conv.ignore_images = True
+    return conv.handle(html)
+
+
+def _load_manifest(path: Path) -> Dict[str, Dict]:
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            logger.warning("Crawl manifest %s is corrupt – starting fresh", path)
+    return {}
+
+
+# ── crawler ─────────────────────────────────────────────────────────
+class _Crawler:
+    def __init__(
+        self,
+        base_url: str,
+        depth: int,
+        raw_dir: Path,
+        manifest_path: Path,
+        max_pages: int,
+        concurrency: int,
+        delay_s: float,
+        timeout_s: float,
+    ):
+        self.base_url = _normalise(base_url)
+        self.host = urlparse(self.base_url).netloc
+        self.hosts = {self.host}         # + where the base page redirects to
+        self.depth = depth
+        self.raw_dir = raw_dir
+        self.manifest_path = manifest_path
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.delay_s = delay_s
+        self.timeout_s = timeout_s
+
+        self.manifest = _load_manifest(manifest_path)
+        self.robots: Optional[RobotFileParser] = None
+        self._host_lock = asyncio.Lock()
+        self._last_hit = 0.0
+
+    # -- politeness ---------------------------------------------------
+    async def _wait_turn(self) -> None:
+        async with self._host_lock:
+            gap = self._last_hit + self.delay_s - time.monotonic()
+            if gap > 0:
+                await asyncio.sleep(gap)
+            self._last_hit = time.monotonic()
+
+    async def _load_robots(self, client: httpx.AsyncClient) -> None:
+        parsed = urlparse(self.base_url)
+        rp = RobotFileParser()
+        try:
+            resp = await client.get(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+            rp.parse(resp.text.splitlines() if resp.status_code == 200 else [])
+            delay = rp.crawl_delay(USER_AGENT)
+            if delay:
+                self.delay_s = max(self.delay_s, float(delay))
+        except httpx.HTTPError:
+            rp.parse([])                     # unreachable robots.txt → allow
+        self.robots = rp
+
+    def _allowed(self, url: str) -> bool:
+        return self.robots is None or self.robots.can_fetch(USER_AGENT, url)
 
-def scrape(base_url: str, depth: int = 1) -> List[Document]:
+    # -- one page -----------------------------------------------------
+    def _cached(self, url: str, depth: int, status: str) -> Optional[Page]:
+        entry = self.manifest.get(url)
+        if not entry:
+            return None
+        path = self.raw_dir / entry["file"]
+        if not path.exists():
+            return None
+        return Page(url, path.read_text(encoding="utf-8"), depth, status, entry.get("links", []))
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str, depth: int) -> Optional[Page]:
+        entry = self.manifest.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        await self._wait_turn()
+        try:
+            resp = await client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.warning("Crawl error on %s: %s – using cached copy if any", url, e)
+            return self._cached(url, depth, "cached")
+
+        if resp.status_code == 304:
+            page = self._cached(url, depth, "not_modified")
+            if page is not None:
+                return page
+            await self._wait_turn()
+            resp = await client.get(url)     # cache file lost – refetch in full
+
+        if resp.status_code != 200:
+            logger.info("Skip %s (HTTP %s)", url, resp.status_code)
+            return None
+        if "html" not in resp.headers.get("content-type", "text/html"):
+            return None
+
+        if url == self.base_url:         # example.com → www.example.com
+            self.hosts.add(urlparse(str(resp.url)).netloc)
+        html = resp.text
+        text = _html_to_text(html)
+        links = _extract_links(html, str(resp.url), self.hosts)
+        name = _raw_name(url)
+        (self.raw_dir / name).write_text(text, encoding="utf-8")
+        self.manifest[url] = {
+            "file": name,
+            "etag": resp.headers.get("etag"),
+            "last_modified": resp.headers.get("last-modified"),
+            "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "links": links,
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        return Page(url, text, depth, "fetched", links)
+
+    # -- BFS with a worker pool ---------------------------------------
+    async def run(self) -> AsyncIterator[Page]:
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+        limits = httpx.Limits(
+            max_connections=self.concurrency, max_keepalive_connections=self.concurrency
+        )
+        async with httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=self.timeout_s,
+            limits=limits,
+            follow_redirects=True,
+        ) as client:
+            await self._load_robots(client)
+
+            todo: asyncio.Queue = asyncio.Queue()
+            done: asyncio.Queue = asyncio.Queue(maxsize=2 * self.concurrency)
+            seen: Set[str] = {self.base_url}
+            await todo.put((self.base_url, 0))
+
+            async def worker():
+                while True:
+                    url, depth = await todo.get()
+                    try:
+                        page = None
+                        if self._allowed(url):
+                            page = await self._fetch(client, url, depth)
+                        if page is not None:
+                            if depth < self.depth:
+                                for link in page.links:
+                                    if link not in seen and len(seen) < self.max_pages:
+                                        seen.add(link)
+                                        await todo.put((link, depth + 1))
+                            await done.put(page)
+                    except Exception:
+                        # a bad page must not take its worker down – join() would hang
+                        logger.exception("Crawl failed on %s", url)
+                    finally:
+                        todo.task_done()
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            joiner = asyncio.create_task(todo.join())
+            try:
+                while not (joiner.done() and done.empty()):
+                    getter = asyncio.create_task(done.get())
+                    await asyncio.wait({getter, joiner}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter.done():
+                        yield getter.result()
+                    else:
+                        getter.cancel()
+            finally:
+                for w in workers:
+                    w.cancel()
+                self.manifest_path.write_text(json.dumps(self.manifest, indent=2), encoding="utf-8")
+
+
+def crawl(
+    base_url: str,
+    depth: int = 1,
+    *,
+    raw_dir: Path = RAW_DIR,
+    manifest_path: Optional[Path] = None,
+    max_pages: int = 200,
+    concurrency: int = 8,
+    delay_s: float = 0.25,
+    timeout_s: float = 15.0,
+) -> AsyncIterator[Page]:
+    """
+    Async generator over same-domain pages reachable from `base_url`
+    within `depth` link hops (0 = just the base page).
     """
-    Download `base_url` (plus internal links later) and return a list of
-    Llama-Index Document objects.  Also saves clean text copies.
+    manifest_path = manifest_path or raw_dir.parent / MANIFEST_PATH.name
+    return _Crawler(
+        base_url, depth, raw_dir, manifest_path, max_pages, concurrency, delay_s, timeout_s
+    ).run()
+
+
+def iter_pages(base_url: str, depth: int = 1, maxsize: int = 16, **crawl_kwargs) -> Iterator[Page]:
+    """
+    Run `crawl` on a background event loop and yield its pages here.
+    At most `maxsize` pages wait in between, so a slow consumer throttles
+    the crawler instead of piling pages up in memory.
     """
-    reader = SimpleWebPageReader(html_to_text=True)
-    docs = reader.load_data([base_url])      # updated API (no max_depth)
+    out: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    end = object()
+
+    def _offer(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False                         # consumer went away
+
+    async def _pump():
+        async for page in crawl(base_url, depth, **crawl_kwargs):
+            if not await asyncio.to_thread(_offer, page):
+                return
+
+    def _run():
+        try:
+            asyncio.run(_pump())
+        except Exception as e:  # surface crawler failures to the consumer
+            _offer(e)
+        _offer(end)
 
-    RAW_DIR.mkdir(parents=True, exist_ok=True)
-    for i, doc in enumerate(docs):
-        (RAW_DIR / f"page_{i}.txt").write_text(doc.text, encoding="utf-8")
+    t = threading.Thread(target=_run, name="crawler", daemon=True)
+    t.start()
+    try:
+        while True:
+            item = out.get()
+            if item is end:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def page_to_document(page: Page) -> Document:
+    return Document(text=page.text, id_=page.url, metadata={"url": page.url})
+
+
+def scrape(base_url: str, depth: int = 1, **crawl_kwargs) -> List[Document]:
+    """
+    Crawl `base_url` (plus internal links up to `depth` hops) and return a
+    list of Llama-Index Document objects.  Also saves clean text copies.
+    """
+    async def _collect() -> List[Document]:
+        return [page_to_document(p) async for p in crawl(base_url, depth, **crawl_kwargs)]
 
-    return docs
\ No newline at end of file
+    return asyncio.run(_collect())
@@ -5,19 +5,33 @@ LangGraph multi-agent orchestrator
 
 import logging
 import builtins
-from langgraph.checkpoint.memory import MemorySaver
-from build_graph import get_runner
+import sys
+from functools import lru_cache
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# Initialize checkpointer
-checkpointer = MemorySaver()
 
-# Get graph runner
-runner = get_runner(checkpointer=checkpointer)
+@lru_cache(maxsize=1)
+def get_app_runner():
+    """Compile the graph on the first command that needs it (not for help/quit)."""
+    from langgraph.checkpoint.memory import MemorySaver
+    from build_graph import get_runner
+
+    return get_runner(checkpointer=MemorySaver())
+
 
 def main():
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+        profile_startup()
+        return
+
+    if "--dispatch" in sys.argv:
+        # publish due queue items in the background while the CLI runs
+        from dispatcher import Dispatcher
+        Dispatcher().start()
+
     print("=== 34ML Agent (type 'help' for scheduler commands, 'quit' to exit) ===")
     
     while True:
@@ -26,9 +40,11 @@ def main():
         
         if user_input.lower() == "quit":
             logging.info("Exiting CLI")
-            # Ensure final state is checkpointed
+            # Ensure final state is checkpointed (only if a graph ever ran)
             try:
-                current_state = runner.get_state({"configurable": {"thread_id": "default"}})
+                current_state = None
+                if get_app_runner.cache_info().currsize:
+                    current_state = get_app_runner().get_state({"configurable": {"thread_id": "default"}})
                 if current_state:
                     logging.debug(f"Final state before exit: {current_state.values.get('conversation_history', [])}")
             except Exception as e:
@@ -41,8 +57,11 @@ def main():
   show posts | show <channel> posts
   show scheduled posts | show scheduled <channel> posts
   show history
+  show dispatch
   schedule last [<channel>] post for <date>
   schedule <id> for <date>
+  schedule all|<n> [<channel>] posts every <tuesday|day|week> [starting <date>]
+  schedule all|<n> [<channel>] posts across next month|next week|<month>
   remove last [<channel>] | remove <id> [from <date>]
 """)
             continue
@@ -52,11 +71,27 @@ def main():
 
         # Process input through LangGraph
         try:
-            # Use a consistent thread_id for persistence
-            result = runner.invoke(
+            from build_graph import stream_run
+
+            # Use a consistent thread_id for persistence; draft tokens print as they arrive
+            result, streamed = {}, False
+            for kind, value in stream_run(
+                get_app_runner(),
                 {"user_input": user_input, "generated": False},
-                config={"configurable": {"thread_id": "default"}}
-            )
+                config={"configurable": {"thread_id": "default"}},
+            ):
+                if kind == "token":
+                    if not streamed:
+                        print("Draft: ", end="", flush=True)
+                        streamed = True
+                    print(value, end="", flush=True)
+                else:
+                    result = value or {}
+            if streamed:
+                print()
+            if len(result.get("variant_drafts") or []) > 1:
+                from tools.generator import format_variants
+                print(format_variants(result["variant_drafts"]))
             bot_response = result.get("result", "No result returned. Try another command.")
             print(f"Bot: {bot_response}")
             # Update conversation history with bot response
@@ -1,24 +1,31 @@
 """
 ui_gradio.py  – 34ML Social-Media AI Agent
 ──────────────────────────────────────────
-• Chat pane
+• Chat pane (drafts stream in token by token)
 • HITL approve / edit / reject / quit
 • Scheduler help (type “help”)
 • Shows generated image
 """
 
-import uuid, re, logging, gradio as gr
-from langgraph.checkpoint.memory import MemorySaver
-from build_graph import get_runner
+import os, sys, uuid, re, logging, gradio as gr
+from functools import lru_cache
 from memory.post_store import save_post
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# ────────────────────────── LangGraph runner
-runner = get_runner(checkpointer=MemorySaver())
+# ────────────────────────── LangGraph runner (compiled on first use)
+@lru_cache(maxsize=1)
+def get_app_runner():
+    from langgraph.checkpoint.memory import MemorySaver
+    from build_graph import get_runner
+    return get_runner(checkpointer=MemorySaver())
 
 # ────────────────────────── constants
+# sessions served in parallel – Gradio's own default of 1 unless raised;
+# store writes are locked + group-committed, so a higher value is safe
+CONCURRENCY = int(os.getenv("GRADIO_CONCURRENCY", "1"))
+
 RESET_KEYS = {
     "waiting_for_qa": False,
     "draft": None,
@@ -32,23 +39,39 @@ FULL_HELP = (
     "  show posts | show <channel> posts\n"
     "  show scheduled posts | show scheduled <channel> posts\n"
     "  show history\n"
+    "  show dispatch\n"
     "  schedule last [<channel>] post for <date>\n"
     "  schedule <id> for <date>\n"
+    "  schedule all|<n> [<channel>] posts every <tuesday|day|week> [starting <date>]\n"
+    "  schedule all|<n> [<channel>] posts across next month|next week|<month>\n"
     "  remove last [<channel>] | remove <id> [from <date>]\n\n"
     "Generation examples:\n"
     "  write instagram post with image about <topic>\n"
     "  write linkedin post about <topic>\n\n"
+    "  write linkedin post about <topic> variants=3\n\n"
     "HITL while a draft is shown:\n"
-    "  approve (a) | edit <text> (e <text>) | reject (r) | quit (q)"
+    "  approve (a) | edit <text> (e <text>) | pick <n> (p <n>) | reject (r) | quit (q)"
 )
 
 # ────────────────────────── helper
+def _config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}, "recursion_limit": 10}
+
 def _invoke_graph(thread_id: str, extra: dict):
     payload = {**RESET_KEYS, **extra}
-    return runner.invoke(
-        payload,
-        config={"configurable": {"thread_id": thread_id}, "recursion_limit": 10},
-    )
+    return get_app_runner().invoke(payload, config=_config(thread_id))
+
+def _stream_graph(thread_id: str, extra: dict):
+    """("token", text)… then ("state", final_state); see build_graph.stream_run."""
+    from build_graph import stream_run
+    return stream_run(get_app_runner(), {**RESET_KEYS, **extra}, _config(thread_id))
+
+def _variant_options(thread_id: str) -> list:
+    """Ranked drafts of the pending `variants=N` request, from the graph checkpoint."""
+    snap = get_app_runner().get_state(_config(thread_id))
+    return (snap.values.get("variant_drafts") if snap else None) or []
+
+_QA_PROMPT = "[A]pprove  [E]dit  [P]ick <n>  [R]eject  [Q]uit"
 
 # ────────────────────────── main callback
 def chat_callback(
@@ -61,20 +84,36 @@ def chat_callback(
     cur_channel,
     img_done,
 ):
-    """Main chat / HITL handler."""
+    """Main chat / HITL handler; a generator so drafts stream into the chat pane."""
     thread_id = thread_state or str(uuid.uuid4())
     msg = user_msg.strip()
     if not msg:
-        return history, "", thread_id, qa_flag, cur_draft, cur_img, cur_channel, img_done
+        yield history, "", thread_id, qa_flag, cur_draft, cur_img, cur_channel, img_done
+        return
 
     # ---------------- HELP
     if msg.lower() == "help":
         history.append((msg, FULL_HELP))
-        return history, "", thread_id, qa_flag, cur_draft, cur_img, cur_channel, img_done
+        yield history, "", thread_id, qa_flag, cur_draft, cur_img, cur_channel, img_done
+        return
 
     # ---------------- HITL phase
     if qa_flag:
         cmd = msg.lower()
+        pick = re.fullmatch(r"(?:pick|p)\s+(\d+)", cmd)
+        if pick:
+            options = _variant_options(thread_id)
+            n = int(pick.group(1))
+            if not 1 <= n <= len(options):
+                history.append((msg, f"Pick a number between 1 and {len(options)}."
+                                     if options else "No options to pick from."))
+                yield history, "", thread_id, True, cur_draft, cur_img, cur_channel, img_done
+                return
+            cur_draft = options[n - 1]["text"]
+            history.append((msg, f"--- OPTION {n} ---\n{cur_draft}\n\n{_QA_PROMPT}"))
+            yield history, "", thread_id, True, cur_draft, cur_img, cur_channel, img_done
+            return
+
         if cmd in {"approve", "a", "reject", "r", "quit", "q"} or cmd.startswith(("edit ", "e ")):
             # determine final text
             if cmd in {"approve", "a"}:
@@ -95,13 +134,24 @@ def chat_callback(
                                     "approved": bool(final_text),
                                     "image_url": None,
                                     "image_done": False})
-            return history, "", thread_id, False, None, None, None, False
+            yield history, "", thread_id, False, None, None, None, False
+            return
 
-        history.append((msg, "Invalid QA command. Use approve/edit/reject/quit."))
-        return history, "", thread_id, True, cur_draft, cur_img, cur_channel, img_done
+        history.append((msg, "Invalid QA command. Use approve/edit/pick <n>/reject/quit."))
+        yield history, "", thread_id, True, cur_draft, cur_img, cur_channel, img_done
+        return
 
     # ---------------- normal user turn
-    state_out = _invoke_graph(thread_id, {"user_input": msg})
+    history.append((msg, ""))
+    state_out, partial = {}, ""
+    for kind, value in _stream_graph(thread_id, {"user_input": msg}):
+        if kind == "token":
+            partial += value
+            history[-1] = (msg, f"--- DRAFT ---\n{partial}")
+            yield history, "", thread_id, qa_flag, cur_draft, cur_img, cur_channel, img_done
+        else:
+            state_out = value or {}
+    history.pop()   # replaced by the final reply below
 
     draft      = state_out.get("draft")
     img_url    = state_out.get("image_url")
@@ -117,18 +167,24 @@ def chat_callback(
         result_txt = result_txt.get("text") or result_txt.get("message")
 
     if draft or qa_needed:
-        reply = f"--- DRAFT ---\n{draft}\n\n"
+        options = state_out.get("variant_drafts") or []
+        if len(options) > 1:
+            from tools.generator import format_variants
+            reply = f"{format_variants(options)}\n\n(approve takes option 1)\n\n"
+        else:
+            reply = f"--- DRAFT ---\n{draft}\n\n"
         if img_url:
             reply += f"Generated image: {img_url}\n\n"
-        reply += "[A]pprove  [E]dit  [R]eject  [Q]uit"
+        reply += _QA_PROMPT
         history.append((msg, reply))
-        return history, "", thread_id, True, draft, img_url, channel, img_done
+        yield history, "", thread_id, True, draft, img_url, channel, img_done
+        return
 
     # regular non-draft answer
     if result_txt is None:
         result_txt = "No response."
     history.append((msg, result_txt))
-    return history, "", thread_id, False, None, None, None, img_done
+    yield history, "", thread_id, False, None, None, None, img_done
 
 # ────────────────────────── UI definition
 demo = gr.Blocks(title="34ML Social-Media Agent")
@@ -171,4 +227,8 @@ with demo:
     gr.Markdown("---\nScrape → RAG → Draft → Human approval → Schedule")
 
 if __name__ == "__main__":
-    demo.launch()
\ No newline at end of file
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+        profile_startup()
+    else:
+        demo.queue(default_concurrency_limit=CONCURRENCY).launch()
\ No newline at end of file
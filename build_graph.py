@@ -3,9 +3,11 @@ Universal LangGraph builder for 34ML AI Agent
 With improved recursion control and simplified graph structure
 """
 
-from typing import TypedDict, Any, Callable, Dict, List, Optional
+from typing import TypedDict, Any, Callable, Dict, Iterator, List, Optional, Tuple
 import inspect
 import logging
+import re
+import time
 
 from langgraph.graph import StateGraph, END
 from agents.orchestrator import orchestrator
@@ -33,6 +35,9 @@ class GraphState(TypedDict, total=False):
        # NEW ──────────────────────────────
     channel: str        # "Instagram", "LinkedIn", …
     image_done: bool    # True after first DALL·E call
+    timings: Dict[str, float]   # per-stage ms of the last draft (generator)
+    variants: int       # drafts requested ("variants=3"), set by the orchestrator
+    variant_drafts: List[Dict[str, Any]]  # ranked options: text, archive, peer
 
 
 # ------------------------------------------------------------------
@@ -66,7 +71,7 @@ def _add_branching(
 # ------------------------------------------------------------------
 def qa_hitl_node(state: GraphState) -> GraphState:
     """
-    Handle QA/HITL commands (approve, edit, reject, quit) based on user input.
+    Handle QA/HITL commands (approve, edit, pick <n>, reject, quit) based on user input.
     """
     logger.debug(f"qa_hitl_node state keys: {list(state.keys())}")
     
@@ -91,6 +96,14 @@ def qa_hitl_node(state: GraphState) -> GraphState:
     elif user_input in ["quit", "q"]:
         state["result"] = "Action cancelled."
         state["waiting_for_qa"] = False
+    elif re.match(r"(?:pick|p)\s+\d+$", user_input):
+        options = state.get("variant_drafts") or []
+        n = int(user_input.split()[1])
+        if 1 <= n <= len(options):
+            state["draft"] = options[n - 1]["text"]
+            state["result"] = f"Option {n} selected:\n{state['draft']}"
+        else:
+            state["result"] = f"Pick a number between 1 and {len(options)}." if options else "No options to pick from."
     elif user_input.startswith("edit ") or user_input.startswith("e "):
         new_text = user_input[5:] if user_input.startswith("edit ") else user_input[2:]
         new_text = new_text.strip()
@@ -101,7 +114,7 @@ def qa_hitl_node(state: GraphState) -> GraphState:
         else:
             state["result"] = "Please provide text to edit the draft."
     else:
-        state["result"] = "Invalid command. Please use: approve (a), edit <new text> (e <new text>), reject (r), or quit (q)."
+        state["result"] = "Invalid command. Please use: approve (a), edit <new text> (e <new text>), pick <n> (p <n>), reject (r), or quit (q)."
 
     # Clear QA/HITL state if done
     if not state.get("waiting_for_qa", True):
@@ -129,6 +142,8 @@ def orchestrator_selector(state: Dict[str, Any]) -> str:
         return "scheduler"
     elif route == "kb":
         return "kb"
+    elif route == "qa":
+        return "qa_hitl"
     else:
         # Default end - important to have a fallback
         logger.debug("No matching route, going to END")
@@ -199,6 +214,7 @@ def build_graph():
             "generator": "generator",
             "scheduler": "scheduler",
             "kb": "kb",
+            "qa_hitl": "qa_hitl",
             "end": END,
         },
     )
@@ -242,4 +258,28 @@ def get_runner(checkpointer=None):
     Compile and return the graph runner, optionally with a checkpointer.
     """
     graph = build_graph()
-    return graph.compile(checkpointer=checkpointer)
\ No newline at end of file
+    return graph.compile(checkpointer=checkpointer)
+
+
+def stream_run(runner, payload: Dict[str, Any], config: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    """
+    Like runner.invoke(), but yields ("token", text) while the generator's
+    draft streams in, then ("state", final_state).  Time to first token
+    and total latency are logged.
+    """
+    t0 = time.perf_counter()
+    ttft = None
+    final = None
+    for mode, chunk in runner.stream(payload, config=config, stream_mode=["custom", "values"]):
+        if mode == "custom" and "token" in chunk:
+            if ttft is None:
+                ttft = time.perf_counter() - t0
+            yield "token", chunk["token"]
+        elif mode == "values":
+            final = chunk
+    total = time.perf_counter() - t0
+    if ttft is not None:
+        logger.info("graph run: ttft %.0f ms, total %.0f ms", ttft * 1000, total * 1000)
+    else:
+        logger.info("graph run: total %.0f ms (no tokens streamed)", total * 1000)
+    yield "state", final
\ No newline at end of file
@@ -1,14 +1,24 @@
 # build_kb.py
-import sys
-from agents.scraper import scrape
-from kb import build_or_load
+import argparse
+from ingest import run_pipeline
 
-if len(sys.argv) < 2:
-    print("Usage: python build_kb.py https://your-company.com")
-    sys.exit(1)
+ap = argparse.ArgumentParser(description="Crawl a site and stream it into the RAG KB.")
+ap.add_argument("url", help="e.g. https://your-company.com")
+ap.add_argument("--depth", type=int, default=1, help="link hops from the start page")
+ap.add_argument("--batch-size", type=int, default=64, help="chunks per embedding batch")
+ap.add_argument("--queue-size", type=int, default=16, help="items buffered between stages")
+args = ap.parse_args()
 
-url = sys.argv[1]
-docs = scrape(url)                   # already tested
-index = build_or_load(docs)
+stats = run_pipeline(
+    args.url,
+    args.depth,
+    batch_size=args.batch_size,
+    queue_size=args.queue_size,
+)  # only changed chunks are re-embedded
 
-print(f"✅ Vector store ready with {len(index.docstore.docs)} documents")
\ No newline at end of file
+print(
+    f"✅ Vector store updated – pages: {stats['added']} added, "
+    f"{stats['updated']} updated, {stats['skipped']} skipped, "
+    f"{stats['deleted']} deleted; chunks: {stats['chunks_embedded']} embedded, "
+    f"{stats['chunks_deleted']} deleted"
+)
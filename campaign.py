@@ -0,0 +1,221 @@
+# campaign.py
+"""
+Batch campaign generation
+=========================
+Runs the generator graph over a plan file and leaves every draft in the
+review queue (memory/review_store.py) for bulk approval later.
+
+    python campaign.py run plan.csv [--workers 4] [--name may]
+    python campaign.py status [<campaign>]
+    python campaign.py review <campaign>
+    python campaign.py approve <campaign> all|3,5,9
+    python campaign.py reject  <campaign> all|3,5,9
+
+The plan is CSV with a header (topic, channel, with_image) or JSON lines
+with the same keys; with_image accepts 1/true/yes.  A channel the
+orchestrator does not know stops the run before anything is drafted.
+Rows are drafted by a bounded worker pool; Gemini / OpenAI calls are
+paced by the provider limits in tools/generator.py (GEMINI_RPM,
+GEMINI_CONCURRENCY, OPENAI_RPM, OPENAI_CONCURRENCY).  Each finished
+row is recorded as it completes, so an interrupted run picks up where it
+stopped – rerun the same command; failed rows are retried.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+
+from memory import review_store
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 4
+_TRUE = {"1", "true", "yes", "y"}
+
+
+# ── plan ───────────────────────────────────────────────────────────
+def read_plan(path: Path) -> List[Dict]:
+    """
+    Rows of {row_no, topic, channel, with_image}; blank topics are skipped.
+    Raises ValueError naming every row whose channel the orchestrator
+    would not recognise (it would only come back as a failed row).
+    """
+    from agents.orchestrator import parse_channel
+    from tools.scheduler import norm_ch
+
+    with path.open(encoding="utf-8") as f:
+        if path.suffix.lower() in {".jsonl", ".json"}:
+            raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw = list(csv.DictReader(f))
+    rows, bad = [], []
+    for i, r in enumerate(raw, 1):
+        topic = str(r.get("topic") or "").strip()
+        if not topic:
+            continue
+        flag = r.get("with_image")
+        channel = str(r.get("channel") or "LinkedIn").strip()
+        channel = norm_ch(channel) or channel
+        if parse_channel(channel) is None:
+            bad.append(f"row {i}: {channel!r}")
+            continue
+        rows.append({
+            "row_no": i,
+            "topic": topic,
+            "channel": channel,
+            "with_image": flag is True or str(flag).strip().lower() in _TRUE,
+        })
+    if bad:
+        raise ValueError(
+            f"unknown channel in {path.name} ({'; '.join(bad)}) – "
+            "use Instagram, LinkedIn, Facebook or Twitter/X"
+        )
+    return rows
+
+
+# ── run ────────────────────────────────────────────────────────────
+def _draft(runner, row: Dict) -> Dict:
+    text = f"write {row['channel']} post about {row['topic']}"
+    if row["with_image"]:
+        text += " with image"
+    out = runner.invoke({"user_input": text, "generated": False},
+                        config={"recursion_limit": 10})
+    if not out.get("draft"):
+        raise RuntimeError(out.get("result") or "generator returned no draft")
+    return out
+
+
+def run_campaign(plan: Path, name: str | None = None, workers: int = WORKERS,
+                 printer=print) -> Dict[str, int]:
+    """Draft every row not already in the review queue; returns counts."""
+    from build_graph import get_runner
+
+    campaign = name or plan.stem
+    rows = read_plan(plan)
+    done = review_store.done_keys(campaign)
+    todo = [r for r in rows
+            if review_store.row_key(r["row_no"], r["topic"], r["channel"], r["with_image"]) not in done]
+    stats = {"rows": len(rows), "skipped": len(rows) - len(todo), "drafted": 0, "failed": 0}
+    printer(f"campaign '{campaign}': {len(todo)} to draft, {stats['skipped']} already done")
+    if not todo:
+        return stats
+
+    runner = get_runner()
+    t0 = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="campaign")
+    try:
+        futures = {pool.submit(_draft, runner, r): r for r in todo}
+        for n, fut in enumerate(as_completed(futures), 1):
+            r = futures[fut]
+            try:
+                out = fut.result()
+            except Exception as e:
+                review_store.record(campaign, r["row_no"], r["topic"], r["channel"],
+                                    r["with_image"], error=f"{type(e).__name__}: {e}")
+                stats["failed"] += 1
+                logger.warning("row %d failed: %s", r["row_no"], e)
+            else:
+                review_store.record(campaign, r["row_no"], r["topic"], r["channel"],
+                                    r["with_image"], draft=out["draft"],
+                                    image_url=out.get("image_url"))
+                stats["drafted"] += 1
+            rate = n / max(time.perf_counter() - t0, 1e-9) * 60
+            printer(f"[{n}/{len(todo)}] row {r['row_no']} {r['channel']}: "
+                    f"{'ok' if fut.exception() is None else 'failed'} ({rate:.1f} rows/min)")
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        printer("interrupted – finished rows are saved; rerun to resume")
+        raise
+    pool.shutdown(wait=True)
+    return stats
+
+
+# ── review ─────────────────────────────────────────────────────────
+def _select(campaign: str, which: str) -> List[Dict]:
+    rows = review_store.drafts(campaign)
+    if which == "all":
+        return rows
+    wanted = {int(x) for x in which.split(",") if x.strip()}
+    return [r for r in rows if r["row_no"] in wanted]
+
+
+def approve(campaign: str, which: str) -> Dict[str, int]:
+    """Save the selected drafts to the archive; duplicates are rejected."""
+    from memory.post_store import save_post
+
+    stats = {"approved": 0, "duplicate": 0}
+    for r in _select(campaign, which):
+        post_id = save_post(r["channel"], r["draft"], r["image_url"])
+        if post_id:
+            review_store.set_status(campaign, r["row_key"], "approved", post_id)
+            stats["approved"] += 1
+        else:
+            review_store.set_status(campaign, r["row_key"], "rejected")
+            stats["duplicate"] += 1
+    return stats
+
+
+def reject(campaign: str, which: str) -> int:
+    rows = _select(campaign, which)
+    for r in rows:
+        review_store.set_status(campaign, r["row_key"], "rejected")
+    return len(rows)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Batch-generate a content campaign for review.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_run = sub.add_parser("run", help="draft every row of a plan file")
+    p_run.add_argument("plan", type=Path)
+    p_run.add_argument("--name", help="campaign name (default: plan file stem)")
+    p_run.add_argument("--workers", type=int, default=WORKERS, help="rows drafted in parallel")
+    p_status = sub.add_parser("status", help="draft counts per campaign")
+    p_status.add_argument("campaign", nargs="?")
+    p_review = sub.add_parser("review", help="list drafts waiting for review")
+    p_review.add_argument("campaign")
+    for name in ("approve", "reject"):
+        p = sub.add_parser(name, help=f"{name} drafts by row number, or all")
+        p.add_argument("campaign")
+        p.add_argument("which", help="all | comma-separated row numbers")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.cmd == "run":
+        try:
+            stats = run_campaign(args.plan, args.name, args.workers)
+        except KeyboardInterrupt:
+            sys.exit(130)
+        except ValueError as e:
+            sys.exit(f"❌ {e}")
+        print(f"✅ {stats['drafted']} drafted, {stats['failed']} failed, "
+              f"{stats['skipped']} already done – review with: "
+              f"python campaign.py review {args.name or args.plan.stem}")
+    elif args.cmd == "status":
+        for name, counts in review_store.campaigns().items():
+            if args.campaign in (None, name):
+                print(f"{name}: " + ", ".join(f"{n} {s}" for s, n in sorted(counts.items())))
+    elif args.cmd == "review":
+        rows = review_store.drafts(args.campaign)
+        if not rows:
+            print("Nothing waiting for review.")
+        for r in rows:
+            img = f"\n    Image: {r['image_url']}" if r["image_url"] else ""
+            print(f"[{r['row_no']}] {r['channel']} – {r['topic']}\n    {r['draft']}{img}\n")
+    elif args.cmd == "approve":
+        stats = approve(args.campaign, args.which)
+        print(f"✅ {stats['approved']} approved, {stats['duplicate']} rejected as duplicates")
+    else:
+        print(f"{reject(args.campaign, args.which)} rejected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+# dispatcher.py
+"""
+Publish dispatcher
+==================
+Publishes queued items from memory/schedule_store when they fall due and
+writes the outcome back to the store (status sent / failed).
+
+    due items    min-heap keyed by publish time; the loop sleeps until the
+                 head is due.  Queued rows are reloaded only when another
+                 writer changed the store (the dispatcher's own status
+                 writes are applied to the heap directly), and as a safety
+                 net every RESYNC_S
+    publishers   one per channel, pluggable; FilePublisher (data/outbox/
+                 <channel>.jsonl) and HttpPublisher are local stubs
+    rate limits  token bucket per channel; over-limit items are re-heaped
+                 for when the next token arrives.  A rate of 0 pauses the
+                 channel: its items wait in the queue until restarted
+                 with a non-zero rate
+    retries      exponential backoff with jitter, MAX_ATTEMPTS in total;
+                 attempts and the last error are kept on the row
+    metrics      sent / failed / retries, throughput and publish lag
+                 (publish time − due time), logged and written to
+                 memory/dispatch_metrics.json for `show dispatch`;
+                 per_min is reported once a full THROUGHPUT_WINDOW_S has passed
+
+A row is due at DISPATCH_AT (local time, default 09:00) on its date.
+Rows never attempted that are more than DISPATCH_MAX_LATENESS_S (default
+one day; 0 = no limit) past due are marked "skipped" instead of
+published, so a dispatcher started after a long gap does not flood every
+channel with stale posts.  Retries keep their backoff schedule.
+
+    python dispatcher.py                  run until Ctrl-C
+    python dispatcher.py --once           publish what is due now, then exit
+    python dispatcher.py --http URL       POST items to URL instead of the outbox
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+import datetime
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from memory import schedule_store
+from memory.atomic import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DIR = Path("data/outbox")
+METRICS_PATH = Path("memory/dispatch_metrics.json")
+
+DISPATCH_AT = datetime.time.fromisoformat(os.getenv("DISPATCH_AT", "09:00"))
+RATE_PER_MIN = float(os.getenv("DISPATCH_RATE_PER_MIN", "10"))
+BURST = int(os.getenv("DISPATCH_BURST", "3"))
+MAX_ATTEMPTS = int(os.getenv("DISPATCH_MAX_ATTEMPTS", "5"))
+BACKOFF_S = float(os.getenv("DISPATCH_BACKOFF_S", "30"))
+BACKOFF_CAP_S = 3600.0
+MAX_LATENESS_S = float(os.getenv("DISPATCH_MAX_LATENESS_S", "86400"))
+WORKERS = 4
+REFRESH_S = 30.0            # longest sleep before checking the store signature
+RESYNC_S = 600.0            # reload queued rows at least this often regardless
+STATS_EVERY_S = 60.0
+LAG_WINDOW = 1000           # lag samples kept for percentiles
+THROUGHPUT_WINDOW_S = 300.0
+
+Key = Tuple[str, str]       # (channel lower-cased, iso date) – the store's unique slot
+
+
+# ── publishers ─────────────────────────────────────────────────────
+class Publisher(abc.ABC):
+    """publish(item) returns on success and raises on failure (retried)."""
+
+    @abc.abstractmethod
+    def publish(self, item: Dict) -> None:
+        ...
+
+
+def _payload(item: Dict) -> Dict:
+    return {
+        "post_id": item["post_id"],
+        "channel": item["channel"],
+        "text": item["text"],
+        "image_url": item.get("image_url"),
+        "scheduled_for": item["scheduled_for"],
+        "published_at": datetime.datetime.utcnow().isoformat(timespec="seconds"),
+    }
+
+
+class FilePublisher(Publisher):
+    """Appends each item to <outbox>/<channel>.jsonl.  `fail_rate` injects errors."""
+
+    def __init__(self, outbox: Path = OUTBOX_DIR, fail_rate: float = 0.0):
+        self.outbox = outbox
+        self.fail_rate = fail_rate
+        self._lock = threading.Lock()
+        outbox.mkdir(parents=True, exist_ok=True)
+
+    def publish(self, item: Dict) -> None:
+        if self.fail_rate and random.random() < self.fail_rate:
+            raise RuntimeError("simulated publish failure")
+        line = json.dumps(_payload(item), ensure_ascii=False)
+        with self._lock, (self.outbox / f"{item['channel'].lower()}.jsonl").open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class HttpPublisher(Publisher):
+    """POSTs each item as JSON to `url`; any non-2xx response is a failure."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        import requests                         # only needed when this stub is used
+
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def publish(self, item: Dict) -> None:
+        resp = self._session.post(self.url, json=_payload(item), timeout=self.timeout)
+        resp.raise_for_status()
+
+
+# ── rate limiting / metrics ────────────────────────────────────────
+class _Bucket:
+    def __init__(self, per_min: float, burst: int):
+        if per_min < 0 or burst < 1:
+            raise ValueError(f"rate limit needs per_min >= 0 and burst >= 1, not {per_min}/{burst}")
+        self.rate = per_min / 60.0
+        self.burst = burst
+        self.tokens = float(burst) if per_min else 0.0
+        self.t = time.time()
+
+    def take(self, now: float) -> float:
+        """0 if a token was taken, else seconds until one is available (inf: paused)."""
+        if not self.rate:
+            return math.inf
+        # a bucket created after the caller read the clock starts full, not short
+        self.tokens = min(self.burst, self.tokens + max(now - self.t, 0.0) * self.rate)
+        self.t = max(now, self.t)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.sent = self.failed = self.retries = self.rate_limited = self.skipped = 0
+        self._sent_times: deque = deque()
+        self._lags: deque = deque(maxlen=LAG_WINDOW)
+
+    def record_sent(self, lag_s: float) -> None:
+        now = time.time()
+        with self._lock:
+            self.sent += 1
+            self._sent_times.append(now)
+            self._lags.append(lag_s)
+
+    def record_failed(self) -> None:
+        with self._lock:
+            self.failed += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_rate_limited(self) -> None:
+        with self._lock:
+            self.rate_limited += 1
+
+    def record_skipped(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def snapshot(self, **gauges) -> Dict:
+        now = time.time()
+        with self._lock:
+            while self._sent_times and self._sent_times[0] < now - THROUGHPUT_WINDOW_S:
+                self._sent_times.popleft()
+            lags = sorted(self._lags)
+            recent = len(self._sent_times)
+            counts = dict(sent=self.sent, failed=self.failed, retries=self.retries,
+                          rate_limited=self.rate_limited, skipped=self.skipped)
+
+        def pct(p: float) -> Optional[float]:
+            return round(lags[min(len(lags) - 1, int(p * len(lags)))], 2) if lags else None
+
+        uptime = now - self.started
+        # a partial window extrapolates a handful of sends into absurd rates
+        per_min = round(recent * 60.0 / THROUGHPUT_WINDOW_S, 2) if uptime >= THROUGHPUT_WINDOW_S else None
+        return {
+            **counts,
+            **gauges,
+            "uptime_s": round(uptime, 1),
+            "per_min": per_min,
+            "lag_p50_s": pct(0.50),
+            "lag_p95_s": pct(0.95),
+            "lag_max_s": round(lags[-1], 2) if lags else None,
+            "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+
+
+def read_metrics() -> Dict | None:
+    """Last metrics written by a running (or finished) dispatcher."""
+    try:
+        return json.loads(METRICS_PATH.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# ── dispatcher ─────────────────────────────────────────────────────
+def _due(row: Dict) -> float:
+    day = datetime.date.fromisoformat(row["scheduled_for"])
+    return datetime.datetime.combine(day, DISPATCH_AT).timestamp()
+
+
+def _key(row: Dict) -> Key:
+    return row["channel"].lower(), row["scheduled_for"]
+
+
+def _too_late(row: Dict, now: float) -> bool:
+    """Never attempted and further past due than MAX_LATENESS_S allows."""
+    return (MAX_LATENESS_S > 0 and not int(row.get("attempts") or 0)
+            and now - _due(row) > MAX_LATENESS_S)
+
+
+class Dispatcher:
+    def __init__(self, default: Publisher | None = None,
+                 publishers: Dict[str, Publisher] | None = None,
+                 rate_limits: Dict[str, Tuple[float, int]] | None = None,
+                 workers: int = WORKERS):
+        self.default = default or FilePublisher()
+        self._publishers = {ch.lower(): p for ch, p in (publishers or {}).items()}
+        self._limits = {ch.lower(): lim for ch, lim in (rate_limits or {}).items()}
+        self._buckets: Dict[str, _Bucket] = {}
+        self.metrics = Metrics()
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._heap: List[tuple] = []             # (not_before, seq, key, row)
+        self._seq = itertools.count()
+        self._sig = object()                     # never equal: first sync loads
+        self._synced = 0.0
+        self._settled = 0                        # publishes finished, see _sync
+        self._inflight: set = set()
+        self._retry_at: Dict[Key, float] = {}    # backoff deadlines, survive re-syncs
+        self._rate_at: Dict[Key, float] = {}     # rate-limit deferrals
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="publish")
+        self._thread: threading.Thread | None = None
+        self._last_stats = 0.0
+
+    def register(self, channel: str, publisher: Publisher) -> None:
+        self._publishers[channel.lower()] = publisher
+
+    def publisher_for(self, channel: str) -> Publisher:
+        return self._publishers.get(channel.lower(), self.default)
+
+    def _bucket(self, channel: str) -> _Bucket:
+        ch = channel.lower()
+        if ch not in self._buckets:
+            self._buckets[ch] = _Bucket(*self._limits.get(ch, (RATE_PER_MIN, BURST)))
+        return self._buckets[ch]
+
+    # ── heap maintenance ──
+    def _sync(self) -> None:
+        """Rebuild the heap from the store's queued rows if someone else changed the store."""
+        sig = schedule_store.store_signature()
+        if sig == self._sig and time.time() - self._synced < RESYNC_S:
+            return
+        while True:
+            settled = self._settled
+            rows = schedule_store.pending()
+            now = time.time()
+            with self._lock:
+                if settled != self._settled:
+                    continue                     # a publish finished mid-read: its row is stale
+                live = {_key(r) for r in rows}
+                self._retry_at = {k: t for k, t in self._retry_at.items() if k in live}
+                self._rate_at = {k: t for k, t in self._rate_at.items() if k in live}
+                heap, late = [], []
+                for r in rows:
+                    key = _key(r)
+                    if key in self._inflight:
+                        continue
+                    if _too_late(r, now):
+                        late.append(r)
+                        continue
+                    at = max(_due(r), self._retry_at.get(key, 0.0), self._rate_at.get(key, 0.0))
+                    heap.append((at, next(self._seq), key, r))
+                heapq.heapify(heap)
+                self._heap = heap
+                self._sig = sig
+                self._synced = now
+                break
+        for r in late:
+            missed = now - _due(r)
+            self._set_status(r["channel"], r["scheduled_for"], "skipped",
+                             error=f"not published: {missed / 3600:.0f}h past due")
+            self.metrics.record_skipped()
+            logger.warning("skipped %s %s: %.0fh past due (DISPATCH_MAX_LATENESS_S=%.0f)",
+                           r["channel"], r["scheduled_for"], missed / 3600, MAX_LATENESS_S)
+
+    def _pop_due(self, now: float) -> List[tuple]:
+        with self._lock:
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap))
+            return due
+
+    def _sleep_for(self, now: float) -> float:
+        with self._lock:
+            head = self._heap[0][0] - now if self._heap else REFRESH_S
+        return max(0.0, min(head, REFRESH_S))
+
+    # ── publishing ──
+    def _dispatch(self, entry: tuple, now: float) -> None:
+        _, _, key, row = entry
+        wait = self._bucket(row["channel"]).take(now)
+        with self._lock:
+            if wait:
+                self._rate_at[key] = now + wait
+                heapq.heappush(self._heap, (now + wait, next(self._seq), key, row))
+            else:
+                self._rate_at.pop(key, None)
+                self._inflight.add(key)
+        if wait:
+            self.metrics.record_rate_limited()
+        else:
+            self._pool.submit(self._publish, key, row)
+
+    def _set_status(self, channel: str, day: str, status: str, **kw) -> None:
+        """Store write whose effect the heap already reflects: adopt the new
+        signature so it does not trigger a reload – unless another writer got
+        in first."""
+        before = schedule_store.store_signature()
+        schedule_store.set_status(channel, day, status, **kw)
+        after = schedule_store.store_signature()
+        with self._lock:
+            if self._sig == before:
+                self._sig = after
+
+    def _publish(self, key: Key, row: Dict) -> None:
+        channel, day = row["channel"], row["scheduled_for"]
+        attempts = int(row.get("attempts") or 0) + 1
+        retry = None
+        try:
+            self.publisher_for(channel).publish(row)
+        except Exception as e:
+            err = f"{type(e).__name__}: {e}"
+            if attempts >= MAX_ATTEMPTS:
+                self._set_status(channel, day, "failed", attempts=attempts, error=err)
+                self.metrics.record_failed()
+                logger.error("publish %s %s failed after %d attempts: %s", channel, day, attempts, err)
+            else:
+                delay = min(BACKOFF_CAP_S, BACKOFF_S * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+                retry = (time.time() + delay, {**row, "attempts": attempts, "error": err})
+                self._set_status(channel, day, "queued", attempts=attempts, error=err)
+                self.metrics.record_retry()
+                logger.warning("publish %s %s attempt %d failed (%s); retry in %.0fs",
+                               channel, day, attempts, err, delay)
+        else:
+            self._set_status(channel, day, "sent", attempts=attempts)
+            self.metrics.record_sent(time.time() - _due(row))
+            logger.info("published %s %s (%s)", channel, day, row["post_id"][:8])
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+                if retry is not None:
+                    self._retry_at[key] = retry[0]
+                    heapq.heappush(self._heap, (retry[0], next(self._seq), key, retry[1]))
+                self._settled += 1
+            self._wake.set()
+
+    # ── loop ──
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            queued, inflight = len(self._heap), len(self._inflight)
+            overdue = [now - e[0] for e in self._heap if e[0] <= now]
+        return self.metrics.snapshot(queued=queued, inflight=inflight,
+                                     overdue=len(overdue),
+                                     oldest_overdue_s=round(max(overdue), 2) if overdue else 0.0)
+
+    def _report(self, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_stats < STATS_EVERY_S:
+            return
+        self._last_stats = now
+        snap = self.stats()
+        atomic_write_json(METRICS_PATH, snap)
+        logger.info("dispatch: %d sent, %d failed, %d retries, %s/min, lag p95 %ss, %d queued",
+                    snap["sent"], snap["failed"], snap["retries"],
+                    snap["per_min"], snap["lag_p95_s"], snap["queued"])
+
+    def _step(self) -> None:
+        self._sync()
+        now = time.time()
+        for entry in self._pop_due(now):
+            self._dispatch(entry, now)
+        self._report()
+
+    def _idle(self, cutoff: float) -> bool:
+        """Nothing publishing and nothing due by `cutoff` except backoff retries and paused channels."""
+        with self._lock:
+            return not self._inflight and not any(
+                _due(row) <= cutoff and key not in self._retry_at and at != math.inf
+                for at, _, key, row in self._heap
+            )
+
+    def run(self, once: bool = False) -> Dict:
+        """
+        Dispatch until stop() (or, with once=True, until everything due at
+        call time is published or waiting on a retry).  Returns final stats.
+        """
+        cutoff = time.time()
+        try:
+            while not self._stop.is_set():
+                self._step()
+                if once and self._idle(cutoff):
+                    break
+                self._wake.wait(self._sleep_for(time.time()))
+                self._wake.clear()
+        finally:
+            self._pool.shutdown(wait=True)
+            self._report(force=True)
+        return self.stats()
+
+    def start(self) -> "Dispatcher":
+        """Run in a daemon thread (e.g. alongside the CLI)."""
+        self._thread = threading.Thread(target=self.run, name="dispatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def wake(self) -> None:
+        """Re-check the store now instead of at the next timer (after an in-process add)."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Publish scheduled posts as they fall due.")
+    ap.add_argument("--once", action="store_true", help="publish what is due now, then exit")
+    ap.add_argument("--http", metavar="URL", help="POST items to URL instead of data/outbox/")
+    ap.add_argument("--fail-rate", type=float, default=0.0,
+                    help="outbox stub: fraction of publishes that fail (exercises retries)")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    default = HttpPublisher(args.http) if args.http else FilePublisher(fail_rate=args.fail_rate)
+    dispatcher = Dispatcher(default)
+    try:
+        stats = dispatcher.run(once=args.once)
+    except KeyboardInterrupt:
+        dispatcher.stop()
+        stats = dispatcher.stats()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
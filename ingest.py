@@ -0,0 +1,174 @@
+# ingest.py
+"""
+Streaming ingestion pipeline
+============================
+crawl → clean → chunk → batch-embed → index, one bounded stage at a time:
+
+    pages   (crawler thread)        ─┐ queue ≤ queue_size
+    clean + chunk (chunker thread)  ─┤ queue ≤ queue_size
+    embed_many(batch) → KBWriter    ─┘ main thread, batch_size chunks
+
+Only chunks whose hash changed are embedded (kb.KBWriter), so a re-crawl
+of an unchanged site embeds nothing.  Progress lines report pages/s and
+chunks/s while the run is going.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from agents.scraper import iter_pages, page_to_document
+from kb import KBWriter
+from memory.embeddings import embed_many
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MIN_PAGE_CHARS = 200        # nav-only / error pages are not worth indexing
+
+
+# ── plumbing ───────────────────────────────────────────────────────
+def _threaded(source: Iterable[T], maxsize: int, name: str) -> Iterator[T]:
+    """
+    Drain `source` on a worker thread through a bounded queue.  Closing
+    the returned generator (or the consumer failing) stops the worker.
+    """
+    out: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    end = object()
+
+    def _offer(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False                         # consumer went away
+
+    def _run():
+        try:
+            for item in source:
+                if not _offer(item):
+                    break
+        except Exception as e:  # re-raised on the consumer side
+            _offer(e)
+        finally:
+            getattr(source, "close", lambda: None)()   # e.g. stop the crawler
+        _offer(end)
+
+    threading.Thread(target=_run, name=name, daemon=True).start()
+    try:
+        while True:
+            item = out.get()
+            if item is end:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def _batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _Progress:
+    def __init__(self, every_s: float, printer: Callable[[str], None]):
+        self.t0 = time.perf_counter()
+        self.last = self.t0
+        self.every_s = every_s
+        self.printer = printer
+        self.pages = 0
+        self.chunks = 0
+
+    def line(self) -> str:
+        dt = max(time.perf_counter() - self.t0, 1e-9)
+        return (
+            f"{self.pages} pages ({self.pages / dt:.1f}/s), "
+            f"{self.chunks} chunks embedded ({self.chunks / dt:.1f}/s) in {dt:.1f}s"
+        )
+
+    def tick(self) -> None:
+        now = time.perf_counter()
+        if now - self.last >= self.every_s:
+            self.last = now
+            self.printer(self.line())
+
+
+# ── stages ─────────────────────────────────────────────────────────
+def clean_text(text: str) -> str:
+    """Collapse whitespace runs and the blank-line padding html2text leaves."""
+    lines = [re.sub(r"[ \t]+", " ", ln).strip() for ln in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _plan_chunks(writer: KBWriter, pages: Iterable, progress: _Progress) -> Iterator:
+    """clean + chunk: yields only the nodes that need a fresh embedding."""
+    for page in pages:
+        progress.pages += 1
+        page.text = clean_text(page.text)
+        doc = page_to_document(page)
+        if len(page.text) < MIN_PAGE_CHARS:
+            writer.keep(doc)             # not worth indexing now, but don't prune it
+            continue
+        yield from writer.plan(doc)
+
+
+def run_pipeline(
+    base_url: str,
+    depth: int = 1,
+    *,
+    batch_size: int = 64,
+    queue_size: int = 16,
+    prune: bool = True,
+    report_every_s: float = 5.0,
+    printer: Callable[[str], None] = print,
+    crawl_kwargs: Optional[Dict] = None,
+) -> Dict[str, float]:
+    """
+    Crawl `base_url` and stream it into the KB.  Memory stays bounded by
+    `queue_size` pages / chunks per queue plus one `batch_size` batch.
+    Returns the KBWriter counts plus pages, seconds and rates.
+    """
+    writer = KBWriter()
+    progress = _Progress(report_every_s, printer)
+
+    pages = iter_pages(base_url, depth, maxsize=queue_size, **(crawl_kwargs or {}))
+    nodes = _threaded(_plan_chunks(writer, pages, progress), queue_size, "chunker")
+
+    try:
+        for batch in _batched(nodes, batch_size):
+            vectors = embed_many([n.get_content() for n in batch])
+            for node, vec in zip(batch, vectors):
+                node.embedding = vec.tolist()
+            writer.add_nodes(batch)
+            progress.chunks += len(batch)
+            progress.tick()
+    finally:
+        nodes.close()                    # stops the chunker if embedding failed
+
+    stats: Dict[str, float] = dict(writer.commit(prune=prune))
+    elapsed = time.perf_counter() - progress.t0
+    stats.update(
+        pages=progress.pages,
+        seconds=round(elapsed, 2),
+        pages_per_s=round(progress.pages / max(elapsed, 1e-9), 2),
+        chunks_per_s=round(progress.chunks / max(elapsed, 1e-9), 2),
+    )
+    printer(f"done: {progress.line()}")
+    return stats
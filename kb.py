@@ -2,16 +2,25 @@
 """
 Central place for:
 1. Building / loading the persisted FAISS vector store (RAG memory)
-2. Registering the default embedding model (MiniLM, local)
-3. Registering the default LLM (Gemini-1.5-flash via LangChain)
+2. Registering the default embedding model (MiniLM, local) – lazily
+3. Registering the default LLM (llm_provider: Gemini, stub or cassette) – lazily
 4. Returning a ready-to-use QueryEngine with adjustable top-k
+5. Retrieval-only access to the raw top-k chunks (no LLM call)
+6. Incremental, hash-based upserts of re-scraped pages
+7. Hybrid retrieval: BM25 keyword index fused with FAISS via RRF
 
 Works without any OpenAI key.
 """
 
 from pathlib import Path
+import ast
+import hashlib
+import json
+import logging
+import math
 import os
-from typing import Optional
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # --- Load env so GOOGLE_API_KEY is visible no matter who imports kb.py ----
 from dotenv import load_dotenv
@@ -19,64 +28,612 @@ from dotenv import load_dotenv
 load_dotenv()  # must be before we construct the LLM
 
 # ---------------- Llama-Index / LangChain imports -------------------------
+import faiss
+import numpy as np
 from llama_index.core import (
     VectorStoreIndex,
     StorageContext,
     load_index_from_storage,
     Settings,
 )
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from langchain_google_genai import ChatGoogleGenerativeAI
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.vector_stores.faiss import FaissMapVectorStore, FaissVectorStore
+
+from memory.bm25 import BM25Index
+from memory.embeddings import EMBED_DIM, get_embed_model
+
+logger = logging.getLogger(__name__)
 
 # ---------------- Constants & shared singletons --------------------------
 INDEX_DIR = Path("memory/vector_store")
 INDEX_DIR.mkdir(parents=True, exist_ok=True)  # ensure folder exists
 
-# Local MiniLM embedder (384-d, small, free)
-_EMBED = HuggingFaceEmbedding(
-    model_name="sentence-transformers/all-MiniLM-L6-v2",
-)
+# LlamaIndex keeps the historical file name; the content is a FAISS binary.
+VECTOR_PATH = INDEX_DIR / "default__vector_store.json"
+ID_MAP_PATH = INDEX_DIR / "id_map.json"
+# {"docs": {doc_key: {"hash": sha256, "chunks": {chunk_sha256: node_id}}}}
+MANIFEST_PATH = INDEX_DIR / "manifest.json"
+BM25_PATH = INDEX_DIR / "bm25.json"
+# Explicit layout marker, written with every persist: {"vector_store": "faiss", "version": 1}
+FORMAT_PATH = INDEX_DIR / "store_format.json"
+STORE_FORMAT_VERSION = 1
+
+# Above this many chunks the store switches from exact IndexFlatIP to IVF.
+ANN_THRESHOLD = int(os.getenv("KB_ANN_THRESHOLD", "20000"))
+# Reciprocal-rank-fusion constant, and when BM25 alone is trusted:
+# every query term present in the top chunk and a clear lead over #2.
+RRF_K = 60
+KEYWORD_MARGIN = 1.5
+# Read-only load that maps the flat vector codes straight from disk.
+_MMAP_FLAGS = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+
+# Nothing heavy is created at import time: the MiniLM embedder and the
+# Gemini client are built on first use and then registered as the
+# Llama-Index defaults.
+_LLM = None
+_LLM_LOCK = threading.Lock()
+
+
+def get_llm():
+    """Query-engine LLM from llm_provider (Gemini unless LLM_PROVIDER says otherwise)."""
+    global _LLM
+    with _LLM_LOCK:
+        if _LLM is None:
+            from llm_provider import chat_model
+
+            _LLM = chat_model("kb", temperature=0.8)   # bump up for more variety
+            Settings.llm = _LLM
+        return _LLM
+
+
+def _embed_model():
+    """Shared MiniLM embedder, registered as the Llama-Index default."""
+    model = get_embed_model()
+    Settings.embed_model = model
+    return model
+
+
+# ---------------- Process-wide index / engine cache ----------------------
+# The persisted store is parsed once per process and re-used by every
+# rag_search / profiler call.  A cheap stat() fingerprint of INDEX_DIR
+# tells us when someone rebuilt the store underneath us.
+_CACHE_LOCK = threading.RLock()
+_CACHE: Dict[str, object] = {
+    "fingerprint": None,
+    "index": None,
+    "bm25": None,
+    "engines": {},
+    "retrievers": {},
+}
+
+
+def fingerprint() -> Tuple:
+    """(name, size, mtime_ns) of every file in INDEX_DIR – changes on rebuild."""
+    if not INDEX_DIR.exists():
+        return ()
+    stats = []
+    for f in sorted(INDEX_DIR.iterdir()):
+        if f.is_file():
+            st = f.stat()
+            stats.append((f.name, st.st_size, st.st_mtime_ns))
+    return tuple(stats)
+
+
+def invalidate() -> None:
+    """Drop the cached index and engines; next call reloads from disk."""
+    with _CACHE_LOCK:
+        _CACHE["fingerprint"] = None
+        _CACHE["index"] = None
+        _CACHE["bm25"] = None
+        _CACHE["engines"] = {}
+        _CACHE["retrievers"] = {}
+
+
+# ---------------- FAISS vector store ------------------------------------
+class _FaissStore(FaissMapVectorStore):
+    """
+    FaissMapVectorStore that allocates faiss ids past the current maximum.
+    Upstream uses `ntotal` as the next id, which collides with live ids
+    once anything has been deleted.  Also adds the batch in one call,
+    and accepts a bare IVF index (see `_new_faiss_index`).
+    """
+
+    def __init__(self, faiss_index: faiss.Index):
+        if isinstance(faiss_index, faiss.IndexIDMap):
+            super().__init__(faiss_index=faiss_index)
+            return
+        # IVF keeps caller ids itself; the map store's IDMap check exists
+        # only to guarantee that, so build through the plain FAISS store
+        FaissVectorStore.__init__(self, faiss_index=faiss_index)
+        self._node_id_to_faiss_id_map = {}
+        self._faiss_id_to_node_id_map = {}
+
+    def add(self, nodes, **add_kwargs) -> List[str]:
+        if not nodes:
+            return []
+        start = max(self._faiss_id_to_node_id_map, default=-1) + 1
+        ids = np.arange(start, start + len(nodes), dtype=np.int64)
+        vectors = np.asarray([n.get_embedding() for n in nodes], dtype="float32")
+        self.client.add_with_ids(vectors, ids)
+        for fid, node in zip(ids.tolist(), nodes):
+            self._node_id_to_faiss_id_map[node.id_] = fid
+            self._faiss_id_to_node_id_map[fid] = node.id_
+        return [n.id_ for n in nodes]
+
+
+def _new_faiss_index(vectors: Optional[np.ndarray] = None) -> faiss.Index:
+    """
+    Empty inner-product index taking caller ids (MiniLM vectors are
+    normalised, so IP == cosine).  IDMap2 over flat for small corpora; IVF,
+    trained on `vectors`, once the corpus reaches ANN_THRESHOLD.  IVF
+    stores ids itself and is not wrapped: IDMap.remove_ids assumes the
+    inner index shifts down after a removal, which IVF does not, so the
+    wrapper's labels drift.  HNSW is not used because it cannot remove
+    ids, which incremental re-ingestion needs.
+    """
+    n = 0 if vectors is None else len(vectors)
+    if n < ANN_THRESHOLD:
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(EMBED_DIM))
+
+    nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))  # faiss wants ≥39 pts/list
+    ivf = faiss.IndexIVFFlat(
+        faiss.IndexFlatIP(EMBED_DIM), EMBED_DIM, nlist, faiss.METRIC_INNER_PRODUCT
+    )
+    ivf.train(vectors)
+    ivf.nprobe = max(1, nlist // 16)
+    return ivf
 
-# Gemini LLM (no cache so temperature makes a difference)
-_LLM = ChatGoogleGenerativeAI(
-    model="models/gemini-1.5-flash-latest",
-    temperature=0.8,          # bump up for more variety
-    google_api_key=os.getenv("GOOGLE_API_KEY"),
-    cache=False,               # TURN OFF LangChain response cache
-)
 
-# Register as global defaults so any Llama-Index call picks them up
-Settings.embed_model = _EMBED
-Settings.llm = _LLM
+def _promoted_index(current: faiss.Index) -> Optional[faiss.Index]:
+    """IVF copy of a flat index that has passed ANN_THRESHOLD, else None."""
+    if current.ntotal < ANN_THRESHOLD or not isinstance(current, faiss.IndexIDMap2):
+        return None  # small, or already ANN
+    ids = faiss.vector_to_array(current.id_map)
+    vectors = current.index.reconstruct_n(0, current.ntotal)
+    promoted = _new_faiss_index(vectors)
+    promoted.add_with_ids(vectors, ids)
+    return promoted
+
+
+def _persist(storage: StorageContext) -> None:
+    """
+    Persist the storage context to INDEX_DIR.  A flat index past
+    ANN_THRESHOLD is written out as IVF instead; readers reload from disk
+    (invalidate), so the in-memory store can stay flat.
+    """
+    storage.persist(persist_dir=str(INDEX_DIR))
+    promoted = _promoted_index(storage.vector_store.client)
+    if promoted is not None:
+        tmp = VECTOR_PATH.with_suffix(".tmp")
+        faiss.write_index(promoted, str(tmp))
+        os.replace(tmp, VECTOR_PATH)
+    _mark_faiss_format()
+
+
+def _store_format() -> Optional[str]:
+    """"faiss" or "json" (pre-FAISS SimpleVectorStore); None when there is no store."""
+    if FORMAT_PATH.exists():
+        marker = json.loads(FORMAT_PATH.read_text())
+        if marker.get("version", 0) > STORE_FORMAT_VERSION:
+            raise ValueError(f"{INDEX_DIR} was written by a newer version (format {marker}).")
+        return marker["vector_store"]
+    if not VECTOR_PATH.exists():
+        return None
+    # written before the marker existed: a JSON store is the only one that
+    # starts with "{" (FAISS files open with a four-letter index tag)
+    with VECTOR_PATH.open("rb") as f:
+        return "json" if f.read(1) == b"{" else "faiss"
+
+
+def _mark_faiss_format() -> None:
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = FORMAT_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"vector_store": "faiss", "version": STORE_FORMAT_VERSION}))
+    os.replace(tmp, FORMAT_PATH)
+
+
+def _is_legacy_store() -> bool:
+    """True for the pre-FAISS layout (SimpleVectorStore JSON)."""
+    return _store_format() == "json"
+
+
+def _load_vector_store(mmap: bool = True) -> _FaissStore:
+    """
+    Open the persisted FAISS store.  `mmap=True` gives a read-only,
+    memory-mapped index for the query path; writers pass `mmap=False`.
+    """
+    faiss_index = faiss.read_index(str(VECTOR_PATH), _MMAP_FLAGS if mmap else 0)
+    raw = ID_MAP_PATH.read_text()
+    try:
+        id_map = json.loads(raw)
+    except json.JSONDecodeError:  # older FaissMapVectorStore wrote str(dict)
+        id_map = ast.literal_eval(raw)
+    # same restore FaissMapVectorStore.from_persist_path does, minus the full read
+    store = _FaissStore(faiss_index=faiss_index)
+    store._node_id_to_faiss_id_map = {
+        k: int(v) for k, v in id_map["node_id_to_faiss_id_map"].items()
+    }
+    store._faiss_id_to_node_id_map = {
+        int(k): v for k, v in id_map["faiss_id_to_node_id_map"].items()
+    }
+    return store
+
+
+def _storage_context(mmap: bool = True) -> StorageContext:
+    if _is_legacy_store():
+        logger.warning(
+            "%s is a legacy JSON vector store – run `python migrate_kb.py`.", INDEX_DIR
+        )
+        return StorageContext.from_defaults(persist_dir=str(INDEX_DIR))
+    return StorageContext.from_defaults(
+        persist_dir=str(INDEX_DIR), vector_store=_load_vector_store(mmap)
+    )
+
+
+def migrate_to_faiss() -> int:
+    """
+    Convert a legacy SimpleVectorStore in INDEX_DIR to the FAISS layout,
+    in place.  Docstore and index_store are untouched (node ids are kept).
+    Returns the number of vectors migrated; 0 when nothing to do.
+    """
+    if not _is_legacy_store():
+        return 0
+
+    legacy = json.loads(VECTOR_PATH.read_text())
+    node_ids = list(legacy["embedding_dict"])
+    if not node_ids:
+        return 0
+    vectors = np.asarray(
+        [legacy["embedding_dict"][n] for n in node_ids], dtype="float32"
+    )
+    faiss.normalize_L2(vectors)
+
+    faiss_index = _new_faiss_index(vectors)
+    faiss_index.add_with_ids(vectors, np.arange(len(node_ids), dtype=np.int64))
+
+    store = _FaissStore(faiss_index=faiss_index)
+    store._node_id_to_faiss_id_map = {n: i for i, n in enumerate(node_ids)}
+    store._faiss_id_to_node_id_map = dict(enumerate(node_ids))
+
+    tmp = VECTOR_PATH.with_suffix(".tmp")
+    store.persist(persist_path=str(tmp))
+    os.replace(tmp, VECTOR_PATH)
+    _mark_faiss_format()
+    invalidate()
+    return len(node_ids)
 
 
 # -------------------------------------------------------------------------
-def build_or_load(docs: Optional[list] = None) -> VectorStoreIndex:
+def build_or_load(docs: Optional[list] = None, mmap: bool = True) -> VectorStoreIndex:
     """
-    If the vector store already exists, load & return it.
+    If the vector store already exists, load & return it (memory-mapped
+    and read-only unless `mmap=False`).
     Otherwise `docs` must be supplied to build, persist, and return.
     """
-    if INDEX_DIR.exists() and any(INDEX_DIR.iterdir()):
+    if INDEX_DIR.exists() and VECTOR_PATH.exists():
         return load_index_from_storage(
-            StorageContext.from_defaults(persist_dir=str(INDEX_DIR)),
-            embed_model=_EMBED,  # explicit, although Settings already set
+            _storage_context(mmap),
+            embed_model=_embed_model(),
         )
 
     if docs is None:
         raise ValueError("Need `docs` to build a new index")
 
-    index = VectorStoreIndex.from_documents(docs, embed_model=_EMBED)
-    index.storage_context.persist(persist_dir=str(INDEX_DIR))
+    storage = StorageContext.from_defaults(
+        vector_store=_FaissStore(faiss_index=_new_faiss_index())
+    )
+    index = VectorStoreIndex.from_documents(
+        docs, storage_context=storage, embed_model=_embed_model()
+    )
+    _persist(index.storage_context)
+    invalidate()
     return index
 
 
+# ---------------- Incremental upserts -----------------------------------
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _doc_key(doc) -> str:
+    return doc.metadata.get("url") or doc.doc_id
+
+
+def _load_manifest(index: VectorStoreIndex) -> Dict:
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text())
+    # store built before manifests existed: rebuild chunk hashes from the
+    # docstore; doc hash None forces a chunk-level diff on the next upsert
+    manifest: Dict = {"docs": {}}
+    node_ids = list(index.index_struct.nodes_dict.values())
+    for node in index.docstore.get_nodes(node_ids, raise_error=False):
+        if node is None:
+            continue
+        key = node.metadata.get("url") or node.ref_doc_id or node.node_id
+        entry = manifest["docs"].setdefault(key, {"hash": None, "chunks": {}})
+        entry["chunks"][_sha(node.get_content())] = node.node_id
+    return manifest
+
+
+def _save_manifest(manifest: Dict) -> None:
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def _load_bm25(index: VectorStoreIndex) -> BM25Index:
+    if BM25_PATH.exists():
+        return BM25Index.load(BM25_PATH)
+    # store built before hybrid search: index the docstore chunks now
+    bm25 = BM25Index()
+    node_ids = list(index.index_struct.nodes_dict.values())
+    for node in index.docstore.get_nodes(node_ids, raise_error=False):
+        if node is not None:
+            bm25.add(node.node_id, node.get_content())
+    return bm25
+
+
+def open_writable() -> VectorStoreIndex:
+    """Load the store fully into RAM for writing (or create an empty one)."""
+    if _is_legacy_store():
+        raise ValueError(f"{INDEX_DIR} is a legacy JSON store – run `python migrate_kb.py` first.")
+    if VECTOR_PATH.exists():
+        return build_or_load(mmap=False)
+    storage = StorageContext.from_defaults(
+        vector_store=_FaissStore(faiss_index=_new_faiss_index())
+    )
+    return VectorStoreIndex(nodes=[], storage_context=storage, embed_model=_embed_model())
+
+
+class KBWriter:
+    """
+    Incremental writer behind `upsert_documents` and the streaming
+    ingestion pipeline (ingest.py).  Each page is keyed by URL (or doc id)
+    and hashed; changed pages are re-chunked and only chunks with a new
+    hash come back from `plan()` for embedding.  Chunks that vanished are
+    deleted, as are pages neither planned nor kept when `commit(prune=True)`.
+    Methods take one internal lock, so planning may run on a different
+    thread from add_nodes / commit.
+
+        w = KBWriter()
+        for doc in docs:
+            w.add_nodes(w.plan(doc))     # embeds nodes lacking .embedding
+        stats = w.commit()
+    """
+
+    def __init__(self):
+        self.index = open_writable()
+        self.manifest = _load_manifest(self.index)
+        self.bm25 = _load_bm25(self.index)
+        self.stats = dict.fromkeys(
+            ("added", "updated", "skipped", "deleted", "chunks_embedded", "chunks_deleted"), 0
+        )
+        self._splitter = Settings.node_parser
+        self._seen: set = set()
+        self._stale_ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def keep(self, doc) -> None:
+        """Leave `doc`'s indexed chunks as they are, but count it as seen (no prune)."""
+        with self._lock:
+            self._seen.add(_doc_key(doc))
+
+    def plan(self, doc) -> list:
+        """Record `doc` in the manifest and return its chunks that need embedding."""
+        with self._lock:
+            return self._plan(doc)
+
+    def _plan(self, doc) -> list:
+        key = _doc_key(doc)
+        self._seen.add(key)
+        doc_hash = _sha(doc.text)
+        entry = self.manifest["docs"].get(key)
+        if entry and entry["hash"] == doc_hash:
+            self.stats["skipped"] += 1
+            return []
+
+        old_chunks = entry["chunks"] if entry else {}
+        chunks: Dict[str, str] = {}
+        new_nodes = []
+        for node in self._splitter.get_nodes_from_documents([doc]):
+            ch = _sha(node.get_content())
+            if ch in chunks:
+                continue                       # repeated block on the same page
+            if ch in old_chunks:
+                chunks[ch] = old_chunks[ch]    # unchanged chunk – keep its vector
+            else:
+                chunks[ch] = node.node_id
+                new_nodes.append(node)
+        self._stale_ids += [nid for ch, nid in old_chunks.items() if ch not in chunks]
+        self.manifest["docs"][key] = {"hash": doc_hash, "chunks": chunks}
+        self.stats["updated" if entry else "added"] += 1
+        return new_nodes
+
+    def add_nodes(self, nodes: list) -> None:
+        """Insert planned nodes; any without a precomputed embedding get one."""
+        if nodes:
+            with self._lock:
+                self.index.insert_nodes(nodes)
+                for node in nodes:
+                    self.bm25.add(node.node_id, node.get_content())
+                self.stats["chunks_embedded"] += len(nodes)
+
+    def commit(self, prune: bool = True) -> Dict[str, int]:
+        """Apply deletions, persist index + manifest and drop read caches."""
+        with self._lock:
+            return self._commit(prune)
+
+    def _commit(self, prune: bool) -> Dict[str, int]:
+        if prune and self._seen:             # an empty crawl never wipes the KB
+            for key in [k for k in self.manifest["docs"] if k not in self._seen]:
+                self._stale_ids += list(self.manifest["docs"].pop(key)["chunks"].values())
+                self.stats["deleted"] += 1
+        if self._stale_ids:
+            self.index.delete_nodes(self._stale_ids, delete_from_docstore=True)
+            self.bm25.remove_many(self._stale_ids)
+        self.stats["chunks_deleted"] = len(self._stale_ids)
+
+        _persist(self.index.storage_context)
+        self.bm25.save(BM25_PATH)
+        _save_manifest(self.manifest)
+        invalidate()
+        return self.stats
+
+
+def upsert_documents(docs: Iterable, prune: bool = True) -> Dict[str, int]:
+    """
+    Bring the persisted KB in line with `docs` without re-embedding
+    unchanged text (see KBWriter).
+
+    Returns counts: added / updated / skipped / deleted (pages) and
+    chunks_embedded / chunks_deleted.
+    """
+    writer = KBWriter()
+    for doc in docs:
+        writer.add_nodes(writer.plan(doc))
+    return writer.commit(prune=prune)
+
+
+def get_index() -> VectorStoreIndex:
+    """
+    Return the process-resident index, reloading it only when the
+    persisted store changed on disk (or after `invalidate()`).
+    """
+    fp = fingerprint()
+    with _CACHE_LOCK:
+        if _CACHE["index"] is None or _CACHE["fingerprint"] != fp:
+            _CACHE["index"] = build_or_load()
+            _CACHE["bm25"] = _load_bm25(_CACHE["index"])
+            _CACHE["fingerprint"] = fp
+            _CACHE["engines"] = {}
+            _CACHE["retrievers"] = {}
+        return _CACHE["index"]
+
+
+def get_bm25() -> BM25Index:
+    """Keyword index matching the cached vector index."""
+    with _CACHE_LOCK:
+        get_index()
+        return _CACHE["bm25"]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 + FAISS fused by reciprocal rank.  When the keyword side is
+    confident (see `keyword_hits`) the dense side – and therefore the
+    query embedding – is skipped entirely.
+    """
+
+    def __init__(self, index: VectorStoreIndex, bm25: BM25Index, top_k: int):
+        super().__init__()
+        self._index = index
+        self._bm25 = bm25
+        self._top_k = top_k
+        self._dense = index.as_retriever(similarity_top_k=2 * top_k)
+
+    def keyword_hits(self, question: str) -> Optional[List[NodeWithScore]]:
+        """Top-k BM25 chunks if lexical confidence is high, else None."""
+        ranked = self._bm25.search(question, k=self._top_k)
+        if not ranked or ranked[0][2] < 1.0:
+            return None
+        if len(ranked) > 1 and ranked[0][1] < KEYWORD_MARGIN * ranked[1][1]:
+            return None
+        return self._to_nodes([(nid, score) for nid, score, _ in ranked])
+
+    def _to_nodes(self, scored: List[Tuple[str, float]]) -> List[NodeWithScore]:
+        nodes = self._index.docstore.get_nodes([nid for nid, _ in scored], raise_error=False)
+        return [
+            NodeWithScore(node=n, score=score)
+            for n, (_, score) in zip(nodes, scored)
+            if n is not None
+        ]
+
+    def ranked(self, query_bundle: QueryBundle) -> Tuple[List[NodeWithScore], str]:
+        """
+        Hits plus the path that produced them; the node scores are only
+        comparable within one path:
+            "keyword"  raw BM25 scores (confident lexical fast path)
+            "hybrid"   reciprocal-rank-fusion scores, at most 2 / (RRF_K + 1)
+        """
+        fast = self.keyword_hits(query_bundle.query_str)
+        if fast is not None:
+            return fast, "keyword"
+        return self._fused(query_bundle), "hybrid"
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        return self.ranked(query_bundle)[0]
+
+    def _fused(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        lexical = self._bm25.search(query_bundle.query_str, k=2 * self._top_k)
+        dense = self._dense.retrieve(query_bundle)
+        fused: Dict[str, float] = {}
+        by_id: Dict[str, NodeWithScore] = {}
+        for rank, hit in enumerate(dense):
+            by_id[hit.node.node_id] = hit
+            fused[hit.node.node_id] = 1.0 / (RRF_K + rank + 1)
+        for rank, (nid, _, _) in enumerate(lexical):
+            fused[nid] = fused.get(nid, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+        best = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[: self._top_k]
+        missing = [nid for nid, _ in best if nid not in by_id]
+        for hit in self._to_nodes([(nid, 0.0) for nid in missing]):
+            by_id[hit.node.node_id] = hit
+        return [
+            NodeWithScore(node=by_id[nid].node, score=score)
+            for nid, score in best
+            if nid in by_id
+        ]
+
+
 def get_query_engine(top_k: int = 5):
     """
-    Convenience wrapper that returns a RetrieverQueryEngine
-    with `similarity_top_k` chunks.  Uses persisted index.
+    Convenience wrapper that returns a RetrieverQueryEngine over the
+    hybrid retriever with `top_k` chunks.  Engines are cached per top_k.
+    """
+    with _CACHE_LOCK:
+        retriever = get_retriever(top_k)
+        engines = _CACHE["engines"]
+        if top_k not in engines:
+            engines[top_k] = RetrieverQueryEngine.from_args(retriever, llm=get_llm())
+        return engines[top_k]
+
+
+def get_retriever(top_k: int = 5) -> HybridRetriever:
+    """Cached hybrid retriever – no LLM synthesis."""
+    with _CACHE_LOCK:
+        index = get_index()
+        retrievers = _CACHE["retrievers"]
+        if top_k not in retrievers:
+            retrievers[top_k] = HybridRetriever(index, _CACHE["bm25"], top_k)
+        return retrievers[top_k]
+
+
+def keyword_hits(question: str, top_k: int = 5) -> Optional[List[NodeWithScore]]:
+    """BM25-only answer set when it is confident; never embeds the query."""
+    return get_retriever(top_k).keyword_hits(question)
+
+
+def retrieve(question: str, top_k: int = 5) -> List[Dict]:
+    """
+    Return the top-k raw chunks for `question` as
+    [{"text": str, "rank_score": float | None, "via": str, "source": str}, ...]
+    sorted best-first.  `rank_score` orders hits within one result only:
+    it is a BM25 score when `via` is "keyword" and an RRF score when it
+    is "hybrid" (see HybridRetriever.ranked).  `source` is the page URL
+    when known, else the parent document id.
     """
-    index = build_or_load()
-    return index.as_query_engine(similarity_top_k=top_k)
+    hits, via = get_retriever(top_k).ranked(QueryBundle(question))
+    return [
+        {
+            "text": h.node.get_content().strip(),
+            "rank_score": h.score,
+            "via": via,
+            "source": h.node.metadata.get("url") or h.node.ref_doc_id or h.node.node_id,
+        }
+        for h in hits
+    ]
 
 
 # Small manual test (run: python kb.py)
@@ -0,0 +1,297 @@
+# llm_provider.py
+"""
+LLM provider layer
+==================
+Every chat model in the agent – the KB query engine (kb.py), the draft
+writer (tools/generator.py) and the brand profiler – comes from
+chat_model(), so one setting decides where completions come from:
+
+    LLM_PROVIDER=gemini   live Gemini-1.5-Flash (default)
+    LLM_PROVIDER=stub     deterministic offline text, simulated latency
+    LLM_PROVIDER=record   live Gemini; every response saved to the cassette
+    LLM_PROVIDER=replay   responses served from the cassette, no network
+
+All four are LangChain chat models, so .invoke() / .stream() and the
+Llama-Index wrapper in kb.py behave the same whichever is active.
+
+Stub: the reply is derived from a hash of the prompt (same prompt, same
+text), streamed word by word after LLM_STUB_TTFT_MS, then
+LLM_STUB_TOKEN_MS per word.  The profiler role gets valid brand JSON.
+
+Cassette (LLM_CASSETTE, default data/cassettes/default.json):
+{sha256(model, temperature, prompt): {response, ttft_ms, latency_ms, …}}.
+A replay miss raises CassetteMiss – or falls back to the stub with
+LLM_REPLAY_MISS=stub.  Replayed text streams without delay unless
+LLM_REPLAY_REALTIME=1, which sleeps the recorded latencies so replayed
+runs time like the recording session.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from memory.atomic import atomic_write_json, file_lock
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = "models/gemini-1.5-flash-latest"
+PROVIDERS = ("gemini", "stub", "record", "replay")
+
+CASSETTE_PATH = Path(os.getenv("LLM_CASSETTE", "data/cassettes/default.json"))
+STUB_TTFT_MS = float(os.getenv("LLM_STUB_TTFT_MS", "300"))
+STUB_TOKEN_MS = float(os.getenv("LLM_STUB_TOKEN_MS", "15"))
+STUB_WORDS = int(os.getenv("LLM_STUB_WORDS", "60"))
+
+
+class CassetteMiss(KeyError):
+    """Replay asked for a prompt that was never recorded."""
+
+
+def provider() -> str:
+    name = os.getenv("LLM_PROVIDER", "gemini").strip().lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"LLM_PROVIDER must be one of {', '.join(PROVIDERS)}, not {name!r}")
+    return name
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n\n".join(f"{m.type}: {m.content}" for m in messages)
+
+
+def prompt_hash(model: str, temperature: float, prompt: str) -> str:
+    raw = json.dumps([model, round(temperature, 3), prompt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _words(text: str) -> List[str]:
+    """Stream units: each word with its trailing whitespace."""
+    return re.findall(r"\S+\s*", text) or [text]
+
+
+# ── deterministic stub ─────────────────────────────────────────────
+_VOCAB = (
+    "34ML builds mobile apps web platforms product teams clients launch faster "
+    "design engineering data AI automation delivery quality users growth scale "
+    "reliable secure roadmap discovery prototype feedback release iterate "
+    "partnership results experience ideas impact value"
+).split()
+
+_SUBJECT = re.compile(r"^(?:human:\s*)?(?:Topic|Query)\s*:\s*(.+)$", re.I | re.M)
+
+
+def stub_reply(role: str, prompt: str) -> str:
+    """Same (role, prompt) → same text; `profile` gets brand-profile JSON."""
+    seed = hashlib.sha256(f"{role}|{prompt}".encode("utf-8")).hexdigest()
+    rnd = random.Random(seed)
+    if role == "profile":
+        return json.dumps({
+            "tone": rnd.sample(["friendly", "confident", "practical", "clear", "optimistic", "expert"], 4),
+            "audience": "Founders and product leaders who need a reliable partner to build and scale digital products.",
+            "style_rules": [
+                "Lead with the customer outcome",
+                "Keep sentences short and concrete",
+                "Use at most two emojis",
+                "End with a clear call to action",
+            ],
+        }, indent=2)
+    subjects = _SUBJECT.findall(prompt)
+    head = f"{subjects[-1].strip()} – " if subjects else ""
+    body = " ".join(rnd.choice(_VOCAB) for _ in range(STUB_WORDS))
+    return f"{head}{body[0].upper()}{body[1:]}. [stub {seed[:8]}]"
+
+
+class StubChatModel(BaseChatModel):
+    """Offline chat model: hash-seeded text, simulated first-token and per-token latency."""
+
+    role: str = "draft"
+    ttft_ms: float = STUB_TTFT_MS
+    token_ms: float = STUB_TOKEN_MS
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _chunks(self, text: str, ttft_ms: float, total_ms: float) -> Iterator[str]:
+        words = _words(text)
+        per_word = max(total_ms - ttft_ms, 0.0) / max(len(words), 1)
+        time.sleep(ttft_ms / 1000)
+        for i, w in enumerate(words):
+            if i:
+                time.sleep(per_word / 1000)
+            yield w
+
+    def _timing(self, text: str) -> tuple:
+        return self.ttft_ms, self.ttft_ms + self.token_ms * len(_words(text))
+
+    def _reply(self, prompt: str) -> str:
+        return stub_reply(self.role, prompt)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = "".join(self._stream_text(messages, run_manager))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        for piece in self._stream_text(messages, run_manager):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    def _stream_text(self, messages: List[BaseMessage], run_manager=None) -> Iterator[str]:
+        text = self._reply(_prompt_text(messages))
+        for piece in self._chunks(text, *self._timing(text)):
+            if run_manager:
+                run_manager.on_llm_new_token(piece)
+            yield piece
+
+
+# ── record / replay ────────────────────────────────────────────────
+class _Cassette:
+    """{prompt hash: entry} JSON file; writers merge under a file lock."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        with self.path.open(encoding="utf-8") as f:
+            return json.load(f)
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            return self._entries.get(key)
+
+    def put(self, key: str, entry: Dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, file_lock(self.path):
+            entries = self._load()          # other processes may have recorded too
+            entries[key] = entry
+            atomic_write_json(self.path, entries)
+            self._entries = entries
+
+
+@lru_cache(maxsize=None)
+def _cassette(path: Path) -> _Cassette:
+    return _Cassette(path)
+
+
+class CassetteChatModel(StubChatModel):
+    """record: call `live` and save each response; replay: serve saved responses."""
+
+    mode: str = "replay"
+    model: str = GEMINI_MODEL
+    temperature: float = 0.7
+    cassette: Path = CASSETTE_PATH
+    live: Any = None
+    realtime: bool = False
+    miss_stub: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return self.mode
+
+    def _stream_text(self, messages: List[BaseMessage], run_manager=None) -> Iterator[str]:
+        prompt = _prompt_text(messages)
+        key = prompt_hash(self.model, self.temperature, prompt)
+        if self.mode == "record":
+            yield from self._record(key, messages, prompt, run_manager)
+            return
+        entry = _cassette(self.cassette).get(key)
+        if entry is None:
+            if not self.miss_stub:
+                raise CassetteMiss(
+                    f"no cassette entry {key[:12]} ({self.role}) in {self.cassette} – "
+                    "record it with LLM_PROVIDER=record"
+                )
+            logger.warning("cassette miss %s (%s) – using the stub reply", key[:12], self.role)
+            yield from super()._stream_text(messages, run_manager)
+            return
+        text = entry["response"]
+        timing = (entry["ttft_ms"], entry["latency_ms"]) if self.realtime else (0.0, 0.0)
+        for piece in self._chunks(text, *timing):
+            if run_manager:
+                run_manager.on_llm_new_token(piece)
+            yield piece
+
+    def _record(self, key: str, messages: List[BaseMessage], prompt: str,
+                run_manager=None) -> Iterator[str]:
+        t0 = time.perf_counter()
+        ttft = None
+        parts = []
+        for chunk in self.live.stream(messages):
+            if not chunk.content:
+                continue
+            if ttft is None:
+                ttft = (time.perf_counter() - t0) * 1000
+            parts.append(chunk.content)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content)
+            yield chunk.content
+        latency = (time.perf_counter() - t0) * 1000
+        _cassette(self.cassette).put(key, {
+            "role": self.role,
+            "model": self.model,
+            "temperature": self.temperature,
+            "prompt": prompt,
+            "response": "".join(parts),
+            "ttft_ms": round(ttft if ttft is not None else latency, 1),
+            "latency_ms": round(latency, 1),
+            "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+
+
+# ── public API ─────────────────────────────────────────────────────
+def _gemini(temperature: float):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL,
+        temperature=temperature,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        cache=False,               # no LangChain response cache: temperature matters
+    )
+
+
+@lru_cache(maxsize=None)
+def _chat_model(name: str, role: str, temperature: float) -> BaseChatModel:
+    if name == "gemini":
+        return _gemini(temperature)
+    if name == "stub":
+        return StubChatModel(role=role)
+    return CassetteChatModel(
+        role=role,
+        mode=name,
+        temperature=temperature,
+        live=_gemini(temperature) if name == "record" else None,
+        realtime=os.getenv("LLM_REPLAY_REALTIME", "0") == "1",
+        miss_stub=os.getenv("LLM_REPLAY_MISS", "error").lower() == "stub",
+    )
+
+
+def chat_model(role: str, temperature: float) -> BaseChatModel:
+    """
+    The configured provider's chat model for one caller
+    ("kb", "draft", "profile"); built once per (provider, role, temperature).
+    """
+    name = provider()
+    model = _chat_model(name, role, float(temperature))
+    logger.debug("LLM %s for %s (temperature %.1f)", name, role, temperature)
+    return model
@@ -0,0 +1,122 @@
+# memory/atomic.py
+"""
+Crash- and concurrency-safe writes for the post and schedule stores.
+
+    file_lock(path)           cross-process lock on <path>.lock
+    atomic_write_json(p, x)   temp file in the same dir + fsync + rename
+    GroupCommit(apply)        concurrent writers share one write
+    json_batch(path, load)    `apply` for GroupCommit over a JSON list file
+    sqlite_batch(db, lock)    `apply` for GroupCommit: one IMMEDIATE transaction
+
+Group commit: the first caller to arrive becomes the leader and applies
+every operation queued so far in a single `apply(ops)` call – one lock,
+one read, one write – while the others wait for their own result.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, List
+
+from filelock import FileLock
+
+LOCK_TIMEOUT_S = 30
+
+
+@contextmanager
+def file_lock(path: Path):
+    with FileLock(str(path) + ".lock", timeout=LOCK_TIMEOUT_S):
+        yield
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """Readers see the old file or the new one, never a truncated one."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class GroupCommit:
+    def __init__(self, apply: Callable[[List[Any]], List[Any]]):
+        self._apply = apply
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._leading = False
+
+    def submit(self, op: Any) -> Any:
+        """Queue `op`; returns its result once the batch holding it is written."""
+        fut: Future = Future()
+        with self._lock:
+            self._pending.append((op, fut))
+            lead = not self._leading
+            self._leading = True
+        if lead:
+            self._drain()
+        return fut.result()
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._leading = False
+                    return
+            try:
+                results = self._apply([op for op, _ in batch])
+            except BaseException as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+            else:
+                for (_, fut), res in zip(batch, results):
+                    fut.set_result(res)
+
+
+def json_batch(path: Path, load: Callable[[], list]) -> Callable[[List[Any]], List[Any]]:
+    """
+    GroupCommit `apply` for a JSON list: ops are `op(rows) -> result`,
+    mutating `rows` in place and returning something truthy if they did.
+    Read, apply and rewrite happen under the file lock.
+    """
+    def apply(ops: List[Callable]) -> List[Any]:
+        with file_lock(path):
+            rows = load()
+            results = [op(rows) for op in ops]
+            if any(results):
+                atomic_write_json(path, rows)
+        return results
+
+    return apply
+
+
+def sqlite_batch(db: sqlite3.Connection, lock: threading.Lock) -> Callable[[List[Any]], List[Any]]:
+    """
+    GroupCommit `apply` for SQLite: ops are `op(db) -> result`, run in one
+    BEGIN IMMEDIATE … COMMIT, so a burst of approvals costs one fsync.
+    """
+    def apply(ops: List[Callable]) -> List[Any]:
+        with lock:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                results = [op(db) for op in ops]
+            except BaseException:
+                db.rollback()
+                raise
+            db.commit()
+        return results
+
+    return apply
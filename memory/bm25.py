@@ -0,0 +1,114 @@
+# memory/bm25.py
+"""
+Okapi BM25 keyword index over KB chunks.
+
+Built alongside the FAISS store during ingestion and persisted next to it
+(memory/vector_store/bm25.json).  Plain dicts: term → {node_id: tf}.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+_STOP = frozenset(
+    "a an and are as at be but by for from has have how i in is it its of on or "
+    "our that the their this to was we what when where which who why will with "
+    "you your does do can about".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOP]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self._total_len = 0
+
+    # ── mutation ────────────────────────────────────────────────────
+    def add(self, node_id: str, text: str) -> None:
+        if node_id in self.lengths:
+            self.remove(node_id)
+        terms = tokenize(text)
+        self.lengths[node_id] = len(terms)
+        self._total_len += len(terms)
+        for term, tf in Counter(terms).items():
+            self.postings.setdefault(term, {})[node_id] = tf
+
+    def remove(self, node_id: str) -> None:
+        self.remove_many([node_id])
+
+    def remove_many(self, node_ids) -> None:
+        """One pass over the vocabulary, however many chunks go."""
+        gone = {nid for nid in node_ids if nid in self.lengths}
+        if not gone:
+            return
+        for nid in gone:
+            self._total_len -= self.lengths.pop(nid)
+        for term in list(self.postings):
+            posting = self.postings[term]
+            for nid in gone.intersection(posting):
+                del posting[nid]
+            if not posting:
+                del self.postings[term]
+
+    # ── query ───────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.lengths) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float, float]]:
+        """
+        Top-k (node_id, score, coverage) best-first, where coverage is the
+        fraction of distinct query terms that occur in the chunk.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.lengths:
+            return []
+        avg = self._total_len / len(self.lengths) or 1.0
+        scores: Dict[str, float] = {}
+        hits: Counter = Counter()
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self.idf(term)
+            for node_id, tf in posting.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[node_id] / avg)
+                scores[node_id] = scores.get(node_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+                hits[node_id] += 1
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return [(nid, s, hits[nid] / len(terms)) for nid, s in best]
+
+    # ── persistence ─────────────────────────────────────────────────
+    def save(self, path: Path) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(
+                {"k1": self.k1, "b": self.b, "lengths": self.lengths, "postings": self.postings}
+            )
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        data = json.loads(path.read_text())
+        idx = cls(data["k1"], data["b"])
+        idx.lengths = data["lengths"]
+        idx.postings = data["postings"]
+        idx._total_len = sum(idx.lengths.values())
+        return idx
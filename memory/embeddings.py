@@ -0,0 +1,176 @@
+# memory/embeddings.py
+"""
+Shared MiniLM embedding service.
+
+One HuggingFaceEmbedding per process, wrapped so document and post
+vectors are cached on disk by content hash (SQLite,
+memory/embed_cache.sqlite).  Query vectors are one-offs: they are kept in
+a small in-process LRU (QUERY_CACHE_SIZE) and never written to disk.
+Used by kb.py (as the Llama-Index embed_model) and memory/similarity.py.
+
+    embed("text")            -> np.ndarray (384,)
+    embed_many(["a", "b"])   -> np.ndarray (2, 384)
+    embed_query("question")  -> np.ndarray (384,), not persisted
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_DIM = 384
+CACHE_PATH = Path("memory/embed_cache.sqlite")
+QUERY_CACHE_SIZE = int(os.getenv("EMBED_QUERY_CACHE", "512"))
+
+
+# ── content-hash → vector cache ────────────────────────────────────
+class _VectorCache:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):       # stay under SQLite's var limit
+                chunk = list(keys[i:i + 500])
+                marks = ",".join("?" * len(chunk))
+                for h, blob in self._db.execute(
+                    f"SELECT hash, vec FROM vectors WHERE hash IN ({marks})", chunk
+                ):
+                    found[h] = np.frombuffer(blob, dtype="float32")
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (hash, vec) VALUES (?, ?)",
+                [(h, v.astype("float32").tobytes()) for h, v in items.items()],
+            )
+            self._db.commit()
+
+
+def _key(text: str) -> str:
+    return hashlib.sha256(f"{MODEL_NAME}\0{text}".encode("utf-8")).hexdigest()
+
+
+# ── Llama-Index compatible wrapper ─────────────────────────────────
+class CachedEmbedding(BaseEmbedding):
+    """HuggingFaceEmbedding behind the on-disk content-hash cache."""
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: _VectorCache = PrivateAttr()
+    _queries: "OrderedDict[str, np.ndarray]" = PrivateAttr()
+    _queries_lock: threading.Lock = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, cache: _VectorCache, **kwargs):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs,
+        )
+        self._inner = inner
+        self._cache = cache
+        self._queries = OrderedDict()
+        self._queries_lock = threading.Lock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed `texts` in one batch, computing only cache misses."""
+        if not texts:
+            return np.empty((0, EMBED_DIM), dtype="float32")
+        keys = [_key(t) for t in texts]
+        found = self._cache.get_many(list(dict.fromkeys(keys)))
+        missing: Dict[str, str] = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in missing:
+                missing[k] = t
+        if missing:
+            vecs = self._inner.get_text_embedding_batch(list(missing.values()))
+            fresh = {
+                k: np.asarray(v, dtype="float32") for k, v in zip(missing, vecs)
+            }
+            self._cache.put_many(fresh)
+            found.update(fresh)
+        return np.vstack([found[k] for k in keys])
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Vector for a one-off query: in-process LRU, nothing written to disk."""
+        with self._queries_lock:
+            vec = self._queries.get(query)
+            if vec is not None:
+                self._queries.move_to_end(query)
+                return vec
+        # MiniLM has no query instruction, so query & text vectors are identical
+        vec = np.asarray(self._inner.get_text_embedding(query), dtype="float32")
+        with self._queries_lock:
+            self._queries[query] = vec
+            while len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        return vec
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self.embed_query(query).tolist()
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self.embed_many([text])[0].tolist()
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_many(texts).tolist()
+
+
+# ── process-wide singleton ─────────────────────────────────────────
+_LOCK = threading.Lock()
+_MODEL: Optional[CachedEmbedding] = None
+
+
+def get_embed_model() -> CachedEmbedding:
+    """The one shared MiniLM embedder (loaded on first call)."""
+    global _MODEL
+    with _LOCK:
+        if _MODEL is None:
+            from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+            _MODEL = CachedEmbedding(
+                HuggingFaceEmbedding(model_name=MODEL_NAME), _VectorCache(CACHE_PATH)
+            )
+        return _MODEL
+
+
+def embed(text: str) -> np.ndarray:
+    """384-d float32 vector for `text`."""
+    return get_embed_model().embed_many([text])[0]
+
+
+def embed_query(text: str) -> np.ndarray:
+    """384-d float32 vector for a search query (not persisted, see embed_query)."""
+    return get_embed_model().embed_query(text)
+
+
+def embed_many(texts: Sequence[str]) -> np.ndarray:
+    """(len(texts), 384) float32 matrix, one batched forward pass for misses."""
+    return get_embed_model().embed_many(texts)
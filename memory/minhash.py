@@ -0,0 +1,114 @@
+# memory/minhash.py
+"""
+MinHash + LSH banding for lexical near-duplicate detection.
+
+Texts become sets of word 3-shingles; NUM_PERM hash permutations give a
+signature whose per-slot agreement estimates Jaccard similarity.  The
+signature is cut into BANDS bands of ROWS rows; texts sharing any band
+bucket are candidates (≈ Jaccard ≥ 0.5 for 16×4), and only those are
+compared.  Exact repeats are found by a content hash without hashing
+shingles at all.  Pure numpy, no model – microseconds per lookup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS, ROWS = 16, 4
+SHINGLE = 3
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(34)
+_A = _rng.integers(1, 1 << 32, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+_WORD = re.compile(r"\w+")
+
+
+def text_key(text: str) -> str:
+    """Content hash used for exact-repeat lookups."""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+def shingles(text: str) -> Set[int]:
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)]
+    return {zlib.crc32(g.encode("utf-8")) for g in grams}
+
+
+def signature(text: str) -> np.ndarray:
+    sh = shingles(text)
+    if not sh:
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    x = np.fromiter(sh, dtype=np.uint64, count=len(sh))
+    # (a·x + b) mod p; a, x < 2³² so the product fits in 64 bits
+    hashed = (np.outer(x, _A) + _B) % _MERSENNE
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+class MinHashLSH:
+    def __init__(self):
+        self.exact: Dict[str, str] = {}                  # text_key → id
+        self.signatures: Dict[str, np.ndarray] = {}      # id → signature
+        self._keys: Dict[str, str] = {}                  # id → text_key
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    @staticmethod
+    def _bands(sig: np.ndarray):
+        for b in range(BANDS):
+            yield b, sig[b * ROWS:(b + 1) * ROWS].tobytes()
+
+    def add(self, item_id: str, text: str) -> None:
+        if item_id in self.signatures:
+            self.remove(item_id)
+        sig = signature(text)
+        key = text_key(text)
+        self.signatures[item_id] = sig
+        self._keys[item_id] = key
+        self.exact[key] = item_id
+        for b, band in self._bands(sig):
+            self._buckets[b].setdefault(band, set()).add(item_id)
+
+    def remove(self, item_id: str) -> None:
+        sig = self.signatures.pop(item_id, None)
+        if sig is None:
+            return
+        key = self._keys.pop(item_id)
+        if self.exact.get(key) == item_id:
+            del self.exact[key]
+        for b, band in self._bands(sig):
+            bucket = self._buckets[b].get(band)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self._buckets[b][band]
+
+    def find_exact(self, text: str) -> Optional[str]:
+        return self.exact.get(text_key(text))
+
+    def query(self, text: str) -> Optional[Tuple[str, float]]:
+        """Best (id, estimated Jaccard) among LSH candidates; exact → 1.0."""
+        hit = self.find_exact(text)
+        if hit is not None:
+            return hit, 1.0
+        sig = signature(text)
+        candidates: Set[str] = set()
+        for b, band in self._bands(sig):
+            candidates |= self._buckets[b].get(band, set())
+        best = None
+        for cid in candidates:
+            est = float(np.mean(self.signatures[cid] == sig))
+            if best is None or est > best[1]:
+                best = (cid, est)
+        return best
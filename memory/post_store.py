@@ -1,16 +1,235 @@
 # memory/post_store.py
-import json, uuid, datetime
+"""
+Archive of approved posts.
+
+Default backend is SQLite (memory/posts.sqlite):
+  • UNIQUE index on sha256(text)     – duplicate check is one index probe
+  • PRIMARY KEY on id                – `<id-prefix>` lookup is a range scan
+  • index on (channel, datetime)     – latest / per-channel listings
+On first use the rows of an existing memory/posts.json are imported once.
+POST_STORE=json keeps the original flat-file backend.
+
+Rows are dicts: id, datetime, channel, text, image_url, image_path.
+"""
+
+import json, os, uuid, datetime, hashlib, sqlite3, threading
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict
-from memory.similarity import add_vector      # keeps LT-memory updated
+from typing import List, Dict, Optional
+from memory.atomic import GroupCommit, json_batch, sqlite_batch, LOCK_TIMEOUT_S
+from memory.similarity import add_vector, remove_vector      # keeps LT-memory updated
 
 POSTS_PATH = Path("memory/posts.json")
+DB_PATH = Path("memory/posts.sqlite")
 POSTS_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+_FIELDS = ("id", "datetime", "channel", "text", "image_url", "image_path")
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ── backends ───────────────────────────────────────────────────────
+class _JsonBackend:
+    """The original posts.json list; every call reads the whole file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._commit = GroupCommit(json_batch(path, self.all))
+
+    def signature(self):
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def all(self) -> List[Dict]:
+        return json.load(self.path.open()) if self.path.exists() else []
+
+    def get(self, post_id: str) -> Optional[Dict]:
+        return next((p for p in self.all() if p["id"] == post_id), None)
+
+    def find_prefix(self, prefix: str) -> Optional[Dict]:
+        return min((p for p in self.all() if p["id"].startswith(prefix)),
+                   key=lambda p: p["id"], default=None)
+
+    def latest(self, channel: Optional[str]) -> Optional[Dict]:
+        cand = [p for p in self.all() if channel is None or p["channel"] == channel]
+        return max(cand, key=lambda p: p["datetime"], default=None)
+
+    # writes: op(rows) -> changed?, batched by GroupCommit
+    def insert(self, row: Dict) -> bool:
+        def op(rows: List[Dict]) -> bool:
+            if any(p["text"] == row["text"] for p in rows):
+                return False
+            rows.append(row)
+            return True
+        return self._commit.submit(op)
+
+    def update_text(self, post_id: str, text: str) -> bool:
+        def op(rows: List[Dict]) -> bool:
+            for p in rows:
+                if p["id"] == post_id:
+                    p["text"] = text
+                    return True
+            return False
+        return self._commit.submit(op)
+
+    def delete(self, post_id: str) -> bool:
+        def op(rows: List[Dict]) -> bool:
+            before = len(rows)
+            rows[:] = [p for p in rows if p["id"] != post_id]
+            return len(rows) != before
+        return self._commit.submit(op)
+
+
+class _SqliteBackend:
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS posts (
+        id         TEXT PRIMARY KEY,
+        datetime   TEXT NOT NULL,
+        channel    TEXT NOT NULL,
+        text       TEXT NOT NULL,
+        text_hash  TEXT NOT NULL,
+        image_url  TEXT,
+        image_path TEXT
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS posts_text_hash ON posts (text_hash);
+    CREATE INDEX IF NOT EXISTS posts_channel_datetime ON posts (channel, datetime);
+    CREATE INDEX IF NOT EXISTS posts_datetime ON posts (datetime);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+    _COLS = ", ".join(_FIELDS)
+
+    def __init__(self, path: Path, legacy_json: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=LOCK_TIMEOUT_S, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self._SCHEMA)
+        self._commit = GroupCommit(sqlite_batch(self._db, self._lock))
+        self._import_json(legacy_json)
+
+    def _import_json(self, legacy: Path) -> None:
+        """One-time copy of posts.json; the file itself is left alone."""
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")        # one importer across processes
+            done = self._db.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone()
+            if done:
+                return
+            rows = json.load(legacy.open()) if legacy.exists() else []
+            self._db.executemany(
+                f"INSERT OR IGNORE INTO posts ({self._COLS}, text_hash) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (*(p.get(f) for f in _FIELDS), _text_hash(p["text"]))
+                    for p in rows
+                ],
+            )
+            self._db.execute("INSERT INTO meta VALUES ('json_imported', ?)", (str(len(rows)),))
+
+    def signature(self):
+        # data_version moves on commits from other connections,
+        # total_changes on our own
+        with self._lock:
+            version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            return version, self._db.total_changes
+
+    def _query(self, sql: str, args=()) -> List[Dict]:
+        with self._lock:
+            return [dict(r) for r in self._db.execute(sql, args)]
+
+    def all(self) -> List[Dict]:
+        return self._query(f"SELECT {self._COLS} FROM posts ORDER BY rowid")
+
+    def get(self, post_id: str) -> Optional[Dict]:
+        rows = self._query(f"SELECT {self._COLS} FROM posts WHERE id = ?", (post_id,))
+        return rows[0] if rows else None
+
+    def find_prefix(self, prefix: str) -> Optional[Dict]:
+        rows = self._query(
+            f"SELECT {self._COLS} FROM posts WHERE id >= ? AND id < ? ORDER BY id LIMIT 1",
+            (prefix, prefix + "\U0010ffff"),
+        )
+        return rows[0] if rows else None
+
+    def latest(self, channel: Optional[str]) -> Optional[Dict]:
+        if channel is None:
+            sql, args = f"SELECT {self._COLS} FROM posts ORDER BY datetime DESC LIMIT 1", ()
+        else:
+            sql = (f"SELECT {self._COLS} FROM posts WHERE channel = ? "
+                   "ORDER BY datetime DESC LIMIT 1")
+            args = (channel,)
+        rows = self._query(sql, args)
+        return rows[0] if rows else None
+
+    # writes: op(db) -> result, batched into one transaction by GroupCommit
+    def insert(self, row: Dict) -> bool:
+        def op(db: sqlite3.Connection) -> bool:
+            try:
+                db.execute(
+                    f"INSERT INTO posts ({self._COLS}, text_hash) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*(row[f] for f in _FIELDS), _text_hash(row["text"])),
+                )
+            except sqlite3.IntegrityError:
+                return False  # same text already archived
+            return True
+        return self._commit.submit(op)
+
+    def update_text(self, post_id: str, text: str) -> bool:
+        def op(db: sqlite3.Connection) -> bool:
+            try:
+                cur = db.execute(
+                    "UPDATE posts SET text = ?, text_hash = ? WHERE id = ?",
+                    (text, _text_hash(text), post_id),
+                )
+            except sqlite3.IntegrityError:
+                return False  # another post already has this text
+            return cur.rowcount > 0
+        return self._commit.submit(op)
+
+    def delete(self, post_id: str) -> bool:
+        def op(db: sqlite3.Connection) -> bool:
+            return db.execute("DELETE FROM posts WHERE id = ?", (post_id,)).rowcount > 0
+        return self._commit.submit(op)
+
+
+@lru_cache(maxsize=1)
+def _store():
+    if os.getenv("POST_STORE", "sqlite").lower() == "json":
+        return _JsonBackend(POSTS_PATH)
+    return _SqliteBackend(DB_PATH, POSTS_PATH)
+
 
 # ── private loader ─────────────────────────────────────────────────
 def _load() -> List[Dict]:
-    return json.load(POSTS_PATH.open()) if POSTS_PATH.exists() else []
+    return _store().all()
+
+
+def store_signature():
+    """Changes whenever the archive is modified, by this or another process."""
+    return _store().signature()
+
+
+# ── lookups ────────────────────────────────────────────────────────
+def all_posts() -> List[Dict]:
+    """Every archived post, oldest first."""
+    return _load()
+
+
+def get_post(post_id: str) -> Dict | None:
+    return _store().get(post_id)
+
+
+def find_post(id_prefix: str) -> Dict | None:
+    """First post (by id) whose id starts with `id_prefix`."""
+    return _store().find_prefix(id_prefix)
+
+
+def latest_post(channel: str | None = None) -> Dict | None:
+    return _store().latest(channel)
 
 
 # ── public save ────────────────────────────────────────────────────
@@ -20,22 +239,40 @@ def save_post(channel: str, text: str, image_url: str = None, image_path: str =
     If the text already exists, returns None.
     """
     text = text.strip()
-    data = _load()
-    if any(p["text"] == text for p in data):
+    post_id = str(uuid.uuid4())
+    row = {
+        "id": post_id,
+        "datetime": datetime.datetime.utcnow().isoformat(timespec="seconds"),
+        "channel": channel,
+        "text": text,
+        "image_url": image_url,
+        "image_path": image_path
+    }
+    before = store_signature()
+    if not _store().insert(row):
         return None  # duplicate
 
-    post_id = str(uuid.uuid4())
-    data.append(
-        {
-            "id": post_id,
-            "datetime": datetime.datetime.utcnow().isoformat(timespec="seconds"),
-            "channel": channel,
-            "text": text,
-            "image_url": image_url,
-            "image_path": image_path
-        }
-    )
-    json.dump(data, POSTS_PATH.open("w"), indent=2)
-
-    add_vector(text)          # embed into long-term memory
-    return post_id
\ No newline at end of file
+    add_vector(text, post_id, (before, store_signature()))  # embed into long-term memory
+    return post_id
+
+
+def update_post(post_id: str, text: str) -> bool:
+    """
+    Replace a post's text (and its similarity vector).
+    False if the id is unknown or another post already has this text.
+    """
+    text = text.strip()
+    before = store_signature()
+    if not _store().update_text(post_id, text):
+        return False
+    add_vector(text, post_id, (before, store_signature()))
+    return True
+
+
+def delete_post(post_id: str) -> bool:
+    """Remove a post and its similarity vector. False if unknown."""
+    before = store_signature()
+    if not _store().delete(post_id):
+        return False
+    remove_vector(post_id, (before, store_signature()))
+    return True
@@ -0,0 +1,151 @@
+# memory/review_store.py
+"""
+Review queue for batch-generated drafts      memory/review.sqlite
+
+One row per campaign input row, keyed by (campaign, row_key) where
+row_key hashes the plan row number + topic + channel + with_image, so it
+doubles as the campaign checkpoint: a rerun skips every key that already
+has a draft and retries the ones that failed.  The row number keeps
+repeated plan rows apart – each gets its own draft.
+
+    status   drafted   waiting for review
+             failed    generation error (retried on the next run)
+             approved  saved to the post archive (post_id set)
+             rejected  discarded by the reviewer
+
+Writes go through GroupCommit like the other stores, so a worker pool
+recording results costs one transaction per burst.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from memory.atomic import GroupCommit, sqlite_batch, LOCK_TIMEOUT_S
+
+DB_PATH = Path("memory/review.sqlite")
+STATUSES = ("drafted", "failed", "approved", "rejected")
+
+_COLS = ("campaign", "row_key", "row_no", "topic", "channel", "with_image",
+         "status", "draft", "image_url", "error", "post_id", "updated")
+
+
+def row_key(row_no: int, topic: str, channel: str, with_image: bool) -> str:
+    raw = f"{row_no}|{topic.strip().lower()}|{channel.strip().lower()}|{int(with_image)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class _Store:
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS drafts (
+        campaign   TEXT NOT NULL,
+        row_key    TEXT NOT NULL,
+        row_no     INTEGER NOT NULL,
+        topic      TEXT NOT NULL,
+        channel    TEXT NOT NULL,
+        with_image INTEGER NOT NULL DEFAULT 0,
+        status     TEXT NOT NULL,
+        draft      TEXT,
+        image_url  TEXT,
+        error      TEXT,
+        post_id    TEXT,
+        updated    TEXT NOT NULL,
+        PRIMARY KEY (campaign, row_key)
+    );
+    CREATE INDEX IF NOT EXISTS drafts_campaign_status ON drafts (campaign, status, row_no);
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=LOCK_TIMEOUT_S, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self._SCHEMA)
+        self._commit = GroupCommit(sqlite_batch(self._db, self._lock))
+
+    def _query(self, sql: str, args=()) -> List[Dict]:
+        with self._lock:
+            return [dict(r) for r in self._db.execute(sql, args)]
+
+    def upsert(self, row: Dict) -> None:
+        cols = ", ".join(_COLS)
+        marks = ", ".join("?" * len(_COLS))
+        sql = f"INSERT OR REPLACE INTO drafts ({cols}) VALUES ({marks})"
+        args = tuple(row.get(c) for c in _COLS)
+        self._commit.submit(lambda db: db.execute(sql, args).rowcount)
+
+    def set_status(self, campaign: str, key: str, status: str, post_id: str | None) -> bool:
+        sql = "UPDATE drafts SET status = ?, post_id = ?, updated = ? WHERE campaign = ? AND row_key = ?"
+        args = (status, post_id, _now(), campaign, key)
+        return self._commit.submit(lambda db: db.execute(sql, args).rowcount > 0)
+
+
+@lru_cache(maxsize=1)
+def _store() -> _Store:
+    return _Store(DB_PATH)
+
+
+def _now() -> str:
+    return datetime.datetime.utcnow().isoformat(timespec="seconds")
+
+
+# ── public API ────────────────────────────────────────────────────
+def done_keys(campaign: str) -> Set[str]:
+    """Row keys that need no more generation (everything but 'failed')."""
+    return {
+        r["row_key"] for r in _store()._query(
+            "SELECT row_key FROM drafts WHERE campaign = ? AND status != 'failed'", (campaign,)
+        )
+    }
+
+
+def record(campaign: str, row_no: int, topic: str, channel: str, with_image: bool,
+           draft: str | None = None, image_url: str | None = None,
+           error: str | None = None) -> None:
+    """Store one generation outcome: a draft for review, or the error."""
+    _store().upsert({
+        "campaign": campaign,
+        "row_key": row_key(row_no, topic, channel, with_image),
+        "row_no": row_no,
+        "topic": topic,
+        "channel": channel,
+        "with_image": int(with_image),
+        "status": "failed" if error else "drafted",
+        "draft": draft,
+        "image_url": image_url,
+        "error": error,
+        "post_id": None,
+        "updated": _now(),
+    })
+
+
+def drafts(campaign: str, status: Optional[str] = "drafted") -> List[Dict]:
+    """A campaign's rows in input order (optionally only one status)."""
+    if status is None:
+        return _store()._query(
+            "SELECT * FROM drafts WHERE campaign = ? ORDER BY row_no", (campaign,))
+    return _store()._query(
+        "SELECT * FROM drafts WHERE campaign = ? AND status = ? ORDER BY row_no", (campaign, status))
+
+
+def set_status(campaign: str, key: str, status: str, post_id: str | None = None) -> bool:
+    if status not in STATUSES:
+        raise ValueError(f"unknown status {status!r}")
+    return _store().set_status(campaign, key, status, post_id)
+
+
+def campaigns() -> Dict[str, Dict[str, int]]:
+    """{campaign: {status: count}}"""
+    out: Dict[str, Dict[str, int]] = {}
+    for r in _store()._query(
+        "SELECT campaign, status, COUNT(*) AS n FROM drafts GROUP BY campaign, status"
+    ):
+        out.setdefault(r["campaign"], {})[r["status"]] = r["n"]
+    return out
@@ -1,88 +1,460 @@
 """
-Persistent publish queue              memory/schedule.json
+Persistent publish queue              memory/schedule.sqlite
 
-[
   {
     "post_id"      : "uuid-string",
     "channel"      : "LinkedIn",
     "text"         : "… frozen copy …",
-    "scheduled_for": "2025-05-25"
+    "scheduled_for": "2025-05-25",
+    "image_url"    : null,
+    "status"       : "queued",      # queued | sent | failed | skipped
+    "attempts"     : 0,
+    "sent_at"      : null,          # UTC ISO timestamp once published
+    "error"        : null           # last publisher error
   }
-]
+
+Indexes: UNIQUE (channel, date) – one post per channel per day, checked
+by the insert itself; post_id; (date, channel) – the ordered index behind
+queue listings, date ranges and `next_due`; (status, date) – the
+dispatcher's "queued and due" scan.  None of them cost more than the
+rows they return.  The unique index doubles as the slot map for bulk
+scheduling: `free_slots` asks it which dates in a window are taken and
+`add_many_to_queue` writes a whole batch in one transaction.
+
+On first use memory/schedule.json is imported once.  SCHEDULE_STORE=json
+keeps the original flat file.
 """
 
 from __future__ import annotations
-import json, datetime, itertools
+import json, os, datetime, sqlite3, threading
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, List, Dict, Set
+
+from memory.atomic import GroupCommit, json_batch, sqlite_batch, LOCK_TIMEOUT_S
 
 _STORE = Path("memory/schedule.json")
+_DB = Path("memory/schedule.sqlite")
 _STORE.parent.mkdir(parents=True, exist_ok=True)
 
+_FIELDS = ("post_id", "channel", "text", "scheduled_for", "image_url")
+_STATE = ("status", "attempts", "sent_at", "error")            # written by the dispatcher
+STATUSES = ("queued", "sent", "failed", "skipped")          # skipped: too late to publish
+
+
+# ── backends ───────────────────────────────────────────────────────
+class _JsonBackend:
+    """The original schedule.json list; every call reads the whole file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._commit = GroupCommit(json_batch(path, self._load))
+
+    def _load(self) -> List[Dict]:
+        return json.load(self.path.open()) if self.path.exists() else []
+
+    def signature(self):
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def _order(rows: List[Dict]) -> List[Dict]:
+        return sorted(rows, key=lambda r: (r["scheduled_for"], r["channel"].lower()))
+
+    # writes: op(rows) -> changed?, batched by GroupCommit
+    def insert(self, row: Dict) -> bool:
+        def op(rows: List[Dict]) -> bool:
+            if any(
+                r["channel"].lower() == row["channel"].lower()
+                and r["scheduled_for"] == row["scheduled_for"]
+                for r in rows
+            ):
+                return False
+            rows.append(row)
+            return True
+        return self._commit.submit(op)
+
+    def insert_many(self, new: List[Dict]) -> List[bool]:
+        def op(rows: List[Dict]) -> List[bool]:
+            taken = {(r["channel"].lower(), r["scheduled_for"]) for r in rows}
+            ok = []
+            for row in new:
+                slot = (row["channel"].lower(), row["scheduled_for"])
+                ok.append(slot not in taken)
+                if ok[-1]:
+                    taken.add(slot)
+                    rows.append(row)
+            return ok
+        return self._commit.submit(op)
+
+    def delete(self, post_id: str, iso_date: str | None) -> int:
+        def op(rows: List[Dict]) -> int:
+            before = len(rows)
+            rows[:] = [
+                r for r in rows
+                if not (r["post_id"] == post_id and (iso_date is None or iso_date == r["scheduled_for"]))
+            ]
+            return before - len(rows)
+        return self._commit.submit(op)
+
+    def between(self, start: str | None, end: str | None,
+                channel: str | None, limit: int | None) -> List[Dict]:
+        rows = [
+            r for r in self._load()
+            if (channel is None or r["channel"].lower() == channel.lower())
+            and (start is None or r["scheduled_for"] >= start)
+            and (end is None or r["scheduled_for"] <= end)
+        ]
+        return self._order(rows)[:limit]
+
+    def set_state(self, channel: str, iso_date: str, state: Dict) -> bool:
+        def op(rows: List[Dict]) -> bool:
+            for r in rows:
+                if r["channel"].lower() == channel.lower() and r["scheduled_for"] == iso_date:
+                    r.update(state)
+                    return True
+            return False
+        return self._commit.submit(op)
+
+    def pending(self, until: str | None) -> List[Dict]:
+        return self._order([
+            r for r in self._load()
+            if r.get("status", "queued") == "queued"
+            and (until is None or r["scheduled_for"] <= until)
+        ])
+
+    def for_post(self, post_id: str) -> List[Dict]:
+        return self._order([r for r in self._load() if r["post_id"] == post_id])
+
+    def taken(self, channel: str, iso_date: str) -> bool:
+        return any(
+            r["channel"].lower() == channel.lower() and r["scheduled_for"] == iso_date
+            for r in self._load()
+        )
+
+    def taken_between(self, channel: str, start: str, end: str) -> Set[str]:
+        return {
+            r["scheduled_for"] for r in self._load()
+            if r["channel"].lower() == channel.lower() and start <= r["scheduled_for"] <= end
+        }
+
+
+class _SqliteBackend:
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS schedule (
+        post_id       TEXT NOT NULL,
+        channel       TEXT NOT NULL,
+        text          TEXT NOT NULL,
+        scheduled_for TEXT NOT NULL,
+        image_url     TEXT,
+        status        TEXT NOT NULL DEFAULT 'queued',
+        attempts      INTEGER NOT NULL DEFAULT 0,
+        sent_at       TEXT,
+        error         TEXT
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS schedule_channel_date
+        ON schedule (channel COLLATE NOCASE, scheduled_for);
+    CREATE INDEX IF NOT EXISTS schedule_post_id ON schedule (post_id);
+    CREATE INDEX IF NOT EXISTS schedule_date
+        ON schedule (scheduled_for, channel COLLATE NOCASE);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+    _COLS = ", ".join(_FIELDS)
+    _ALL = ", ".join(_FIELDS + _STATE)
+    _ORDER = "ORDER BY scheduled_for, channel COLLATE NOCASE"
+
+    def __init__(self, path: Path, legacy_json: Path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=LOCK_TIMEOUT_S, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self._SCHEMA)
+        self._migrate()
+        self._commit = GroupCommit(sqlite_batch(self._db, self._lock))
+        self._import_json(legacy_json)
+
+    def _migrate(self) -> None:
+        """Databases created before the dispatcher lack the state columns."""
+        have = {r["name"] for r in self._db.execute("PRAGMA table_info(schedule)")}
+        with self._db:
+            for ddl in (
+                "status TEXT NOT NULL DEFAULT 'queued'",
+                "attempts INTEGER NOT NULL DEFAULT 0",
+                "sent_at TEXT",
+                "error TEXT",
+            ):
+                if ddl.split()[0] not in have:
+                    try:
+                        self._db.execute(f"ALTER TABLE schedule ADD COLUMN {ddl}")
+                    except sqlite3.OperationalError:
+                        pass  # another process added it first
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS schedule_status_date ON schedule (status, scheduled_for)"
+            )
+
+    def _import_json(self, legacy: Path) -> None:
+        """One-time copy of schedule.json; the file itself is left alone."""
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")        # one importer across processes
+            if self._db.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                return
+            rows = json.load(legacy.open()) if legacy.exists() else []
+            self._db.executemany(
+                f"INSERT OR IGNORE INTO schedule ({self._COLS}) VALUES (?, ?, ?, ?, ?)",
+                [tuple(r.get(f) for f in _FIELDS) for r in rows],
+            )
+            self._db.execute("INSERT INTO meta VALUES ('json_imported', ?)", (str(len(rows)),))
+
+    def signature(self):
+        # data_version moves on commits from other connections,
+        # total_changes on our own
+        with self._lock:
+            version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            return version, self._db.total_changes
+
+    def _query(self, sql: str, args=()) -> List[Dict]:
+        with self._lock:
+            return [dict(r) for r in self._db.execute(sql, args)]
+
+    # writes: op(db) -> result, batched into one transaction by GroupCommit
+    def insert(self, row: Dict) -> bool:
+        def op(db: sqlite3.Connection) -> bool:
+            try:
+                db.execute(
+                    f"INSERT INTO schedule ({self._COLS}) VALUES (?, ?, ?, ?, ?)",
+                    tuple(row.get(f) for f in _FIELDS),
+                )
+            except sqlite3.IntegrityError:
+                return False  # channel already has a post that day
+            return True
+        return self._commit.submit(op)
+
+    def insert_many(self, rows: List[Dict]) -> List[bool]:
+        def op(db: sqlite3.Connection) -> List[bool]:
+            ok = []
+            for row in rows:
+                try:
+                    db.execute(
+                        f"INSERT INTO schedule ({self._COLS}) VALUES (?, ?, ?, ?, ?)",
+                        tuple(row.get(f) for f in _FIELDS),
+                    )
+                    ok.append(True)
+                except sqlite3.IntegrityError:
+                    ok.append(False)
+            return ok
+        return self._commit.submit(op)
+
+    def delete(self, post_id: str, iso_date: str | None) -> int:
+        sql, args = "DELETE FROM schedule WHERE post_id = ?", [post_id]
+        if iso_date is not None:
+            sql += " AND scheduled_for = ?"
+            args.append(iso_date)
+        return self._commit.submit(lambda db: db.execute(sql, args).rowcount)
+
+    def between(self, start: str | None, end: str | None,
+                channel: str | None, limit: int | None) -> List[Dict]:
+        where, args = [], []
+        if channel is not None:
+            where.append("channel = ? COLLATE NOCASE")
+            args.append(channel)
+        if start is not None:
+            where.append("scheduled_for >= ?")
+            args.append(start)
+        if end is not None:
+            where.append("scheduled_for <= ?")
+            args.append(end)
+        sql = f"SELECT {self._ALL} FROM schedule"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " " + self._ORDER
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return self._query(sql, args)
+
+    def set_state(self, channel: str, iso_date: str, state: Dict) -> bool:
+        cols = ", ".join(f"{k} = ?" for k in state)
+        sql = f"UPDATE schedule SET {cols} WHERE channel = ? COLLATE NOCASE AND scheduled_for = ?"
+        args = (*state.values(), channel, iso_date)
+        return self._commit.submit(lambda db: db.execute(sql, args).rowcount > 0)
+
+    def pending(self, until: str | None) -> List[Dict]:
+        sql, args = f"SELECT {self._ALL} FROM schedule WHERE status = 'queued'", []
+        if until is not None:
+            sql += " AND scheduled_for <= ?"
+            args.append(until)
+        return self._query(sql + " " + self._ORDER, args)
+
+    def for_post(self, post_id: str) -> List[Dict]:
+        return self._query(
+            f"SELECT {self._ALL} FROM schedule WHERE post_id = ? {self._ORDER}", (post_id,)
+        )
+
+    def taken(self, channel: str, iso_date: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM schedule WHERE channel = ? COLLATE NOCASE AND scheduled_for = ?",
+                (channel, iso_date),
+            ).fetchone() is not None
+
+    def taken_between(self, channel: str, start: str, end: str) -> Set[str]:
+        # range scan of the unique (channel, date) index
+        with self._lock:
+            return {
+                r[0] for r in self._db.execute(
+                    "SELECT scheduled_for FROM schedule "
+                    "WHERE channel = ? COLLATE NOCASE AND scheduled_for BETWEEN ? AND ?",
+                    (channel, start, end),
+                )
+            }
+
+
+@lru_cache(maxsize=1)
+def _store():
+    if os.getenv("SCHEDULE_STORE", "sqlite").lower() == "json":
+        return _JsonBackend(_STORE)
+    return _SqliteBackend(_DB, _STORE)
+
 
 # ── I/O helpers ────────────────────────────────────────────────────
 def _load() -> List[Dict]:
-    return json.load(_STORE.open()) if _STORE.exists() else []
+    return _store().between(None, None, None, None)
 
 
-def _save(rows: List[Dict]):
-    json.dump(rows, _STORE.open("w"), indent=2)
+def store_signature():
+    """Changes whenever the queue is modified, by this or another process."""
+    return _store().signature()
+
+
+def _row(post_id: str, channel: str, text: str, iso_date: str, image_url: str | None) -> Dict:
+    return {
+        "post_id": post_id,
+        "channel": channel,
+        "text": text,
+        "scheduled_for": iso_date,
+        "image_url": image_url,
+        "status": "queued",
+        "attempts": 0,
+        "sent_at": None,
+        "error": None,
+    }
 
 
 # ── public API ────────────────────────────────────────────────────
-def add_to_queue(post_id: str, channel: str, text: str, iso_date: str) -> str:
+def add_to_queue(post_id: str, channel: str, text: str, iso_date: str,
+                 image_url: str | None = None) -> str:
     """Returns '' on success or an error string on clash / bad date."""
     try:
         datetime.date.fromisoformat(iso_date)
     except ValueError:
         return f"Date '{iso_date}' is not ISO-8601 (YYYY-MM-DD)."
 
-    rows = _load()
-    clash = any(
-        r["channel"].lower() == channel.lower() and r["scheduled_for"] == iso_date
-        for r in rows
-    )
-    if clash:
+    if not _store().insert(_row(post_id, channel, text, iso_date, image_url)):
         return f"{channel} already has a post on {iso_date}."
-
-    rows.append(
-        {
-            "post_id": post_id,
-            "channel": channel,
-            "text": text,
-            "scheduled_for": iso_date,
-        }
-    )
-    _save(rows)
     return ""
 
 
-def remove_from_queue(post_id: str, iso_date: str | None = None) -> bool:
+def add_many_to_queue(items: List[Dict]) -> List[str]:
     """
-    Delete a queued post.  If iso_date is None, delete first matching id.
-    Returns True when something was removed.
+    Queue a batch of {post_id, channel, text, scheduled_for, image_url}
+    in one write.  Returns add_to_queue's '' / error string per item.
     """
-    rows = _load()
-    before = len(rows)
-    rows = [
-        r
-        for r in rows
-        if not (r["post_id"] == post_id and (iso_date is None or iso_date == r["scheduled_for"]))
+    errors: List[str] = []
+    rows: List[Dict] = []
+    for it in items:
+        try:
+            datetime.date.fromisoformat(it["scheduled_for"])
+        except ValueError:
+            errors.append(f"Date '{it['scheduled_for']}' is not ISO-8601 (YYYY-MM-DD).")
+            continue
+        errors.append("")
+        rows.append(_row(it["post_id"], it["channel"], it["text"],
+                         it["scheduled_for"], it.get("image_url")))
+    ok = iter(_store().insert_many(rows) if rows else [])
+    return [
+        err or ("" if next(ok) else f"{it['channel']} already has a post on {it['scheduled_for']}.")
+        for it, err in zip(items, errors)
     ]
-    if len(rows) != before:
-        _save(rows)
-        return True
-    return False
+
+
+def free_slots(channel: str, candidates: Iterable[str], n: int | None = None) -> List[str]:
+    """
+    The first `n` (default: all) of `candidates` – ascending ISO dates –
+    on which `channel` has nothing queued.  Candidates are checked a
+    window at a time against the (channel, date) index, so an open-ended
+    generator (every Tuesday from …) is fine as long as `n` is given.
+    """
+    it = iter(candidates)
+    out: List[str] = []
+    while n is None or len(out) < n:
+        window = list(islice(it, 64 if n is None else max(n - len(out), 16)))
+        if not window:
+            break
+        taken = _store().taken_between(channel, window[0], window[-1])
+        out += [d for d in window if d not in taken]
+    return out if n is None else out[:n]
+
+
+def remove_from_queue(post_id: str, iso_date: str | None = None) -> bool:
+    """
+    Delete a queued post.  With `iso_date`, only that date's row goes;
+    with None, every row for the post id – all channels, all dates – is
+    deleted (the original JSON store did the same, despite documenting
+    "first match").  Returns True when something was removed.
+    """
+    return _store().delete(post_id, iso_date) > 0
 
 
 def get_queue(channel: str | None = None) -> List[Dict]:
-    rows = _load()
-    if channel:
-        rows = [r for r in rows if r["channel"].lower() == channel.lower()]
-    # sort ascending by date, then channel
-    return sorted(rows, key=lambda r: (r["scheduled_for"], r["channel"].lower()))
+    """Every queued item (optionally one channel), by date then channel."""
+    return _store().between(None, None, channel, None)
+
+
+def get_range(start: str | None, end: str | None, channel: str | None = None) -> List[Dict]:
+    """Queued items with start <= scheduled_for <= end (ISO dates, inclusive)."""
+    return _store().between(start, end, channel, None)
+
+
+def next_due(n: int = 10, channel: str | None = None, from_date: str | None = None) -> List[Dict]:
+    """The next `n` items on or after `from_date` (default: today)."""
+    start = from_date or datetime.date.today().isoformat()
+    return _store().between(start, None, channel, n)
+
+
+def pending(until: str | None = None) -> List[Dict]:
+    """Items still waiting to be published, scheduled on or before `until`."""
+    return _store().pending(until)
+
+
+def set_status(channel: str, iso_date: str, status: str, *,
+               attempts: int | None = None, error: str | None = None) -> bool:
+    """
+    Record a publish outcome for the (channel, date) slot.  'sent' stamps
+    sent_at; 'queued' with attempts/error notes a retry.  False if no
+    such item.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"unknown status {status!r}")
+    state: Dict = {"status": status, "error": error}
+    if attempts is not None:
+        state["attempts"] = attempts
+    if status == "sent":
+        state["sent_at"] = datetime.datetime.utcnow().isoformat(timespec="seconds")
+    return _store().set_state(channel, iso_date, state)
+
+
+def is_taken(channel: str, iso_date: str) -> bool:
+    return _store().taken(channel, iso_date)
+
+
+def dates_for_post(post_id: str) -> List[str]:
+    return [r["scheduled_for"] for r in _store().for_post(post_id)]
 
 
 def map_post_id_to_date() -> dict[str, str]:
     """Utility: {post_id: iso_date} for quick lookup."""
-    return {r["post_id"]: r["scheduled_for"] for r in _load()}
\ No newline at end of file
+    return {r["post_id"]: r["scheduled_for"] for r in _load()}
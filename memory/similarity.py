@@ -1,39 +1,567 @@
 # memory/similarity.py
 """
 Long-term similarity guard for approved posts.
-Uses the same MiniLM embedder as RAG to keep things simple.
-Stores 384-d vectors in a FAISS IndexFlatIP file:  memory/lstm_vectors/faiss.index
+Uses the shared MiniLM embedder (memory/embeddings.py) as RAG.
+
+Vectors are keyed by post UUID (as FAISS ids), L2-normalised so
+inner product == cosine.  Flat (exact) search until the archive reaches
+ANN_THRESHOLD posts, then IVF.  The index stays resident in memory; every
+change is first appended to a write-ahead log:
+
+    memory/lstm_vectors/snapshot.npz   FAISS index + post ids
+    memory/lstm_vectors/posts.wal      adds / removals since that snapshot
+
+Every SNAPSHOT_EVERY changes (and at exit) a new snapshot is written and
+the log truncated.  On startup the snapshot is loaded and the log
+replayed; a torn last record from a crash is dropped.
+
+    add_vector(text, post_id)     add or replace a post's vector
+    remove_vector(post_id)
+    nearest(text, k)  -> [(post_id, cosine), ...]
+    too_similar(text, threshold)  -> bool
+    nearest_many / too_similar_many   – the same for a batch of texts,
+                                        one embedding pass + one search
+    rank_variants(texts)          order alternative drafts: least like the
+                                  archive and least like each other first
+
+Ahead of MiniLM sits a lexical prefilter (memory/minhash.py): exact and
+near-verbatim repeats of an archived post are caught from word shingles
+without running the embedder.  It is only conclusive for a hit; anything
+else still goes through the vector check.
 """
 
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import math
+import os
+import struct
+import threading
+import zlib
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
 import faiss, numpy as np
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 
-INDEX_PATH = Path("memory/lstm_vectors/faiss.index")
-EMBED = HuggingFaceEmbedding(model_name="sentence-transformers/all-MiniLM-L6-v2")
+from memory.atomic import file_lock
+from memory.minhash import MinHashLSH
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DIR = Path("memory/lstm_vectors")
+SNAPSHOT_PATH = VECTOR_DIR / "snapshot.npz"
+WAL_PATH = VECTOR_DIR / "posts.wal"
+LEGACY_PATHS = (VECTOR_DIR / "faiss.index", VECTOR_DIR / "vectors.wal")
+DIM = 384
+SNAPSHOT_EVERY = int(os.getenv("SIMILARITY_SNAPSHOT_EVERY", "256"))
+ANN_THRESHOLD = int(os.getenv("SIMILARITY_ANN_THRESHOLD", "10000"))
+# estimated shingle Jaccard at which the prefilter calls a text a repeat
+LEXICAL_THRESHOLD = 0.8
 
-def _load_index() -> faiss.IndexFlatIP:
-    if INDEX_PATH.exists():
-        return faiss.read_index(str(INDEX_PATH))
-    return faiss.IndexFlatIP(384)
+# one WAL record: <op u8><id length u16><crc32 u32> id [DIM × float32]
+# Ops are keyed by post id, so replaying records already folded into the
+# snapshot just redoes them with the same result.
+_HEADER = struct.Struct("<BHI")
+_ADD, _REMOVE = 1, 2
+_VEC_BYTES = DIM * 4
 
-def _save_index(idx: faiss.IndexFlatIP):
-    INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(idx, str(INDEX_PATH))
 
 def _embed(text: str) -> np.ndarray:
-    vec = EMBED.get_text_embedding(text)
-    return np.asarray(vec, dtype="float32")
+    # imported here so scheduler-only code paths never load llama-index/torch
+    from memory.embeddings import embed
+    return embed(text)       # content-hash cached, shared with the RAG KB
+
+
+def _embed_many(texts: Sequence[str]) -> np.ndarray:
+    from memory.embeddings import embed_many
+    return embed_many(texts)
+
+
+def _unit(vecs: np.ndarray) -> np.ndarray:
+    vecs = np.ascontiguousarray(vecs, dtype="float32").reshape(-1, DIM).copy()
+    faiss.normalize_L2(vecs)
+    return vecs
+
+
+def _label(post_id: str) -> int:
+    """Stable 63-bit FAISS id for a post UUID."""
+    return int.from_bytes(hashlib.sha1(post_id.encode("utf-8")).digest()[:8], "little") >> 1
+
+
+def _stat_sig(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _wal_size() -> int:
+    try:
+        return WAL_PATH.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _new_index(vectors: Optional[np.ndarray] = None) -> faiss.Index:
+    """
+    IDMap2 over flat below ANN_THRESHOLD, IVF (trained on `vectors`)
+    above it.  IVF keeps the ids itself – an IDMap wrapper's labels drift
+    after remove_ids.  HNSW is not used because it cannot remove ids.
+    """
+    n = 0 if vectors is None else len(vectors)
+    if n < ANN_THRESHOLD:
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(DIM))
+
+    nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))  # faiss wants ≥39 pts/list
+    ivf = faiss.IndexIVFFlat(faiss.IndexFlatIP(DIM), DIM, nlist, faiss.METRIC_INNER_PRODUCT)
+    ivf.train(vectors)
+    ivf.nprobe = max(1, nlist // 16)
+    return ivf
+
+
+# ── resident index ─────────────────────────────────────────────────
+class _ResidentIndex:
+    """
+    Snapshot + WAL, loaded once per process.  Before every operation a
+    stat() of both files picks up changes and snapshots made by another
+    process (CLI and Gradio share memory/).  Appends, snapshots, reloads
+    and torn-tail truncation hold a file lock; searches replay complete
+    records without it, so a reader never cuts off a record that another
+    process is still appending.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.index: Optional[faiss.Index] = None
+        self.post_ids: Dict[int, str] = {}   # FAISS label → post UUID
+        self._snap_sig = None
+        self._wal_pos = 0                    # bytes of the log already applied
+        self._pending = 0                    # records since the last snapshot
+
+    # -- recovery -----------------------------------------------------
+    def _open(self) -> None:
+        """Reload snapshot + log from scratch; caller holds file_lock(WAL_PATH)."""
+        VECTOR_DIR.mkdir(parents=True, exist_ok=True)
+        if SNAPSHOT_PATH.exists():
+            with np.load(SNAPSHOT_PATH, allow_pickle=False) as snap:
+                self.index = faiss.deserialize_index(snap["index"])
+                self.post_ids = {_label(p): p for p in snap["post_ids"].tolist()}
+        else:
+            self._rebuild_from_posts()
+        self._snap_sig = _stat_sig(SNAPSHOT_PATH)
+        self._wal_pos = 0
+        self._pending = 0
+        self._drop_torn_tail(self._replay())
+
+    def _drop_torn_tail(self, good: int) -> None:
+        """Cut a crashed append off the log; caller holds file_lock(WAL_PATH)."""
+        if _wal_size() > good:
+            logger.warning("Dropping torn tail of %s after %d bytes", WAL_PATH, good)
+            with WAL_PATH.open("r+b") as f:
+                f.truncate(good)
+
+    def _rebuild_from_posts(self) -> None:
+        """
+        First run, or an archive from before vectors were keyed by post:
+        re-embed the post archive (mostly embedding-cache hits) and snapshot.
+        """
+        from memory.post_store import _load
+
+        posts = _load()
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(DIM))
+        self.post_ids = {}
+        if posts:
+            from memory.embeddings import embed_many
+
+            logger.info("Indexing %d posts for the similarity guard", len(posts))
+            vecs = _unit(embed_many([p["text"] for p in posts]))
+            self._promote(vecs, np.array([_label(p["id"]) for p in posts], dtype=np.int64))
+            self.post_ids = {_label(p["id"]): p["id"] for p in posts}
+        if WAL_PATH.exists():
+            WAL_PATH.unlink()                # refers to an index we no longer have
+        self._snapshot()
+        for legacy in LEGACY_PATHS:
+            if legacy.exists():
+                legacy.unlink()
+
+    def _replay(self) -> int:
+        """Apply log records past `_wal_pos`; return the end of the last good one."""
+        if not WAL_PATH.exists():
+            return self._wal_pos
+        with WAL_PATH.open("rb") as f:
+            f.seek(self._wal_pos)
+            buf = f.read()
+
+        pos = 0
+        while pos + _HEADER.size <= len(buf):
+            op, id_len, crc = _HEADER.unpack_from(buf, pos)
+            body_len = id_len + (_VEC_BYTES if op == _ADD else 0)
+            end = pos + _HEADER.size + body_len
+            if op not in (_ADD, _REMOVE) or end > len(buf):
+                break
+            body = buf[pos + _HEADER.size:end]
+            if zlib.crc32(body) != crc:
+                break
+            post_id = body[:id_len].decode("utf-8")
+            if op == _ADD:
+                self._apply_add(post_id, np.frombuffer(body[id_len:], dtype="float32"))
+            else:
+                self._apply_remove(post_id)
+            self._pending += 1
+            pos = end
+
+        self._wal_pos += pos
+        return self._wal_pos
+
+    def _stale(self) -> bool:
+        # a shorter log means someone's snapshot truncated it
+        return (self.index is None or _stat_sig(SNAPSHOT_PATH) != self._snap_sig
+                or _wal_size() < self._wal_pos)
+
+    def _catch_up(self, locked: bool = True) -> None:
+        """
+        Apply what other processes wrote since we last looked.  Readers
+        pass locked=False: they stop at the last record with a good CRC
+        and take the file lock only to reload.
+        """
+        if not self._stale():
+            good = self._replay()
+            if locked:
+                self._drop_torn_tail(good)
+                return
+            if not self._stale():            # no snapshot raced the replay
+                return
+        if locked:
+            self._open()
+        else:
+            with file_lock(WAL_PATH):
+                self._open()
+
+    # -- index mutation -----------------------------------------------
+    def _apply_add(self, post_id: str, vec: np.ndarray) -> None:
+        label = _label(post_id)
+        if label in self.post_ids:
+            self.index.remove_ids(np.array([label], dtype=np.int64))
+        self.index.add_with_ids(vec.reshape(1, DIM), np.array([label], dtype=np.int64))
+        self.post_ids[label] = post_id
+        if self.index.ntotal >= ANN_THRESHOLD and self._is_flat():
+            flat = self.index.index
+            self._promote(flat.reconstruct_n(0, flat.ntotal), faiss.vector_to_array(self.index.id_map))
+
+    def _apply_remove(self, post_id: str) -> None:
+        label = _label(post_id)
+        if self.post_ids.pop(label, None) is not None:
+            self.index.remove_ids(np.array([label], dtype=np.int64))
+
+    def _is_flat(self) -> bool:
+        return isinstance(self.index, faiss.IndexIDMap2)
+
+    def _promote(self, vecs: np.ndarray, labels: np.ndarray) -> None:
+        """(Re)build the index over `vecs`, choosing flat or IVF by size."""
+        self.index = _new_index(vecs)
+        self.index.add_with_ids(vecs, labels)
+
+    def _log(self, op: int, post_id: str, vec: Optional[np.ndarray] = None) -> None:
+        body = post_id.encode("utf-8") + (vec.tobytes() if vec is not None else b"")
+        record = _HEADER.pack(op, len(post_id.encode("utf-8")), zlib.crc32(body)) + body
+        with WAL_PATH.open("ab") as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        self._wal_pos += len(record)
+        self._pending += 1
+
+    # -- operations ---------------------------------------------------
+    def add(self, post_id: str, vec: np.ndarray) -> None:
+        with self._lock, file_lock(WAL_PATH):
+            self._catch_up()
+            vec = _unit(vec)[0]
+            self._log(_ADD, post_id, vec)
+            self._apply_add(post_id, vec)
+            if self._pending >= SNAPSHOT_EVERY:
+                self._snapshot()
+
+    def remove(self, post_id: str) -> bool:
+        with self._lock, file_lock(WAL_PATH):
+            self._catch_up()
+            if _label(post_id) not in self.post_ids:
+                return False
+            self._log(_REMOVE, post_id)
+            self._apply_remove(post_id)
+            if self._pending >= SNAPSHOT_EVERY:
+                self._snapshot()
+            return True
+
+    def search(self, vecs: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        """One matrix search for every row of `vecs`."""
+        vecs = _unit(vecs)
+        with self._lock:
+            self._catch_up(locked=False)
+            if self.index.ntotal == 0:
+                return [[] for _ in range(len(vecs))]
+            D, I = self.index.search(vecs, min(k, self.index.ntotal))
+            return [
+                [
+                    (self.post_ids[label], float(score))
+                    for score, label in zip(row_d, row_i)
+                    if label in self.post_ids
+                ]
+                for row_d, row_i in zip(D, I)
+            ]
+
+    def snapshot(self) -> None:
+        with self._lock:
+            if self.index is None:
+                return
+            with file_lock(WAL_PATH):
+                self._catch_up()
+                if self._pending:
+                    self._snapshot()
+
+    def _snapshot(self) -> None:
+        tmp = SNAPSHOT_PATH.with_suffix(".tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                index=faiss.serialize_index(self.index),
+                post_ids=np.array(list(self.post_ids.values()), dtype=str),
+            )
+        os.replace(tmp, SNAPSHOT_PATH)
+        # a crash here leaves ops that are already in the snapshot;
+        # replaying them is harmless
+        with WAL_PATH.open("wb"):
+            pass
+        self._snap_sig = _stat_sig(SNAPSHOT_PATH)
+        self._wal_pos = 0
+        self._pending = 0
+
+
+# ── lexical prefilter ──────────────────────────────────────────────
+class _Prefilter:
+    """
+    MinHash LSH over the post archive, built on first use and kept in
+    step by add_vector/remove_vector.  Rebuilt when the post archive is
+    changed by another process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lsh: Optional[MinHashLSH] = None
+        self._sig = None
+
+    def _posts_sig(self):
+        from memory.post_store import store_signature
+        return store_signature()
+
+    def _ready(self) -> MinHashLSH:
+        sig = self._posts_sig()
+        if self.lsh is None or sig != self._sig:
+            from memory.post_store import _load
+
+            lsh = MinHashLSH()
+            for p in _load():
+                lsh.add(p["id"], p["text"])
+            self.lsh, self._sig = lsh, sig
+        return self.lsh
+
+    # The archive write has already happened when these run.  If nothing
+    # else changed the archive since we last looked (`before` is the
+    # signature we hold), apply the write in place and adopt `after`, as
+    # Dispatcher._set_status does; otherwise leave the signature alone so
+    # the next lookup rebuilds from the archive.
+    def add(self, post_id: str, text: str, sigs: Optional[Tuple] = None) -> None:
+        with self._lock:
+            if self._adopt(sigs):
+                self.lsh.add(post_id, text)
+
+    def remove(self, post_id: str, sigs: Optional[Tuple] = None) -> None:
+        with self._lock:
+            if self._adopt(sigs):
+                self.lsh.remove(post_id)
+
+    def _adopt(self, sigs: Optional[Tuple]) -> bool:
+        if self.lsh is None or sigs is None or sigs[0] != self._sig:
+            return False
+        self._sig = sigs[1]
+        return True
+
+    def find_exact(self, text: str) -> Optional[str]:
+        with self._lock:
+            return self._ready().find_exact(text)
+
+    def query(self, text: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            hit = self._ready().query(text)
+        return hit if hit and hit[1] >= LEXICAL_THRESHOLD else None
+
+
+_INDEX = _ResidentIndex()
+_PREFILTER = _Prefilter()
+atexit.register(_INDEX.snapshot)
+
+
+# ── public API ─────────────────────────────────────────────────────
+def add_vector(text: str, post_id: str, sigs: Optional[Tuple] = None):
+    """
+    Embed `text` as post `post_id`, replacing any earlier vector.  `sigs`
+    is the archive's (store_signature() before, after) the write being
+    mirrored; without it the prefilter rebuilds on next use.
+    """
+    _INDEX.add(post_id, _embed(text))
+    _PREFILTER.add(post_id, text, sigs)
+
+
+def remove_vector(post_id: str, sigs: Optional[Tuple] = None) -> bool:
+    """Drop a post's vector; False if it was not indexed.  `sigs` as for add_vector."""
+    _PREFILTER.remove(post_id, sigs)
+    return _INDEX.remove(post_id)
+
+
+def find_exact(text: str) -> Optional[str]:
+    """Id of an archived post with exactly this (stripped) text, if any."""
+    return _PREFILTER.find_exact(text)
+
+
+def lexical_match(text: str) -> Optional[Tuple[str, float]]:
+    """(post_id, estimated Jaccard) for a near-verbatim repeat, else None."""
+    return _PREFILTER.query(text)
+
+
+def nearest(text: str, k: int = 5) -> List[Tuple[str, float]]:
+    """The `k` most similar prior posts as [(post_id, cosine), ...], best first."""
+    return _INDEX.search(_embed(text), k)[0]
 
-def add_vector(text: str):
-    idx = _load_index()
-    idx.add(_embed(text).reshape(1, -1))
-    _save_index(idx)
 
 def too_similar(text: str, threshold: float = 0.85) -> bool:
-    idx = _load_index()
-    if idx.ntotal == 0:
-        return False
-    vec = _embed(text).reshape(1, -1)
-    D, _ = idx.search(vec, 1)
-    return bool(D[0][0] >= threshold)
\ No newline at end of file
+    if lexical_match(text) is not None:
+        return True                            # no embedding needed
+    hits = nearest(text, 1)
+    return bool(hits and hits[0][1] >= threshold)
+
+
+def nearest_many(texts: Sequence[str], k: int = 5) -> List[List[Tuple[str, float]]]:
+    """`nearest` for every text: one embedding batch, one matrix search."""
+    if not texts:
+        return []
+    return _INDEX.search(_embed_many(texts), k)
+
+
+def too_similar_many(texts: Sequence[str], threshold: float = 0.85, *,
+                     vecs: Optional[np.ndarray] = None,
+                     hits: Optional[List[List[Tuple[str, float]]]] = None) -> List[Dict]:
+    """
+    Check a batch of candidates against the archive and against each other.
+    One dict per text, in order:
+
+        {"score": best similarity vs. the archive (0.0 if empty),
+         "match": post_id of that best match or None,
+         "via": "lexical" (prefilter hit, score is a Jaccard estimate)
+                or "embedding" (score is a cosine),
+         "duplicate_of": index of an earlier text in the batch that is a
+                         lexical repeat or at least `threshold` similar,
+         "too_similar": score >= threshold or duplicate_of is not None}
+
+    Only texts the lexical prefilter cannot settle are embedded, unless
+    the caller passes `vecs` (unit embeddings of every text) and `hits`
+    (their `_INDEX.search(vecs, 1)` rows) it already has.
+    """
+    if not texts:
+        return []
+    lexical = [lexical_match(t) for t in texts]
+    todo = [i for i, hit in enumerate(lexical) if hit is None]
+    if vecs is not None and hits is not None:
+        sub, found = vecs[todo], [hits[i] for i in todo]
+    elif todo:
+        sub = _unit(_embed_many([texts[i] for i in todo]))
+        found = _INDEX.search(sub, 1)
+    else:
+        sub, found = np.empty((0, DIM), "float32"), []
+    nearest_of = dict(zip(todo, found))
+    row = {i: r for r, i in enumerate(todo)}
+    pairwise = sub @ sub.T
+
+    batch = MinHashLSH()
+    out: List[Dict] = []
+    for i, text in enumerate(texts):
+        if lexical[i] is not None:
+            match, score = lexical[i]
+            via = "lexical"
+        else:
+            best = nearest_of[i]
+            match, score = (best[0][0], best[0][1]) if best else (None, 0.0)
+            via = "embedding"
+
+        dup = None
+        repeat = batch.query(text)
+        if repeat is not None and repeat[1] >= LEXICAL_THRESHOLD:
+            dup = int(repeat[0])
+        elif i in row:
+            earlier = [j for j in todo[:row[i]] if pairwise[row[i], row[j]] >= threshold]
+            dup = earlier[0] if earlier else None
+        batch.add(str(i), text)
+
+        out.append(
+            {
+                "score": score,
+                "match": match,
+                "via": via,
+                "duplicate_of": dup,
+                "too_similar": via == "lexical" or score >= threshold or dup is not None,
+            }
+        )
+    return out
+
+
+def rank_variants(texts: Sequence[str], threshold: float = 0.85,
+                  novelty_weight: float = 0.5) -> List[Dict]:
+    """
+    Order alternative drafts of one post for the user to choose from.
+    Greedy MMR: each pick minimises
+
+        novelty_weight · (similarity to the archive)
+        + (1 − novelty_weight) · (max similarity to drafts already picked)
+
+    so the list starts with the freshest draft and each next one adds the
+    most that is new.  Drafts too_similar_many() flags go last.  Both
+    terms are cosines – a prefilter hit only decides too_similar, its
+    Jaccard estimate is not mixed into the ordering.  Returns one dict
+    per text, in ranked order:
+
+        {"index": position in `texts`, "archive": cosine to the nearest
+         archived post, "match": post_id of that post, "peer": max cosine
+         to the drafts ranked above it, "too_similar": bool}
+    """
+    if not texts:
+        return []
+    vecs = _unit(_embed_many(list(texts)))
+    hits = _INDEX.search(vecs, 1)
+    checks = too_similar_many(texts, threshold, vecs=vecs, hits=hits)
+    pairwise = vecs @ vecs.T
+    archive = [best[0] if best else (None, 0.0) for best in hits]
+
+    ranked: List[Dict] = []
+    left = list(range(len(texts)))
+    while left:
+        def cost(i: int):
+            peer = max((float(pairwise[i, r["index"]]) for r in ranked), default=0.0)
+            return (checks[i]["too_similar"],
+                    novelty_weight * archive[i][1] + (1 - novelty_weight) * peer,
+                    peer)
+        best = min(left, key=cost)
+        left.remove(best)
+        ranked.append({
+            "index": best,
+            "archive": round(float(archive[best][1]), 3),
+            "match": archive[best][0],
+            "peer": round(cost(best)[2], 3),
+            "too_similar": checks[best]["too_similar"],
+        })
+    return ranked
+
+
+def snapshot() -> None:
+    """Fold the WAL into the snapshot now (also runs at interpreter exit)."""
+    _INDEX.snapshot()
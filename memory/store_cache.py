@@ -0,0 +1,113 @@
+# memory/store_cache.py
+"""
+In-process read cache over the post archive and the publish queue.
+
+Each view is built on first use and reused until its store's signature
+changes (SQLite data_version / total_changes, or the JSON file's mtime),
+so repeated scheduler commands in one CLI or Gradio session are served
+from memory and a command only pays for the store it actually reads.
+Post lookups by id or `<id-prefix>` go through post_store's indexed
+point queries and are memoised per signature; the full post list is
+only loaded for commands that list posts.  Queue ids are kept sorted,
+so a queued `<id-prefix>` resolves by bisection.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from memory import post_store, schedule_store
+
+
+class _View:
+    def __init__(self, signature: Callable, build: Callable):
+        self._signature = signature
+        self._build = build
+        self._lock = threading.Lock()
+        self._sig = object()                 # never equal: first get() builds
+        self._value = None
+
+    def get(self):
+        # signature first: a write racing the build just forces one more rebuild
+        sig = self._signature()
+        with self._lock:
+            if sig != self._sig:
+                self._value = self._build()
+                self._sig = sig
+            return self._value
+
+
+class _Lookups:
+    """Memoised point queries, forgotten whenever the signature changes."""
+
+    def __init__(self, signature: Callable):
+        self._signature = signature
+        self._lock = threading.Lock()
+        self._sig = object()
+        self._memo: Dict[Tuple, object] = {}
+
+    def get(self, key: Tuple, fetch: Callable):
+        sig = self._signature()
+        with self._lock:
+            if sig != self._sig:
+                self._memo.clear()
+                self._sig = sig
+            if key not in self._memo:
+                self._memo[key] = fetch()
+            return self._memo[key]
+
+
+def _by_prefix(ids: List[str], prefix: str) -> Optional[str]:
+    i = bisect.bisect_left(ids, prefix)
+    if i < len(ids) and ids[i].startswith(prefix):
+        return ids[i]
+    return None
+
+
+def _build_queue() -> Dict:
+    rows = schedule_store.get_queue()
+    return {
+        "rows": rows,
+        "dates": {r["post_id"]: r["scheduled_for"] for r in rows},
+        "ids": sorted({r["post_id"] for r in rows}),
+    }
+
+
+_POSTS = _View(post_store.store_signature, post_store.all_posts)
+_POST_LOOKUPS = _Lookups(post_store.store_signature)
+_QUEUE = _View(schedule_store.store_signature, _build_queue)
+
+
+# ── posts ──────────────────────────────────────────────────────────
+def posts() -> List[Dict]:
+    return _POSTS.get()
+
+
+def get_post(post_id: str) -> Dict | None:
+    return _POST_LOOKUPS.get(("id", post_id), lambda: post_store.get_post(post_id))
+
+
+def find_post(id_prefix: str) -> Dict | None:
+    """First post (by id) whose id starts with `id_prefix`."""
+    return _POST_LOOKUPS.get(("prefix", id_prefix), lambda: post_store.find_post(id_prefix))
+
+
+# ── queue ──────────────────────────────────────────────────────────
+def queue(channel: str | None = None) -> List[Dict]:
+    """Queued items by date then channel (optionally one channel)."""
+    rows = _QUEUE.get()["rows"]
+    if channel:
+        rows = [r for r in rows if r["channel"].lower() == channel.lower()]
+    return rows
+
+
+def scheduled_dates() -> Dict[str, str]:
+    """{post_id: iso_date} – the cached map_post_id_to_date()."""
+    return _QUEUE.get()["dates"]
+
+
+def find_scheduled(id_prefix: str) -> str | None:
+    """Full post id of a queued post whose id starts with `id_prefix`."""
+    return _by_prefix(_QUEUE.get()["ids"], id_prefix)
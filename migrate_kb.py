@@ -0,0 +1,12 @@
+# migrate_kb.py
+"""
+One-shot: convert memory/vector_store from the old JSON SimpleVectorStore
+to the FAISS layout used by kb.py.  Safe to re-run.
+"""
+from kb import INDEX_DIR, migrate_to_faiss
+
+n = migrate_to_faiss()
+if n:
+    print(f"✅ Migrated {n} vectors in {INDEX_DIR} to FAISS")
+else:
+    print(f"Nothing to migrate – {INDEX_DIR} is already FAISS (or empty).")
@@ -0,0 +1,97 @@
+# startup_profile.py
+"""
+Startup profiler
+================
+`python app.py --profile-startup` (or app_gradio.py) prints how long each
+import and each lazily-built resource costs, in the order the app pays
+for them.  Import times are incremental: a module's row excludes anything
+an earlier row already imported.
+"""
+
+from __future__ import annotations
+
+import importlib
+import time
+from typing import Callable, List, Sequence, Tuple
+
+# third-party first, then project modules in dependency order
+IMPORT_STEPS: Tuple[str, ...] = (
+    "dotenv",
+    "numpy",
+    "faiss",
+    "llama_index.core",
+    "langgraph.graph",
+    "memory.post_store",
+    "memory.schedule_store",
+    "tools.scheduler",
+    "memory.embeddings",
+    "kb",
+    "tools.rag_tool",
+    "tools.image_agent",
+    "tools.generator",
+    "build_graph",
+)
+
+
+def _init_steps() -> List[Tuple[str, Callable[[], object]]]:
+    """Lazy resources, resolved only when the profiler runs."""
+    def embedder():
+        from memory.embeddings import embed
+        return embed("warm-up")          # loads torch + MiniLM
+
+    def llm():
+        from kb import get_llm
+        return get_llm()
+
+    def brand():
+        from tools.generator import _brand
+        return _brand()
+
+    def openai_client():
+        from tools.image_agent import _client
+        return _client()
+
+    def kb_index():
+        from kb import get_index
+        return get_index()
+
+    def graph():
+        from build_graph import get_runner
+        return get_runner()
+
+    return [
+        ("graph compile", graph),
+        ("brand profile", brand),
+        ("LLM client", llm),
+        ("OpenAI client", openai_client),
+        ("MiniLM embedder", embedder),
+        ("KB index load", kb_index),
+    ]
+
+
+def _timed(fn: Callable[[], object]) -> Tuple[float, str]:
+    t0 = time.perf_counter()
+    try:
+        fn()
+        note = ""
+    except Exception as e:               # report, don't abort the profile
+        note = f"error: {e.__class__.__name__}: {e}"
+    return time.perf_counter() - t0, note
+
+
+def profile_startup(extra_imports: Sequence[str] = ()) -> List[Tuple[str, float, str]]:
+    """Run every step, print a breakdown table and return the rows."""
+    rows: List[Tuple[str, float, str]] = []
+    for mod in (*extra_imports, *IMPORT_STEPS):
+        secs, note = _timed(lambda m=mod: importlib.import_module(m))
+        rows.append((f"import {mod}", secs, note))
+    for name, fn in _init_steps():
+        secs, note = _timed(fn)
+        rows.append((f"init   {name}", secs, note))
+
+    width = max(len(r[0]) for r in rows)
+    print("=== startup profile ===")
+    for label, secs, note in rows:
+        print(f"{label:<{width}}  {secs * 1000:9.1f} ms  {note}")
+    print(f"{'total':<{width}}  {sum(r[1] for r in rows) * 1000:9.1f} ms")
+    return rows
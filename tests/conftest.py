@@ -0,0 +1,85 @@
+# tests/conftest.py
+"""
+Shared fixtures.  Stores resolve their paths relative to the working
+directory (memory/…, data/…), so `tmp_cwd` runs a test inside a fresh
+temp dir; the embedder is replaced by a deterministic bag-of-words one
+so nothing downloads MiniLM.
+"""
+
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DIM = 384
+
+
+def bow_vector(text: str) -> np.ndarray:
+    """Unit vector of hashed word counts – texts sharing words score high."""
+    vec = np.zeros(DIM, dtype="float32")
+    for word in text.lower().split():
+        vec[int(hashlib.md5(word.encode()).hexdigest(), 16) % DIM] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+@pytest.fixture
+def tmp_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "memory").mkdir()
+    return tmp_path
+
+
+@pytest.fixture
+def bow_embed(monkeypatch):
+    """Route memory.embeddings.embed / embed_query / embed_many through bow_vector."""
+    from memory import embeddings
+
+    monkeypatch.setattr(embeddings, "embed", bow_vector)
+    monkeypatch.setattr(embeddings, "embed_query", bow_vector)
+    monkeypatch.setattr(
+        embeddings, "embed_many",
+        lambda texts: np.stack([bow_vector(t) for t in texts]) if len(texts) else np.empty((0, DIM), "float32"),
+    )
+    return bow_vector
+
+
+@pytest.fixture
+def kb_dir(tmp_cwd, monkeypatch):
+    """kb.py pointed at an empty temp store, embedding with bow_vector."""
+    import kb
+    from llama_index.core.embeddings import BaseEmbedding
+
+    class _BowEmbedding(BaseEmbedding):
+        def _get_text_embedding(self, text):
+            return bow_vector(text).tolist()
+
+        def _get_query_embedding(self, query):
+            return bow_vector(query).tolist()
+
+        async def _aget_query_embedding(self, query):
+            return bow_vector(query).tolist()
+
+    model = _BowEmbedding(model_name="bow")
+    index_dir = tmp_cwd / "memory" / "vector_store"
+    index_dir.mkdir(exist_ok=True)
+    for name, value in {
+        "INDEX_DIR": index_dir,
+        "VECTOR_PATH": index_dir / "default__vector_store.json",
+        "ID_MAP_PATH": index_dir / "id_map.json",
+        "MANIFEST_PATH": index_dir / "manifest.json",
+        "BM25_PATH": index_dir / "bm25.json",
+        "FORMAT_PATH": index_dir / "store_format.json",
+    }.items():
+        monkeypatch.setattr(kb, name, value)
+    monkeypatch.setattr(kb, "_embed_model", lambda: model)
+    kb.Settings.embed_model = model
+    kb.invalidate()
+    yield kb
+    kb.invalidate()
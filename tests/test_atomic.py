@@ -0,0 +1,123 @@
+# tests/test_atomic.py
+"""memory/atomic.py: crash-safe JSON writes, file locks and group commit."""
+
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+from filelock import Timeout
+
+from memory import atomic
+
+
+def test_failed_write_keeps_the_old_file(tmp_path, monkeypatch):
+    path = tmp_path / "posts.json"
+    atomic.atomic_write_json(path, [{"id": 1}])
+
+    def crash(data, f, **kw):
+        f.write('[{"id": 2}, {"id"')                 # partial output, then the "crash"
+        raise OSError("disk full")
+
+    monkeypatch.setattr(atomic.json, "dump", crash)
+    with pytest.raises(OSError):
+        atomic.atomic_write_json(path, [{"id": 2}])
+    assert json.loads(path.read_text()) == [{"id": 1}]
+    assert [p.name for p in tmp_path.iterdir()] == ["posts.json"]   # temp file removed
+
+
+def test_file_lock_excludes_other_holders(tmp_path, monkeypatch):
+    monkeypatch.setattr(atomic, "LOCK_TIMEOUT_S", 0.2)
+    path = tmp_path / "schedule.json"
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with atomic.file_lock(path):
+            held.set()
+            release.wait(5)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    held.wait(5)
+    try:
+        with pytest.raises(Timeout):
+            with atomic.file_lock(path):
+                pass
+    finally:
+        release.set()
+        t.join()
+    with atomic.file_lock(path):
+        pass
+
+
+def _slow_batches(apply_calls, gate):
+    def apply(ops):
+        apply_calls.append(list(ops))
+        if len(apply_calls) == 1:
+            gate.wait(5)                             # hold the leader while others queue up
+        return [op * 10 for op in ops]
+    return apply
+
+
+def test_group_commit_batches_waiting_writers():
+    calls, gate = [], threading.Event()
+    commit = atomic.GroupCommit(_slow_batches(calls, gate))
+    results = {}
+
+    def submit(n):
+        results[n] = commit.submit(n)
+
+    threads = [threading.Thread(target=submit, args=(n,)) for n in range(6)]
+    threads[0].start()
+    while not calls:
+        time.sleep(0.01)
+    for t in threads[1:]:
+        t.start()
+    while len(commit._pending) < 5:
+        time.sleep(0.01)
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert results == {n: n * 10 for n in range(6)}
+    assert len(calls) == 2 and sorted(calls[1]) == [1, 2, 3, 4, 5]
+
+
+def test_group_commit_failure_reaches_every_op_in_the_batch():
+    def apply(ops):
+        raise RuntimeError("write failed")
+
+    commit = atomic.GroupCommit(apply)
+    with pytest.raises(RuntimeError):
+        commit.submit(1)
+    assert commit._leading is False                  # the next writer can lead again
+
+
+def test_json_batch_rewrites_only_on_change(tmp_path):
+    path = tmp_path / "rows.json"
+    atomic.atomic_write_json(path, [])
+    load = lambda: json.loads(path.read_text())
+    apply = atomic.json_batch(path, load)
+
+    def append(rows):
+        rows.append({"id": len(rows)})
+        return True
+
+    assert apply([append, append, lambda rows: False]) == [True, True, False]
+    assert load() == [{"id": 0}, {"id": 1}]
+    stamp = path.stat().st_mtime_ns
+    assert apply([lambda rows: False]) == [False]
+    assert path.stat().st_mtime_ns == stamp
+
+
+def test_sqlite_batch_is_one_transaction(tmp_path):
+    db = sqlite3.connect(str(tmp_path / "q.sqlite"), check_same_thread=False)   # as the stores open it
+    db.execute("CREATE TABLE t (v INTEGER UNIQUE)")
+    apply = atomic.sqlite_batch(db, threading.Lock())
+
+    insert = lambda v: (lambda conn: conn.execute("INSERT INTO t VALUES (?)", (v,)).rowcount)
+    assert apply([insert(1), insert(2)]) == [1, 1]
+    with pytest.raises(sqlite3.IntegrityError):
+        apply([insert(3), insert(1)])                # second op fails: 3 is rolled back too
+    assert sorted(v for (v,) in db.execute("SELECT v FROM t")) == [1, 2]
@@ -0,0 +1,133 @@
+# tests/test_bulk_schedule.py
+"""Bulk scheduling: recurring rules, periods, spreading and slot collisions."""
+
+import datetime
+
+import pytest
+
+from tools import scheduler
+from tools.scheduler import _period, _recurring, _spread
+
+D = datetime.date
+
+
+def _take(gen, n):
+    return [next(gen) for _ in range(n)]
+
+
+@pytest.mark.parametrize("rule, start, expected", [
+    ("day", D(2025, 1, 30), ["2025-01-30", "2025-01-31", "2025-02-01"]),            # month end
+    ("day", D(2028, 2, 28), ["2028-02-28", "2028-02-29", "2028-03-01"]),            # leap day
+    ("3 days", D(2025, 12, 30), ["2025-12-30", "2026-01-02", "2026-01-05"]),        # year end
+    ("week", D(2025, 5, 29), ["2025-05-29", "2025-06-05", "2025-06-12"]),
+    ("other week", D(2025, 6, 1), ["2025-06-01", "2025-06-15", "2025-06-29"]),
+    ("fortnight", D(2025, 6, 1), ["2025-06-01", "2025-06-15", "2025-06-29"]),
+    ("tuesday", D(2025, 6, 1), ["2025-06-03", "2025-06-10", "2025-06-17"]),
+    ("mondays and thursdays", D(2025, 6, 1), ["2025-06-02", "2025-06-05", "2025-06-09"]),
+    ("tue, thurs", D(2025, 6, 1), ["2025-06-03", "2025-06-05", "2025-06-10"]),
+])
+def test_recurring(rule, start, expected):
+    assert _take(_recurring(rule, start), 3) == expected
+
+
+@pytest.mark.parametrize("rule", ["", "blue moon", "month"])
+def test_recurring_rejects(rule):
+    assert _recurring(rule, D(2025, 6, 1)) is None
+
+
+@pytest.mark.parametrize("text, today, expected", [
+    ("next month", D(2025, 1, 31), (D(2025, 2, 1), D(2025, 2, 28))),
+    ("next month", D(2027, 1, 15), (D(2027, 2, 1), D(2027, 2, 28))),
+    ("next month", D(2028, 1, 15), (D(2028, 2, 1), D(2028, 2, 29))),
+    ("next month", D(2025, 12, 31), (D(2026, 1, 1), D(2026, 1, 31))),             # year rollover
+    ("this month", D(2025, 4, 10), (D(2025, 4, 11), D(2025, 4, 30))),
+    ("this month", D(2025, 5, 31), (D(2025, 6, 1), D(2025, 5, 31))),              # nothing left
+    ("next week", D(2025, 6, 4), (D(2025, 6, 9), D(2025, 6, 15))),
+    ("this week", D(2025, 6, 4), (D(2025, 6, 5), D(2025, 6, 8))),
+    ("next 2 weeks", D(2025, 6, 4), (D(2025, 6, 5), D(2025, 6, 18))),
+    ("next 10 days", D(2025, 12, 25), (D(2025, 12, 26), D(2026, 1, 4))),
+    ("june", D(2025, 6, 20), (D(2025, 6, 21), D(2025, 6, 30))),                   # current month
+    ("march", D(2025, 6, 20), (D(2026, 3, 1), D(2026, 3, 31))),                   # next year's
+    ("feb 2028", D(2025, 6, 20), (D(2028, 2, 1), D(2028, 2, 29))),
+])
+def test_period(text, today, expected):
+    assert _period(text, today) == expected
+
+
+def test_period_rejects():
+    assert _period("someday soon", D(2025, 6, 1)) is None
+
+
+@pytest.mark.parametrize("n, expected", [
+    (1, ["d0"]),
+    (3, ["d0", "d3", "d6"]),
+    (4, ["d0", "d2", "d5", "d7"]),
+    (10, [f"d{i}" for i in range(10)]),
+    (12, [f"d{i}" for i in range(10)]),
+])
+def test_spread(n, expected):
+    assert _spread([f"d{i}" for i in range(10)], n) == expected
+
+
+# ── end to end against temp stores ──
+@pytest.fixture
+def stores(tmp_cwd, monkeypatch):
+    from memory import post_store, schedule_store
+
+    monkeypatch.setenv("POST_STORE", "sqlite")
+    monkeypatch.setenv("SCHEDULE_STORE", "sqlite")
+    monkeypatch.setattr(post_store, "add_vector", lambda *a, **kw: None)
+    post_store._store.cache_clear()
+    schedule_store._store.cache_clear()
+    for i in range(3):
+        post_store.save_post("X", f"x post {i}")
+    post_store.save_post("LinkedIn", "linkedin post")
+    schedule_store.add_to_queue("elsewhere", "X", "already queued", "2099-03-02")
+    yield schedule_store
+    post_store._store.cache_clear()
+    schedule_store._store.cache_clear()
+
+
+def _x_dates(store):
+    return [r["scheduled_for"] for r in store.get_queue("X") if r["post_id"] != "elsewhere"]
+
+
+@pytest.mark.parametrize("command, dates", [
+    ("schedule all x posts every day starting 2099-03-01", ["2099-03-01", "2099-03-03", "2099-03-04"]),
+    ("schedule 2 x posts every day starting 2099-03-01", ["2099-03-01", "2099-03-03"]),
+    ("schedule all x posts every day starting 2099-02-27", ["2099-02-27", "2099-02-28", "2099-03-01"]),
+    ("schedule all x posts every monday and tuesday starting march 1 2099",
+     ["2099-03-03", "2099-03-09", "2099-03-10"]),                          # 03-02 is taken
+    ("schedule all x posts across march 2099", ["2099-03-01", "2099-03-12", "2099-03-22"]),
+    ("schedule all x posts across february 2099", ["2099-02-01", "2099-02-10", "2099-02-19"]),
+])
+def test_bulk_schedule_places_around_taken_slots(stores, command, dates):
+    reply = scheduler.scheduler_tool(command)
+    assert reply.startswith(f"Scheduled {len(dates)} post")
+    assert _x_dates(stores) == dates
+    assert stores.get_queue("LinkedIn") == []
+
+
+def test_bulk_schedule_reports_shortage(stores):
+    for d in range(1, 31):
+        if d not in (10, 20):
+            stores.add_to_queue(f"busy-{d}", "X", "busy", f"2099-04-{d:02d}")
+    reply = scheduler.scheduler_tool("schedule all x posts across april 2099")
+    assert reply.splitlines() == [
+        "Scheduled 2 posts (2099-04-10 → 2099-04-20).",
+        "1 post(s) left unscheduled: not enough free dates.",
+    ]
+    # the leftover post goes elsewhere on the next run; scheduled ones are not moved
+    assert "Scheduled 1 post " in scheduler.scheduler_tool("schedule all x posts every day starting 2099-05-01")
+
+
+def test_all_channels_and_errors(stores):
+    reply = scheduler.scheduler_tool("schedule all posts every week starting 2099-06-01")
+    assert reply == "Scheduled 4 posts (2099-06-01 → 2099-06-15)."
+    assert [r["scheduled_for"] for r in stores.get_queue("LinkedIn")] == ["2099-06-01"]
+    assert scheduler.scheduler_tool("schedule all posts every week") == "No unscheduled posts."
+    assert scheduler.bulk_schedule("schedule all myspace posts every day") == "Unknown channel 'myspace'."
+    assert scheduler.bulk_schedule("schedule all posts every blue moon") == \
+        "Couldn't understand 'every blue moon'."
+    assert scheduler.bulk_schedule("schedule all posts across the universe") == \
+        "Couldn't understand period 'the universe'."
@@ -0,0 +1,95 @@
+# tests/test_campaign.py
+"""campaign.py plan loading, checkpoint keys and the generator's provider limits."""
+
+import threading
+import time
+
+import pytest
+
+import campaign
+from memory import review_store
+
+
+@pytest.fixture
+def store(tmp_cwd, monkeypatch):
+    monkeypatch.setattr(review_store, "DB_PATH", tmp_cwd / "memory" / "review.sqlite")
+    review_store._store.cache_clear()
+    yield review_store
+    review_store._store.cache_clear()
+
+
+def _plan(tmp_cwd, body):
+    path = tmp_cwd / "may.csv"
+    path.write_text("topic,channel,with_image\n" + body, encoding="utf-8")
+    return path
+
+
+def test_repeated_rows_each_get_a_draft(store, tmp_cwd, monkeypatch):
+    plan = _plan(tmp_cwd, "app launch,LinkedIn,no\napp launch,LinkedIn,no\nhiring,ig,yes\n")
+    drafted = []
+
+    def _draft(runner, row):
+        drafted.append(row["row_no"])
+        return {"draft": f"draft for row {row['row_no']}"}
+
+    import build_graph
+    monkeypatch.setattr(build_graph, "get_runner", lambda: None)
+    monkeypatch.setattr(campaign, "_draft", _draft)
+
+    stats = campaign.run_campaign(plan, printer=lambda _line: None)
+    assert (stats["drafted"], stats["skipped"]) == (3, 0)
+    assert [r["row_no"] for r in store.drafts("may")] == [1, 2, 3]
+
+    drafted.clear()
+    assert campaign.run_campaign(plan, printer=lambda _line: None)["skipped"] == 3
+    assert drafted == []
+
+
+def test_unknown_channels_are_rejected_at_load(tmp_cwd):
+    plan = _plan(tmp_cwd, "a,LinkedIn,no\nb,TikTok,no\nc,linkdin,no\nd,threads,no\n")
+    with pytest.raises(ValueError) as e:
+        campaign.read_plan(plan)
+    assert "row 2: 'TikTok'" in str(e.value) and "row 4: 'threads'" in str(e.value)
+    assert "row 3" not in str(e.value)                   # alias / typo the scheduler maps
+
+
+def test_parse_channel_matches_the_post_pattern():
+    from agents.orchestrator import parse_channel
+
+    assert [parse_channel(w) for w in ("ig", "LinkedIn", "X", "fb", "tiktok")] == \
+        ["Instagram", "Linkedin", "Twitter", "Facebook", None]
+
+
+def test_provider_limit_caps_burst_at_concurrency():
+    from tools.generator import _Limit
+
+    limit = _Limit(per_min=60, concurrency=2)            # one new call a second once the burst is spent
+    started, in_flight, peak = [], [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with limit():
+            with lock:
+                started.append(time.monotonic())
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    started.sort()
+    assert peak[0] <= 2
+    assert started[1] - t0 < 0.5 <= started[2] - t0     # two start at once, the third waits for a token
+
+
+def test_bad_limits_are_refused():
+    from tools.generator import _Limit
+
+    with pytest.raises(ValueError):
+        _Limit(per_min=0, concurrency=2)
@@ -0,0 +1,184 @@
+# tests/test_dispatcher.py
+"""Dispatcher against a temp schedule store with scripted publishers."""
+
+import datetime
+import math
+import threading
+import time
+
+import pytest
+
+import dispatcher as dsp
+
+TODAY = datetime.date.today()
+
+
+def day(offset: int) -> str:
+    return (TODAY + datetime.timedelta(days=offset)).isoformat()
+
+
+class Scripted(dsp.Publisher):
+    """Fails the first `fail` attempts per row; optionally blocks on `gate`."""
+
+    def __init__(self, fail: int = 0, gate: threading.Event = None):
+        self.fail, self.gate = fail, gate
+        self.calls, self.times = [], []
+        self._lock = threading.Lock()
+
+    def publish(self, item):
+        key = (item["channel"], item["scheduled_for"])
+        with self._lock:
+            self.calls.append(key)
+            self.times.append(time.time())
+            n = self.calls.count(key)
+        if self.gate is not None:
+            self.gate.wait(5)
+        if n <= self.fail:
+            raise RuntimeError(f"HTTP 503 on attempt {n}")
+
+
+@pytest.fixture
+def store(tmp_cwd, monkeypatch):
+    from memory import schedule_store
+
+    monkeypatch.setenv("SCHEDULE_STORE", "sqlite")
+    schedule_store._store.cache_clear()
+    monkeypatch.setattr(dsp, "DISPATCH_AT", datetime.time(0, 0))   # today's rows are due now
+    monkeypatch.setattr(dsp, "BACKOFF_S", 0.05)
+    yield schedule_store
+    schedule_store._store.cache_clear()
+
+
+def queue(store, *slots):
+    for channel, date in slots:
+        assert store.add_to_queue(f"post-{channel}-{date}", channel, f"text for {channel}", date) == ""
+
+
+def status(store, channel, date):
+    return next(r for r in store.get_queue(channel) if r["scheduled_for"] == date)
+
+
+def drive(d, done, timeout=5.0):
+    """Step the dispatcher loop by hand until `done()`."""
+    deadline = time.time() + timeout
+    try:
+        while not done():
+            assert time.time() < deadline, "dispatcher did not settle"
+            d._step()
+            time.sleep(0.01)
+    finally:
+        d._pool.shutdown(wait=True)
+
+
+def test_once_publishes_what_is_due(store):
+    queue(store, ("LinkedIn", day(0)), ("X", day(0)), ("X", day(1)))
+    pub = Scripted()
+    stats = dsp.Dispatcher(pub).run(once=True)
+    assert sorted(pub.calls) == [("LinkedIn", day(0)), ("X", day(0))]
+    assert stats["sent"] == 2
+    assert status(store, "X", day(0))["status"] == "sent"
+    assert status(store, "X", day(1))["status"] == "queued"
+
+
+def test_retries_back_off_then_succeed(store):
+    queue(store, ("LinkedIn", day(0)))
+    pub = Scripted(fail=2)
+    d = dsp.Dispatcher(pub)
+    drive(d, lambda: status(store, "LinkedIn", day(0))["status"] == "sent")
+    row = status(store, "LinkedIn", day(0))
+    assert (row["attempts"], row["error"]) == (3, None)
+    assert len(pub.calls) == 3 and d.metrics.retries == 2
+    gaps = [b - a for a, b in zip(pub.times, pub.times[1:])]
+    assert gaps[0] >= 0.8 * dsp.BACKOFF_S and gaps[1] >= 0.8 * 2 * dsp.BACKOFF_S
+
+
+def test_gives_up_after_max_attempts(store, monkeypatch):
+    monkeypatch.setattr(dsp, "MAX_ATTEMPTS", 2)
+    queue(store, ("X", day(0)))
+    d = dsp.Dispatcher(Scripted(fail=99))
+    drive(d, lambda: status(store, "X", day(0))["status"] == "failed")
+    row = status(store, "X", day(0))
+    assert row["attempts"] == 2 and row["error"] == "RuntimeError: HTTP 503 on attempt 2"
+    assert d.metrics.failed == 1
+
+
+def test_bucket():
+    b = dsp._Bucket(per_min=60, burst=2)
+    now = b.t
+    assert b.take(now) == 0 and b.take(now) == 0
+    assert b.take(now) == pytest.approx(1.0)
+    assert b.take(now + 1.0) == 0
+    assert dsp._Bucket(per_min=0, burst=1).take(now) == math.inf
+    with pytest.raises(ValueError):
+        dsp._Bucket(per_min=-1, burst=1)
+
+
+def test_rate_limit_defers_over_burst(store, monkeypatch):
+    monkeypatch.setattr(dsp, "MAX_LATENESS_S", 0)
+    queue(store, ("X", day(-2)), ("X", day(-1)), ("X", day(0)))
+    pub = Scripted()
+    d = dsp.Dispatcher(pub, rate_limits={"X": (60, 1)})
+    d._step()
+    d._pool.shutdown(wait=True)
+    assert len(pub.calls) == 1 and d.metrics.rate_limited == 2
+    assert all(at > time.time() + 0.5 for at, *_ in d._heap)
+
+
+def test_paused_channel_waits_and_once_returns(store):
+    queue(store, ("X", day(0)), ("LinkedIn", day(0)))
+    pub = Scripted()
+    d = dsp.Dispatcher(pub, rate_limits={"x": (0, 1)})
+    t = threading.Thread(target=d.run, kwargs={"once": True})
+    t.start()
+    t.join(5)
+    assert not t.is_alive()
+    assert pub.calls == [("LinkedIn", day(0))]
+    assert status(store, "X", day(0))["status"] == "queued"
+
+
+def test_long_overdue_rows_are_skipped(store):
+    queue(store, ("X", day(-10)), ("X", day(0)), ("LinkedIn", day(-10)))
+    store.set_status("LinkedIn", day(-10), "queued", attempts=1, error="HTTP 503")  # mid-retry
+    pub = Scripted()
+    stats = dsp.Dispatcher(pub).run(once=True)
+    assert sorted(pub.calls) == [("LinkedIn", day(-10)), ("X", day(0))]
+    row = status(store, "X", day(-10))
+    assert row["status"] == "skipped" and "past due" in row["error"]
+    assert stats["skipped"] == 1
+
+
+def test_external_add_is_picked_up(store):
+    pub = Scripted()
+    d = dsp.Dispatcher(pub)
+    d._step()
+    queue(store, ("X", day(0)))                     # another process schedules a post
+    drive(d, lambda: pub.calls == [("X", day(0))])
+
+
+def test_resync_racing_a_publish_does_not_publish_twice(store, monkeypatch):
+    queue(store, ("X", day(0)))
+    gate = threading.Event()
+    pub = Scripted(gate=gate)
+    d = dsp.Dispatcher(pub)
+    d._step()                                       # X is now in flight, blocked
+    assert d._inflight
+
+    real_pending, raced = store.pending, []
+
+    def racing(until=None):
+        rows = real_pending(until)                  # still shows X as queued
+        if not raced:
+            raced.append(True)
+            gate.set()                              # the publish finishes mid-read
+            deadline = time.time() + 5
+            while d._settled == 0 and time.time() < deadline:
+                time.sleep(0.01)
+        return rows
+
+    monkeypatch.setattr(dsp.schedule_store, "pending", racing)
+    queue(store, ("LinkedIn", day(1)))              # store changed by someone else: resync
+    d._sync()
+    assert [k for *_, k, _ in d._heap] == [("linkedin", day(1))]
+    drive(d, lambda: status(store, "X", day(0))["status"] == "sent")
+    d._step()
+    assert pub.calls == [("X", day(0))]
@@ -0,0 +1,58 @@
+# tests/test_embeddings.py
+"""CachedEmbedding: documents are cached on disk, queries only in memory."""
+
+import sqlite3
+
+import pytest
+from llama_index.core.embeddings import BaseEmbedding
+
+from conftest import bow_vector
+from memory import embeddings
+
+
+class _Counting(BaseEmbedding):
+    calls: int = 0
+
+    def _get_text_embedding(self, text):
+        self.calls += 1
+        return bow_vector(text).tolist()
+
+    def _get_query_embedding(self, query):
+        return self._get_text_embedding(query)
+
+    async def _aget_query_embedding(self, query):
+        return self._get_text_embedding(query)
+
+
+@pytest.fixture
+def model(tmp_cwd):
+    inner = _Counting(model_name="counting")
+    return embeddings.CachedEmbedding(inner, embeddings._VectorCache(embeddings.CACHE_PATH))
+
+
+def _rows():
+    with sqlite3.connect(str(embeddings.CACHE_PATH)) as db:
+        return db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+
+def test_documents_are_persisted_once(model):
+    model.embed_many(["page one", "page two", "page one"])
+    assert (model._inner.calls, _rows()) == (2, 2)
+    model.get_text_embedding_batch(["page one", "page two"])
+    assert model._inner.calls == 2
+
+
+def test_queries_are_not_persisted(model):
+    first = model.get_query_embedding("what does 34ML build")
+    again = model.get_query_embedding("what does 34ML build")
+    assert first == again
+    assert (model._inner.calls, _rows()) == (1, 0)
+
+
+def test_query_lru_is_bounded(model, monkeypatch):
+    monkeypatch.setattr(embeddings, "QUERY_CACHE_SIZE", 2)
+    for q in ("q one", "q two", "q three"):
+        model.embed_query(q)
+    assert list(model._queries) == ["q two", "q three"]
+    model.embed_query("q one")
+    assert model._inner.calls == 4
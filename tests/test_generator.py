@@ -0,0 +1,40 @@
+# tests/test_generator.py
+"""generator_tool with the offline stub LLM and retrieval stubbed out."""
+
+import pytest
+
+from llm_provider import StubChatModel
+from tools import generator
+
+
+@pytest.fixture
+def gen(monkeypatch):
+    prompts, queries = [], []
+
+    class _Recording(StubChatModel):
+        def _stream_text(self, messages, run_manager=None):
+            prompts.append(messages[-1].content)
+            return super()._stream_text(messages, run_manager)
+
+    model = _Recording(role="draft", ttft_ms=0, token_ms=0)
+    monkeypatch.setattr(generator, "_llm", lambda: model)
+    monkeypatch.setattr(generator, "_brand", lambda: {"tone": "clear", "rules": "short", "aud": "founders"})
+    monkeypatch.setattr(generator, "too_similar", lambda text: False)
+
+    def rag_facts(query, top_k):
+        queries.append((query, top_k))
+        return [{"text": "34ML shipped 200 apps.", "source": "https://34ml.com/about",
+                 "rank_score": 1.0, "via": "keyword"}]
+
+    monkeypatch.setattr(generator, "rag_facts", rag_facts)
+    generator.prompts, generator.queries = prompts, queries
+    yield generator
+    del generator.prompts, generator.queries
+
+
+def test_facts_are_retrieved_with_the_generator_question(gen):
+    out = gen.generator_tool({"user_input": "our mobile apps on linkedin"})
+    assert gen.queries == [("List 3 short facts about 34ML relevant to 'our mobile apps on linkedin'.", 6)]
+    assert "[1] (https://34ml.com/about) 34ML shipped 200 apps." in gen.prompts[0]
+    assert out["draft"] and out["channel"] == "LinkedIn" and out["waiting_for_qa"]
+    assert {"rag", "similarity", "draft", "total"} <= set(out["timings"])
@@ -0,0 +1,41 @@
+# tests/test_hitl_routing.py
+"""HITL verbs reach the qa_hitl node while a draft is pending, and only then."""
+
+import pytest
+
+import build_graph
+from agents.orchestrator import orchestrator
+
+
+@pytest.mark.parametrize("text", ["pick 2", "p 1", "approve", "a", "r", "q", "edit shorter please"])
+def test_hitl_verbs_route_to_qa_while_waiting(text):
+    assert orchestrator({"user_input": text, "waiting_for_qa": True})["route"] == "qa"
+
+
+@pytest.mark.parametrize("text,route", [("pick 2", "kb"), ("approve", "kb"), ("remove last", "scheduler")])
+def test_hitl_verbs_fall_through_without_a_draft(text, route):
+    assert orchestrator({"user_input": text})["route"] == route
+
+
+def test_pick_selects_a_variant_through_the_graph(monkeypatch):
+    from langgraph.checkpoint.memory import MemorySaver
+
+    def generator_node(state):
+        state.update(
+            draft="first", waiting_for_qa=True,
+            variant_drafts=[{"text": "first"}, {"text": "second"}],
+        )
+        return state
+
+    monkeypatch.setattr(build_graph, "generator_node", generator_node)
+    runner = build_graph.get_runner(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "t"}}
+
+    runner.invoke({"user_input": "write linkedin post about apps variants=2"}, config=config)
+    out = runner.invoke({"user_input": "pick 2"}, config=config)
+    assert out["draft"] == "second"
+    assert out["result"].startswith("Option 2 selected")
+
+    out = runner.invoke({"user_input": "approve"}, config=config)
+    assert out["approved_post"] == "second"
+    assert not out["waiting_for_qa"]
@@ -0,0 +1,67 @@
+# tests/test_hybrid.py
+"""HybridRetriever: the confident-BM25 fast path, RRF fusion and retrieve() fields."""
+
+import pytest
+from llama_index.core import Document
+
+DOCS = [
+    "Kotlin and Swift native mobile apps for retail brands.",
+    "Web platforms built with React and Django for startups.",
+    "Data pipelines and dashboards for logistics companies.",
+    "Design sprints turn product ideas into clickable prototypes.",
+    "Mobile apps and web platforms share one design system.",
+]
+
+
+@pytest.fixture
+def kb(kb_dir):
+    kb_dir.upsert_documents([
+        Document(text=t, id_=f"doc{i}", metadata={"url": f"https://x.test/{i}"})
+        for i, t in enumerate(DOCS)
+    ])
+    return kb_dir
+
+
+def test_confident_keywords_take_the_fast_path(kb, monkeypatch):
+    retriever = kb.get_retriever(3)
+    monkeypatch.setattr(retriever._dense, "retrieve", lambda q: pytest.fail("dense side used"))
+    hits = kb.retrieve("logistics dashboards", 3)
+    assert hits[0]["source"] == "https://x.test/2"
+    assert {h["via"] for h in hits} == {"keyword"}
+    assert hits[0]["rank_score"] > 1.0                  # raw BM25, not RRF
+
+
+def test_partial_coverage_is_fused(kb):
+    hits = kb.retrieve("logistics robots", 3)            # "robots" is in no chunk
+    assert {h["via"] for h in hits} == {"hybrid"}
+    scores = [h["rank_score"] for h in hits]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] <= 2 / (kb.RRF_K + 1)
+    assert hits[0]["source"] == "https://x.test/2"
+
+
+def test_no_clear_lead_is_fused(kb):
+    # docs 0 and 4 both contain every term: BM25 has no KEYWORD_MARGIN lead
+    assert kb.keyword_hits("mobile apps", 3) is None
+    hits = kb.retrieve("mobile apps", 3)
+    assert {h["via"] for h in hits} == {"hybrid"}
+    assert {h["source"] for h in hits[:2]} == {"https://x.test/0", "https://x.test/4"}
+
+
+def test_rrf_scores_follow_both_rankings(kb):
+    retriever = kb.get_retriever(3)
+    query = kb.QueryBundle("web platforms startups")
+    lexical = [nid for nid, _, _ in retriever._bm25.search(query.query_str, k=6)]
+    dense = [h.node.node_id for h in retriever._dense.retrieve(query)]
+    expected = {}
+    for ranking in (lexical, dense):
+        for rank, nid in enumerate(ranking):
+            expected[nid] = expected.get(nid, 0.0) + 1 / (kb.RRF_K + rank + 1)
+
+    hits = retriever._fused(query)
+    assert len(hits) == 3
+    assert [h.score for h in hits] == pytest.approx(sorted(expected.values(), reverse=True)[:3])
+    for h in hits:
+        assert h.score == pytest.approx(expected[h.node.node_id])
+    top = hits[0].node.node_id
+    assert top in lexical and top in dense              # agreement wins
@@ -0,0 +1,72 @@
+# tests/test_ingest.py
+"""Streaming ingestion: short pages are not pruned, and failures stop the chunker."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from agents.scraper import Page
+from conftest import bow_vector
+
+
+@pytest.fixture
+def ingest(kb_dir, monkeypatch):
+    import ingest
+
+    monkeypatch.setattr(ingest, "embed_many", lambda texts: np.stack([bow_vector(t) for t in texts]))
+    return ingest
+
+
+def _crawl(ingest, monkeypatch, pages):
+    monkeypatch.setattr(ingest, "iter_pages", lambda *a, **kw: iter(pages))
+    return ingest.run_pipeline("https://x.test/", printer=lambda line: None)
+
+
+def _page(url, text):
+    return Page(url=url, text=text, depth=0, status="fetched")
+
+
+LONG = "34ML builds mobile apps and web platforms for product teams. " * 6
+
+
+def test_short_page_keeps_its_chunks(ingest, kb_dir, monkeypatch):
+    first = _crawl(ingest, monkeypatch, [
+        _page("https://x.test/", LONG),
+        _page("https://x.test/about", "About 34ML: a studio shipping robotics dashboards. " * 6),
+    ])
+    assert first["added"] == 2
+
+    # the about page comes back nearly empty (e.g. a transient error page)
+    second = _crawl(ingest, monkeypatch, [
+        _page("https://x.test/", LONG),
+        _page("https://x.test/about", "Service unavailable"),
+    ])
+    assert (second["deleted"], second["chunks_deleted"]) == (0, 0)
+    assert kb_dir.retrieve("robotics dashboards", 1)[0]["source"] == "https://x.test/about"
+
+    # a page that is really gone is still pruned
+    third = _crawl(ingest, monkeypatch, [_page("https://x.test/", LONG)])
+    assert third["deleted"] == 1
+
+
+def test_embed_failure_stops_the_chunker(ingest, monkeypatch):
+    closed = threading.Event()
+
+    def endless():
+        try:
+            i = 0
+            while True:
+                yield _page(f"https://x.test/{i}", f"page {i} " + LONG)
+                i += 1
+        finally:
+            closed.set()
+
+    def boom(texts):
+        raise RuntimeError("embedder down")
+
+    monkeypatch.setattr(ingest, "embed_many", boom)
+    monkeypatch.setattr(ingest, "iter_pages", lambda *a, **kw: endless())
+    with pytest.raises(RuntimeError, match="embedder down"):
+        ingest.run_pipeline("https://x.test/", batch_size=2, queue_size=2, printer=lambda line: None)
+    assert closed.wait(5)
@@ -0,0 +1,55 @@
+# tests/test_kb_store.py
+"""Persisted KB layout: the format marker and the FAISS store round trip."""
+
+import json
+
+import pytest
+from llama_index.core import Document
+
+
+def _docs(*texts):
+    return [Document(text=t, id_=f"doc{i}", metadata={"url": f"https://x.test/{i}"})
+            for i, t in enumerate(texts)]
+
+
+def test_build_writes_format_marker(kb_dir):
+    kb = kb_dir
+    assert kb._store_format() is None
+    kb.upsert_documents(_docs("34ML builds mobile apps.", "We ship web platforms."))
+    assert json.loads(kb.FORMAT_PATH.read_text()) == {"vector_store": "faiss", "version": 1}
+    assert not kb._is_legacy_store()
+    assert kb.retrieve("mobile apps", 2)[0]["source"] == "https://x.test/0"
+
+
+def test_marker_wins_over_sniffing(kb_dir):
+    kb = kb_dir
+    kb.VECTOR_PATH.write_text('{"embedding_dict": {}}')
+    assert kb._is_legacy_store()                       # unmarked: sniffed as JSON
+    kb.FORMAT_PATH.write_text(json.dumps({"vector_store": "faiss", "version": 1}))
+    assert not kb._is_legacy_store()
+
+
+def test_newer_format_is_refused(kb_dir):
+    kb = kb_dir
+    kb.FORMAT_PATH.write_text(json.dumps({"vector_store": "faiss", "version": 99}))
+    with pytest.raises(ValueError):
+        kb._store_format()
+
+
+def test_large_store_is_persisted_as_ivf(kb_dir, monkeypatch):
+    kb = kb_dir
+    monkeypatch.setattr(kb, "ANN_THRESHOLD", 40)
+    docs = _docs(*(f"page {i} about topic{i} and more words" for i in range(50)))
+    kb.upsert_documents(docs)
+
+    stored = kb._load_vector_store(mmap=False)
+    assert isinstance(stored.client, kb.faiss.IndexIVF)
+    assert stored.client.ntotal == 50
+    assert kb.retrieve("topic7", 1)[0]["source"] == "https://x.test/7"
+
+    # rewriting one page over the IVF store deletes and re-adds by id
+    docs[7] = Document(text="page 7 now covers robotics", id_="doc7",
+                       metadata={"url": "https://x.test/7"})
+    stats = kb.upsert_documents(docs)
+    assert (stats["updated"], stats["chunks_deleted"]) == (1, 1)
+    assert kb.retrieve("robotics", 1)[0]["source"] == "https://x.test/7"
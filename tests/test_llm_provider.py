@@ -0,0 +1,61 @@
+# tests/test_llm_provider.py
+"""Cassette record → replay round trip."""
+
+import json
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import llm_provider
+from llm_provider import CassetteChatModel, CassetteMiss
+
+PROMPT = "Write a LinkedIn post about our new fintech dashboard."
+REPLY = "Meet the dashboard that closes the books in minutes, not days."
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    path = tmp_path / "cassette.json"
+    llm_provider._cassette.cache_clear()
+    yield path
+    llm_provider._cassette.cache_clear()
+
+
+def _record(path):
+    live = GenericFakeChatModel(messages=iter([AIMessage(content=REPLY)]))
+    model = CassetteChatModel(mode="record", cassette=path, live=live)
+    return "".join(c.content for c in model.stream(PROMPT))
+
+
+def test_record_then_replay_round_trip(cassette):
+    assert _record(cassette) == REPLY
+    (entry,) = json.loads(cassette.read_text(encoding="utf-8")).values()
+    assert entry["response"] == REPLY and entry["prompt"].endswith(PROMPT)
+
+    llm_provider._cassette.cache_clear()                 # replay reads the file, as a new process would
+    replay = CassetteChatModel(mode="replay", cassette=cassette, ttft_ms=300, token_ms=15)
+    t0 = time.perf_counter()
+    chunks = [c.content for c in replay.stream(PROMPT)]
+    assert "".join(chunks) == REPLY and len(chunks) > 1   # still streamed word by word
+    assert time.perf_counter() - t0 < 0.2                 # no stub timing: 300 ms + 15 ms/word
+
+
+def test_realtime_replay_sleeps_recorded_latency(cassette):
+    _record(cassette)
+    entries = json.loads(cassette.read_text(encoding="utf-8"))
+    for e in entries.values():
+        e.update(ttft_ms=100.0, latency_ms=250.0)
+    cassette.write_text(json.dumps(entries), encoding="utf-8")
+    llm_provider._cassette.cache_clear()
+
+    replay = CassetteChatModel(mode="replay", cassette=cassette, realtime=True)
+    t0 = time.perf_counter()
+    assert replay.invoke(PROMPT).content == REPLY
+    assert time.perf_counter() - t0 >= 0.24
+
+
+def test_replay_miss_raises(cassette):
+    with pytest.raises(CassetteMiss):
+        CassetteChatModel(mode="replay", cassette=cassette).invoke("never recorded")
@@ -0,0 +1,69 @@
+# tests/test_prefilter.py
+"""Lexical prefilter: in-place updates only when no other writer got in first."""
+
+import pytest
+
+
+class _Archive:
+    def __init__(self):
+        self.posts, self.version, self.loads = {}, 0, 0
+
+    def write(self, post_id, text=None):
+        before = self.version
+        if text is None:
+            self.posts.pop(post_id)
+        else:
+            self.posts[post_id] = text
+        self.version += 1
+        return before, self.version
+
+    def load(self):
+        self.loads += 1
+        return [{"id": k, "text": v} for k, v in self.posts.items()]
+
+
+@pytest.fixture
+def archive(monkeypatch):
+    from memory import post_store
+
+    arch = _Archive()
+    monkeypatch.setattr(post_store, "_load", arch.load)
+    monkeypatch.setattr(post_store, "store_signature", lambda: arch.version)
+    return arch
+
+
+@pytest.fixture
+def prefilter(archive):
+    from memory.similarity import _Prefilter
+
+    pf = _Prefilter()
+    archive.write("p1", "Our spring launch brings offline mode to every app")
+    assert pf.find_exact("Our spring launch brings offline mode to every app") == "p1"
+    return pf
+
+
+TEXT = "We shipped a redesigned checkout that cuts payment time in half"
+
+
+def test_own_write_is_applied_in_place(archive, prefilter):
+    prefilter.add("p2", TEXT, archive.write("p2", TEXT))
+    assert prefilter.find_exact(TEXT) == "p2"
+    prefilter.remove("p2", archive.write("p2"))
+    assert prefilter.find_exact(TEXT) is None
+    assert archive.loads == 1
+
+
+def test_interleaved_writer_forces_a_rebuild(archive, prefilter):
+    other = "Another process archived this post about hiring senior engineers"
+    archive.write("p3", other)                       # not seen by this prefilter
+    prefilter.add("p2", TEXT, archive.write("p2", TEXT))
+    assert prefilter.find_exact(other) == "p3"
+    assert prefilter.find_exact(TEXT) == "p2"
+    assert archive.loads == 2
+
+
+def test_unknown_signatures_rebuild(archive, prefilter):
+    archive.write("p2", TEXT)
+    prefilter.add("p2", TEXT)
+    assert prefilter.find_exact(TEXT) == "p2"
+    assert archive.loads == 2
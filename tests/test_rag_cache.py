@@ -0,0 +1,109 @@
+# tests/test_rag_cache.py
+"""Semantic answer cache: append-only persistence, LRU/TTL eviction, KB invalidation."""
+
+import pytest
+
+from conftest import bow_vector
+
+
+@pytest.fixture
+def kb_version(monkeypatch):
+    """Stand-in for kb.fingerprint(); bump ["fp"] to simulate a re-ingest."""
+    from tools import rag_tool
+
+    version = {"fp": ("kb", 1)}
+    monkeypatch.setattr(rag_tool, "fingerprint", lambda: version["fp"])
+    return version
+
+
+@pytest.fixture
+def rag(tmp_cwd, kb_version):
+    from tools import rag_tool
+
+    return rag_tool
+
+
+def _cache(rag, **kw):
+    opts = dict(max_entries=3, ttl_s=60, threshold=0.9)
+    opts.update(kw)
+    return rag._SemanticCache(rag.CACHE_PATH, **opts)
+
+
+def test_store_appends_and_reloads(rag):
+    cache = _cache(rag)
+    cache.store("what does 34ML build", bow_vector("what does 34ML build"), 5, "apps")
+    cache.store("who are the clients", bow_vector("who are the clients"), 5, "startups")
+    lines = rag.CACHE_PATH.read_text().splitlines()
+    assert len(lines) == 3                          # header + one line per store
+
+    again = _cache(rag)
+    assert again.lookup(bow_vector("what does 34ML build"), 5) == "apps"
+    assert again.lookup(bow_vector("what does 34ML build"), 3) is None   # other top_k
+    assert again.lookup(bow_vector("pricing plans"), 5) is None
+
+
+def test_torn_last_line_is_ignored(rag):
+    cache = _cache(rag)
+    cache.store("q one", bow_vector("q one"), 5, "a1")
+    with rag.CACHE_PATH.open("a") as f:
+        f.write('{"question": "q tw')
+    assert _cache(rag).lookup(bow_vector("q one"), 5) == "a1"
+
+
+def test_lru_eviction_keeps_recently_used(rag):
+    cache = _cache(rag)
+    for q in ("alpha", "beta", "gamma"):
+        cache.store(q, bow_vector(q), 5, q.upper())
+    assert cache.lookup(bow_vector("alpha"), 5) == "ALPHA"      # alpha now most recent
+    cache.store("delta", bow_vector("delta"), 5, "DELTA")
+    assert cache.lookup(bow_vector("beta"), 5) is None
+    assert cache.lookup(bow_vector("alpha"), 5) == "ALPHA"
+
+
+def test_file_is_compacted(rag):
+    cache = _cache(rag)
+    for i in range(20):
+        cache.store(f"question {i}", bow_vector(f"question {i}"), 5, str(i))
+    assert len(rag.CACHE_PATH.read_text().splitlines()) <= 1 + 2 * cache.max_entries
+    reloaded = _cache(rag)
+    assert reloaded.lookup(bow_vector("question 19"), 5) == "19"
+    assert reloaded.lookup(bow_vector("question 0"), 5) is None
+
+
+def test_ttl_expiry(rag, monkeypatch):
+    cache = _cache(rag)
+    clock = {"t": 1000.0}
+    monkeypatch.setattr(rag.time, "time", lambda: clock["t"])
+    cache.store("old question", bow_vector("old question"), 5, "stale")
+    clock["t"] += 59
+    assert cache.lookup(bow_vector("old question"), 5) == "stale"
+    clock["t"] += 2
+    assert cache.lookup(bow_vector("old question"), 5) is None
+
+
+def test_kb_change_invalidates(rag, kb_version):
+    cache = _cache(rag)
+    cache.store("what does 34ML build", bow_vector("what does 34ML build"), 5, "apps")
+    kb_version["fp"] = ("kb", 2)
+    assert cache.lookup(bow_vector("what does 34ML build"), 5) is None
+    assert len(rag.CACHE_PATH.read_text().splitlines()) == 1    # rewritten to the header
+    assert _cache(rag).lookup(bow_vector("what does 34ML build"), 5) is None
+
+
+def test_keyword_path_is_cached_without_embedding(rag, monkeypatch):
+    calls = []
+
+    class _Engine:
+        def synthesize(self, bundle, nodes):
+            calls.append(bundle.query_str)
+            return f"answer {len(calls)}"
+
+    monkeypatch.setattr(rag, "_CACHE", _cache(rag))
+    monkeypatch.setattr(rag, "keyword_hits", lambda q, k: ["bm25 hit"])
+    monkeypatch.setattr(rag, "get_query_engine", lambda k: _Engine())
+    monkeypatch.setattr(rag, "embed_query", lambda q: pytest.fail("query embedded"))
+
+    assert rag.rag_search("logistics dashboards") == "answer 1"
+    assert rag.rag_search("logistics dashboards") == "answer 1"
+    assert rag.rag_search("logistics dashboards", use_cache=False) == "answer 2"
+    assert rag._CACHE.lookup(bow_vector("logistics dashboards"), 5) is None  # no vector stored
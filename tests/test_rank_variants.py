@@ -0,0 +1,62 @@
+# tests/test_rank_variants.py
+"""rank_variants: one embedding batch and one archive search per call."""
+
+import numpy as np
+import pytest
+
+from conftest import bow_vector
+
+
+@pytest.fixture
+def sim(tmp_cwd, bow_embed, monkeypatch):
+    from memory import post_store, similarity
+
+    archive = [{"id": "old", "text": "Our spring launch brings offline mode to every app"}]
+    monkeypatch.setattr(post_store, "_load", lambda: archive)
+    monkeypatch.setattr(post_store, "store_signature", lambda: 1)
+    monkeypatch.setattr(similarity, "_INDEX", similarity._ResidentIndex())
+    monkeypatch.setattr(similarity, "_PREFILTER", similarity._Prefilter())
+    similarity._INDEX.add("old", bow_vector(archive[0]["text"]))
+
+    calls = {"embed": 0, "search": 0}
+    embed_many, search = similarity._embed_many, similarity._INDEX.search
+
+    def counting_embed(texts):
+        calls["embed"] += 1
+        return embed_many(texts)
+
+    def counting_search(vecs, k):
+        calls["search"] += 1
+        return search(vecs, k)
+
+    monkeypatch.setattr(similarity, "_embed_many", counting_embed)
+    monkeypatch.setattr(similarity._INDEX, "search", counting_search)
+    similarity.calls = calls
+    yield similarity
+    del similarity.calls
+
+
+DRAFTS = [
+    "Our spring launch brings offline mode to every app",        # archive repeat
+    "Meet the team behind our new fintech dashboard",
+    "Meet the team behind our new fintech dashboard today",      # near-copy of 1
+    "Five lessons from shipping a logistics platform in Cairo",
+]
+
+
+def test_rank_variants_embeds_and_searches_once(sim):
+    ranked = sim.rank_variants(DRAFTS)
+    assert sim.calls == {"embed": 1, "search": 1}
+    assert sorted(r["index"] for r in ranked) == [0, 1, 2, 3]
+    flagged = {r["index"] for r in ranked if r["too_similar"]}
+    assert flagged == {0, 2}
+    assert [r["index"] for r in ranked[-2:]] in ([0, 2], [2, 0])   # flagged drafts go last
+    assert next(r for r in ranked if r["index"] == 0)["match"] == "old"
+
+
+def test_passed_vectors_match_a_fresh_check(sim):
+    vecs = sim._unit(np.stack([bow_vector(t) for t in DRAFTS]))
+    hits = sim._INDEX.search(vecs, 1)
+    sim.calls.update(embed=0, search=0)
+    assert sim.too_similar_many(DRAFTS, vecs=vecs, hits=hits) == sim.too_similar_many(DRAFTS)
+    assert sim.calls == {"embed": 1, "search": 1}                 # only the fresh check
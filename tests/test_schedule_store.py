@@ -0,0 +1,144 @@
+# tests/test_schedule_store.py
+"""Publish queue against a temp database (and the legacy JSON backend)."""
+
+import json
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def store(request, tmp_cwd, monkeypatch):
+    from memory import schedule_store
+
+    monkeypatch.setenv("SCHEDULE_STORE", request.param)
+    schedule_store._store.cache_clear()
+    yield schedule_store
+    schedule_store._store.cache_clear()
+
+
+def _item(post_id, channel, day, text="hello"):
+    return {"post_id": post_id, "channel": channel, "text": text, "scheduled_for": day}
+
+
+def test_add_many_reports_each_item(store):
+    assert store.add_to_queue("p0", "LinkedIn", "existing", "2025-06-02") == ""
+    errors = store.add_many_to_queue([
+        _item("p1", "LinkedIn", "2025-06-01"),
+        _item("p2", "linkedin", "2025-06-02"),        # clashes with p0 (case-insensitive)
+        _item("p3", "LinkedIn", "2025-06-31"),
+        _item("p4", "Twitter", "2025-06-01"),
+        _item("p5", "LinkedIn", "2025-06-01"),        # clashes within the batch
+    ])
+    assert errors == [
+        "",
+        "linkedin already has a post on 2025-06-02.",
+        "Date '2025-06-31' is not ISO-8601 (YYYY-MM-DD).",
+        "",
+        "LinkedIn already has a post on 2025-06-01.",
+    ]
+    assert [(r["post_id"], r["status"]) for r in store.get_queue()] == [
+        ("p1", "queued"), ("p4", "queued"), ("p0", "queued"),
+    ]
+
+
+def test_free_slots_skips_taken_dates(store):
+    store.add_many_to_queue([_item(f"p{d}", "LinkedIn", f"2025-07-{d:02d}") for d in (2, 3, 5)])
+    days = [f"2025-07-{d:02d}" for d in range(1, 8)]
+    assert store.free_slots("linkedin", days) == ["2025-07-01", "2025-07-04", "2025-07-06", "2025-07-07"]
+    assert store.free_slots("LinkedIn", days, n=2) == ["2025-07-01", "2025-07-04"]
+    assert store.free_slots("Twitter", days, n=3) == days[:3]
+
+
+def test_free_slots_with_an_open_ended_generator(store):
+    import datetime
+
+    store.add_many_to_queue([_item(f"p{i}", "X", f"2025-01-{i:02d}") for i in range(1, 30)])
+
+    def every_day():
+        day = datetime.date(2025, 1, 1)
+        while True:
+            yield day.isoformat()
+            day += datetime.timedelta(days=1)
+
+    assert store.free_slots("X", every_day(), n=3) == ["2025-01-30", "2025-01-31", "2025-02-01"]
+
+
+def test_next_due_and_ranges(store):
+    store.add_many_to_queue([
+        _item("a", "LinkedIn", "2025-05-01"),
+        _item("b", "Twitter", "2025-05-03"),
+        _item("c", "LinkedIn", "2025-05-03"),
+        _item("d", "LinkedIn", "2025-05-09"),
+    ])
+    due = store.next_due(2, from_date="2025-05-02")
+    assert [(r["scheduled_for"], r["channel"]) for r in due] == [
+        ("2025-05-03", "LinkedIn"), ("2025-05-03", "Twitter"),
+    ]
+    assert [r["post_id"] for r in store.next_due(5, channel="linkedin", from_date="2025-05-02")] == ["c", "d"]
+    assert [r["post_id"] for r in store.get_range("2025-05-01", "2025-05-03")] == ["a", "c", "b"]
+
+
+def test_set_status_and_pending(store):
+    store.add_many_to_queue([_item("a", "LinkedIn", "2025-05-01"), _item("b", "X", "2025-05-02")])
+    assert store.set_status("linkedin", "2025-05-01", "queued", attempts=1, error="HTTP 503")
+    row = store.get_queue("LinkedIn")[0]
+    assert (row["status"], row["attempts"], row["error"]) == ("queued", 1, "HTTP 503")
+
+    assert store.set_status("LinkedIn", "2025-05-01", "sent", attempts=2)
+    row = store.get_queue("LinkedIn")[0]
+    assert (row["status"], row["attempts"], row["error"]) == ("sent", 2, None)
+    assert row["sent_at"]
+    assert [r["post_id"] for r in store.pending()] == ["b"]
+    assert store.pending(until="2025-05-01") == []
+
+    assert not store.set_status("LinkedIn", "2030-01-01", "sent")
+    with pytest.raises(ValueError):
+        store.set_status("LinkedIn", "2025-05-01", "lost")
+
+
+def test_remove_without_a_date_drops_every_date(store):
+    store.add_many_to_queue([
+        _item("a", "LinkedIn", "2025-05-01"),
+        _item("a", "X", "2025-05-02"),
+        _item("b", "X", "2025-05-03"),
+    ])
+    assert store.remove_from_queue("a", "2025-05-02")
+    assert store.dates_for_post("a") == ["2025-05-01"]
+    store.add_to_queue("a", "X", "a", "2025-05-04")
+    assert store.remove_from_queue("a")
+    assert store.dates_for_post("a") == []
+    assert not store.remove_from_queue("a")
+    assert [r["post_id"] for r in store.get_queue()] == ["b"]
+
+
+def test_migrates_old_database_and_imports_json(tmp_cwd, monkeypatch):
+    from memory import schedule_store
+
+    db = sqlite3.connect("memory/schedule.sqlite")
+    db.executescript("""
+        CREATE TABLE schedule (post_id TEXT NOT NULL, channel TEXT NOT NULL, text TEXT NOT NULL,
+                               scheduled_for TEXT NOT NULL, image_url TEXT);
+        INSERT INTO schedule VALUES ('old', 'LinkedIn', 'before the dispatcher', '2025-01-01', NULL);
+    """)
+    db.commit()
+    db.close()
+    (tmp_cwd / "memory" / "schedule.json").write_text(json.dumps([
+        _item("j1", "X", "2025-02-01"),
+        _item("j2", "LinkedIn", "2025-01-01"),        # slot already in the DB: ignored
+    ]))
+
+    monkeypatch.setenv("SCHEDULE_STORE", "sqlite")
+    schedule_store._store.cache_clear()
+    try:
+        rows = schedule_store.get_queue()
+        assert [(r["post_id"], r["status"], r["attempts"]) for r in rows] == [
+            ("old", "queued", 0), ("j1", "queued", 0),
+        ]
+        schedule_store._store.cache_clear()          # a second open imports nothing again
+        (tmp_cwd / "memory" / "schedule.json").write_text(json.dumps([_item("j3", "X", "2025-03-01")]))
+        assert len(schedule_store.get_queue()) == 2
+        indexes = {r[1] for r in sqlite3.connect("memory/schedule.sqlite").execute("PRAGMA index_list(schedule)")}
+        assert "schedule_status_date" in indexes
+    finally:
+        schedule_store._store.cache_clear()
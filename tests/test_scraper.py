@@ -0,0 +1,86 @@
+# tests/test_scraper.py
+"""
+Crawler against a local http.server: depth limit, robots.txt, the 304
+re-crawl and the manifest.  Run from the repo root:  python -m pytest
+"""
+
+import asyncio
+import functools
+import http.server
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from agents.scraper import crawl
+
+SITE = {
+    "robots.txt": "User-agent: *\nDisallow: /private/\n",
+    "index.html": '<a href="a.html">a</a> <a href="private/secret.html">s</a>'
+                  ' <a href="http://elsewhere.invalid/x.html">x</a>',
+    "a.html": '<p>page a</p><a href="b.html">b</a>',
+    "b.html": '<p>page b</p><a href="c.html">c</a>',
+    "c.html": "<p>page c</p>",
+    "private/secret.html": "<p>secret</p>",
+}
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/moved":                # redirect onto another host name
+            self.send_response(301)
+            self.send_header("Location", f"http://localhost:{self.server.server_port}/")
+            self.end_headers()
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "site"
+    for name, body in SITE.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(body, encoding="utf-8")
+    handler = functools.partial(_Handler, directory=str(root))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _crawl(base_url: str, depth: int, work: Path):
+    async def _collect():
+        return [p async for p in crawl(base_url, depth, raw_dir=work / "raw",
+                                       manifest_path=work / "manifest.json", delay_s=0)]
+    return {p.url.rsplit("/", 1)[-1] or "index": p for p in asyncio.run(_collect())}
+
+
+def test_depth_and_robots(site, tmp_path):
+    assert set(_crawl(site + "/", 1, tmp_path)) == {"index", "a.html"}
+    assert set(_crawl(site + "/", 2, tmp_path)) == {"index", "a.html", "b.html"}
+
+
+def test_recrawl_is_not_modified_and_manifest(site, tmp_path):
+    first = _crawl(site + "/", 2, tmp_path)
+    assert {p.status for p in first.values()} == {"fetched"}
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    assert set(manifest) == {site + "/", site + "/a.html", site + "/b.html"}
+    entry = manifest[site + "/a.html"]
+    assert entry["last_modified"] and len(entry["sha256"]) == 64
+    assert entry["links"] == [site + "/b.html"]
+    assert (tmp_path / "raw" / entry["file"]).exists()
+
+    second = _crawl(site + "/", 2, tmp_path)
+    assert {p.status for p in second.values()} == {"not_modified"}
+    assert second["a.html"].text == first["a.html"].text
+
+
+def test_redirected_base_keeps_links(site, tmp_path):
+    pages = _crawl(site + "/moved", 1, tmp_path)
+    assert "a.html" in pages
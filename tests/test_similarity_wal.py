@@ -0,0 +1,132 @@
+# tests/test_similarity_wal.py
+"""
+_ResidentIndex recovery.  Two instances over the same memory/ directory
+stand in for two processes (CLI and Gradio).
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import bow_vector
+
+
+@pytest.fixture
+def sim(tmp_cwd, monkeypatch):
+    from memory import post_store, similarity
+
+    monkeypatch.setattr(post_store, "_load", lambda: [])
+    monkeypatch.setattr(similarity, "SNAPSHOT_EVERY", 1000)
+    return similarity
+
+
+TEXTS = {f"post-{i}": f"launch note {i} about topic{i}" for i in range(6)}
+
+
+def _add(index, *post_ids):
+    for pid in post_ids:
+        index.add(pid, bow_vector(TEXTS[pid]))
+
+
+def _found(index):
+    vecs = np.stack([bow_vector(t) for t in TEXTS.values()])
+    return {hits[0][0] for hits in index.search(vecs, 1) if hits and hits[0][1] > 0.99}
+
+
+def test_replay_restores_unsnapshotted_adds(sim):
+    writer = sim._ResidentIndex()
+    _add(writer, "post-0", "post-1", "post-2")
+    writer.remove("post-1")
+    assert _found(sim._ResidentIndex()) == {"post-0", "post-2"}
+
+
+def test_torn_tail_is_dropped_and_log_stays_appendable(sim):
+    writer = sim._ResidentIndex()
+    _add(writer, "post-0", "post-1")
+    good = sim.WAL_PATH.stat().st_size
+    _add(writer, "post-2")
+    with sim.WAL_PATH.open("r+b") as f:
+        f.truncate(sim.WAL_PATH.stat().st_size - 100)   # crash mid-append of post-2
+
+    reloaded = sim._ResidentIndex()                 # first load runs under the file lock
+    assert _found(reloaded) == {"post-0", "post-1"}
+    assert sim.WAL_PATH.stat().st_size == good
+
+    _add(reloaded, "post-3")
+    assert _found(sim._ResidentIndex()) == {"post-0", "post-1", "post-3"}
+
+
+def _record(sim, post_id):
+    body = post_id.encode() + sim._unit(bow_vector(TEXTS[post_id]))[0].tobytes()
+    return sim._HEADER.pack(sim._ADD, len(post_id), sim.zlib.crc32(body)) + body
+
+
+def test_reader_waits_for_a_partial_record(sim):
+    writer, reader = sim._ResidentIndex(), sim._ResidentIndex()
+    _add(writer, "post-0")
+    assert _found(reader) == {"post-0"}
+    size = sim.WAL_PATH.stat().st_size
+    record = _record(sim, "post-1")
+    with sim.WAL_PATH.open("ab") as f:               # another process mid-append
+        f.write(record[:20])
+    assert _found(reader) == {"post-0"}
+    assert sim.WAL_PATH.stat().st_size == size + 20  # searches never cut the tail
+    with sim.WAL_PATH.open("ab") as f:
+        f.write(record[20:])
+    assert _found(reader) == {"post-0", "post-1"}
+
+
+def test_crc_mismatch_stops_replay(sim):
+    writer = sim._ResidentIndex()
+    _add(writer, "post-0")
+    first = sim.WAL_PATH.stat().st_size
+    _add(writer, "post-1", "post-2")
+    data = bytearray(sim.WAL_PATH.read_bytes())
+    data[first + sim._HEADER.size + 3] ^= 0xFF      # flip a byte in post-1's id
+    sim.WAL_PATH.write_bytes(bytes(data))
+
+    # post-2's record is intact, but nothing after a bad record is trusted
+    assert _found(sim._ResidentIndex()) == {"post-0"}
+
+
+def test_other_process_snapshot_is_picked_up(sim):
+    a, b = sim._ResidentIndex(), sim._ResidentIndex()
+    _add(a, "post-0", "post-1")
+    assert _found(b) == {"post-0", "post-1"}         # replayed from the log
+    a.snapshot()                                    # log truncated under b
+    assert sim.WAL_PATH.stat().st_size == 0
+    _add(a, "post-2")
+    assert _found(b) == {"post-0", "post-1", "post-2"}
+    _add(b, "post-3")
+    assert _found(a) == {"post-0", "post-1", "post-2", "post-3"}
+
+
+def test_search_during_concurrent_snapshots(sim, monkeypatch):
+    monkeypatch.setattr(sim, "SNAPSHOT_EVERY", 2)
+    writer, reader = sim._ResidentIndex(), sim._ResidentIndex()
+    _add(writer, "post-0")
+    errors, seen = [], []
+
+    def _write():
+        try:
+            for _ in range(15):
+                for pid in TEXTS:
+                    _add(writer, pid)
+                writer.remove("post-5")
+        except Exception as e:
+            errors.append(e)
+
+    t = threading.Thread(target=_write)
+    t.start()
+    while t.is_alive():
+        try:
+            seen.append(_found(reader))
+        except Exception as e:
+            errors.append(e)
+            break
+    t.join()
+
+    assert not errors
+    assert all("post-0" in s for s in seen)          # never lost mid-snapshot
+    assert _found(reader) == set(TEXTS) - {"post-5"}
@@ -0,0 +1,47 @@
+# tests/test_store_cache.py
+"""store_cache: memoised point lookups that never load the whole archive."""
+
+import pytest
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def stores(request, tmp_cwd, monkeypatch):
+    from memory import post_store, store_cache
+
+    monkeypatch.setenv("POST_STORE", request.param)
+    monkeypatch.setattr(post_store, "add_vector", lambda *a, **kw: None)
+    monkeypatch.setattr(post_store, "remove_vector", lambda *a, **kw: True)
+    post_store._store.cache_clear()
+    yield post_store, store_cache
+    post_store._store.cache_clear()
+
+
+def test_lookups_are_memoised_until_the_archive_changes(stores, monkeypatch):
+    post_store, store_cache = stores
+    first = post_store.save_post("LinkedIn", "First post about our launch")
+
+    calls = []
+    real_get = post_store.get_post
+    monkeypatch.setattr(post_store, "get_post", lambda pid: calls.append(pid) or real_get(pid))
+    if post_store._store().__class__.__name__ == "_SqliteBackend":
+        monkeypatch.setattr(post_store, "_load", lambda: pytest.fail("full archive load"))
+
+    assert store_cache.get_post(first)["text"] == "First post about our launch"
+    assert store_cache.get_post(first)["text"] == "First post about our launch"
+    assert store_cache.find_post(first[:8])["id"] == first
+    assert calls == [first]
+
+    post_store.update_post(first, "Edited post about our launch")
+    assert store_cache.get_post(first)["text"] == "Edited post about our launch"
+    assert calls == [first, first]
+    assert store_cache.get_post("missing") is None
+
+
+def test_prefix_lookup_and_listing(stores):
+    post_store, store_cache = stores
+    ids = [post_store.save_post("X", f"post number {i}") for i in range(3)]
+    assert store_cache.find_post(min(ids)[:1])["id"] == min(ids)      # first by id
+    assert [p["id"] for p in store_cache.posts()] == ids
+    post_store.delete_post(ids[1])
+    assert store_cache.get_post(ids[1]) is None
+    assert [p["id"] for p in store_cache.posts()] == [ids[0], ids[2]]
@@ -5,35 +5,145 @@ Content-generator tool (LangGraph node)
 • Uses RAG facts + brand tone.
 • Guards against duplicates.
 • Generates image once (DALL·E-3). Flag `image_done` prevents re-calls.
-• Returns: draft, image_url, channel, waiting_for_qa, image_done.
+• Streams the draft token by token to LangGraph's "custom" stream mode.
+• `variants=N`: N drafts from one retrieval, written concurrently and
+  ranked by memory.similarity.rank_variants (freshest vs. the archive and
+  most distinct from each other first); `draft` is the top-ranked one.
+• Returns: draft, variant_drafts, image_url, channel, waiting_for_qa,
+  image_done, timings.
+
+Independent stages overlap on a shared thread pool: the image needs only
+topic + channel, so DALL·E starts first; retrieval and the duplicate
+check run side by side; only the Gemini draft waits for both.  Calls to
+each provider are limited to <PROVIDER>_CONCURRENCY in flight, started
+at <PROVIDER>_RPM a minute (GEMINI_*, OPENAI_*); one limit per provider
+is shared by every concurrent draft in the process – campaign.py
+workers included.
 """
 
 from __future__ import annotations
-import os, re
-from typing import Dict
+import os, re, time, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from typing import Callable, Dict
 from dotenv import load_dotenv
 
 from agents.brand       import get_brand
-from tools.rag_tool     import rag_search
-from memory.similarity  import too_similar
+from agents.orchestrator import PAT_VARIANTS
+from tools.rag_tool     import rag_facts, format_facts
+from memory.similarity  import too_similar, rank_variants
 from tools.image_agent  import create_image
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
+# ── concurrency ──────────────────────────────────────────────
+_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="draft")
+MAX_VARIANTS = 5
+
+class _TokenBucket:
+    """Blocking limiter: `per_min` calls a minute on average, bursts up to `burst`."""
+
+    def __init__(self, per_min: float, burst: int):
+        if per_min <= 0 or burst < 1:
+            raise ValueError(f"bad rate limit: {per_min}/min, burst {burst}")
+        self.rate = per_min / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + max(now - self.t, 0) * self.rate)
+                self.t = max(now, self.t)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class _Limit:
+    """
+    One provider's budget: at most `concurrency` calls in flight, started
+    at `per_min` a minute.  The bucket's burst is the concurrency, so an
+    idle provider lets exactly one full set of slots start at once.
+    """
+
+    def __init__(self, per_min: float, concurrency: int):
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.bucket = _TokenBucket(per_min, burst=concurrency)
+
+    @contextmanager
+    def __call__(self):
+        with self.slots:               # slot first: tokens go only to calls that start
+            self.bucket.acquire()
+            yield
+
+# provider → (requests/min, calls in flight); env: <PROVIDER>_RPM, <PROVIDER>_CONCURRENCY
+_DEFAULT_LIMITS = {"gemini": (60, 4), "openai": (5, 2)}
+_LIMITS = {
+    name: _Limit(float(os.getenv(f"{name.upper()}_RPM", rpm)),
+                 int(os.getenv(f"{name.upper()}_CONCURRENCY", n)))
+    for name, (rpm, n) in _DEFAULT_LIMITS.items()
+}
+
+def _stage(name: str, provider: str | None, timings: Dict[str, float], fn: Callable, *args):
+    """Run one stage under its provider's limits; wall time (incl. queueing) → timings."""
+    t0 = time.perf_counter()
+    try:
+        with _LIMITS[provider]() if provider else nullcontext():
+            return fn(*args)
+    finally:
+        timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+# ── brand consts (loaded on first draft) ─────────────────────
+@lru_cache(maxsize=1)
+def _brand() -> Dict[str, str]:
+    b = get_brand()
+    return {
+        "tone" : ", ".join(b["tone"]),
+        "rules": "; ".join(b["style_rules"]),
+        "aud"  : b["audience"],
+    }
+
+# ── LLM (llm_provider, built on first draft) ─────────────────
+def _llm():
+    from llm_provider import chat_model
+    return chat_model("draft", temperature=0.7)
+
+def _token_writer() -> Callable[[Dict], None]:
+    """LangGraph stream writer when running inside the graph, else a no-op."""
+    try:
+        from langgraph.config import get_stream_writer
+        return get_stream_writer()
+    except (ImportError, RuntimeError):
+        return lambda _chunk: None
 
-# ── brand consts ─────────────────────────────────────────────
-b       = get_brand()
-TONE    = ", ".join(b["tone"])
-RULES   = "; ".join(b["style_rules"])
-AUD     = b["audience"]
+def _stream_draft(prompt: str, timings: Dict[str, float]) -> str:
+    """Gemini draft, emitted as {"token": …} chunks while it is generated."""
+    emit = _token_writer()
+    t0 = time.perf_counter()
+    parts = []
+    for chunk in _llm().stream(prompt):
+        if not chunk.content:
+            continue
+        if not parts:
+            timings["draft_ttft"] = round((time.perf_counter() - t0) * 1000, 1)
+        parts.append(chunk.content)
+        emit({"token": chunk.content})
+    return "".join(parts).strip()
 
-# ── LLM (Gemini-1.5-Flash) ───────────────────────────────────
-_LLM = ChatGoogleGenerativeAI(
-    model="models/gemini-1.5-flash-latest",
-    temperature=0.7,
-    google_api_key=os.getenv("GOOGLE_API_KEY"),
-    cache=False,
-)
+def format_variants(options) -> str:
+    """Numbered option list for the HITL prompt (scores are cosine, lower = fresher)."""
+    return "\n\n".join(
+        f"--- OPTION {i} --- (archive {o['archive']:.2f}, overlap {o['peer']:.2f}"
+        f"{', too similar' if o['too_similar'] else ''})\n{o['text']}"
+        for i, o in enumerate(options, 1)
+    )
 
 # ── regex helpers ────────────────────────────────────────────
 _PAT_CH_INST = re.compile(r"\binstagram|insta|ig\b", re.I)
@@ -54,11 +164,32 @@ def generator_tool(state: Dict) -> Dict:
     channel    = state.get("channel", _detect_channel(user_msg))
     with_image = state.get("with_image", False) or "with image" in user_msg.lower()
 
-    topic = re.sub(r"\bwith\s+image\b", "", user_msg, flags=re.I).strip()
-    if too_similar(topic):
-        topic += " (fresh angle, avoid repeating earlier posts)"
+    n_variants = max(1, min(int(state.get("variants") or 1), MAX_VARIANTS))
+
+    topic = re.sub(r"\bwith\s+image\b", "", user_msg, flags=re.I)
+    topic = PAT_VARIANTS.sub("", topic).strip()
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+
+    # ------- image (only once) – needs nothing but topic + channel ----
+    image_url  = state.get("image_url")
+    image_done = state.get("image_done", False)
+    image_job  = None
+    if with_image and not image_done:
+        img_prompt = f"Create an engaging {channel} image about '{topic}'."
+        image_job  = _POOL.submit(_stage, "image", "openai", timings,
+                                  create_image, img_prompt, channel.lower())
 
-    facts = rag_search(f"List 3 short facts about 34ML relevant to '{topic}'.", top_k=6)
+    # raw chunks only – the draft call below does the writing.  Same
+    # question and depth the generator always retrieved with.
+    facts_query = f"List 3 short facts about 34ML relevant to '{topic}'."
+    facts_job = _POOL.submit(_stage, "rag", None, timings,
+                             lambda: format_facts(rag_facts(facts_query, top_k=6)))
+    similar_job = _POOL.submit(_stage, "similarity", None, timings, too_similar, topic)
+    facts = facts_job.result()
+
+    if similar_job.result():
+        topic += " (fresh angle, avoid repeating earlier posts)"
 
     placeholder_rule = (
         "If you mention a client, write it as [Client Name]."
@@ -66,28 +197,43 @@ def generator_tool(state: Dict) -> Dict:
         "Avoid [Client Name] placeholders."
     )
 
+    brand = _brand()
     prompt = f"""Write a {channel} post.
-Audience: {AUD}
-Tone: {TONE}
-Style rules: {RULES}
+Audience: {brand["aud"]}
+Tone: {brand["tone"]}
+Style rules: {brand["rules"]}
 
-Facts about 34ML:
+Facts about 34ML (use up to 3 that fit the topic):
 {facts}
 
 Topic: {topic}
 
 {placeholder_rule}
 Return ONLY the post text."""
-    draft = _LLM.invoke(prompt).content.strip()
+    variant_drafts = []
+    if n_variants == 1:
+        draft = _stage("draft", "gemini", timings, _stream_draft, prompt, timings)
+    else:
+        # same facts + prompt, one concurrent call per option (gemini limit applies)
+        jobs = [
+            _POOL.submit(_stage, f"draft_{k}", "gemini", timings,
+                         lambda p: _llm().invoke(p).content.strip(),
+                         f"{prompt}\n\nThis is option {k} of {n_variants}: "
+                         "use a clearly different hook and angle from the other options.")
+            for k in range(1, n_variants + 1)
+        ]
+        texts = [j.result() for j in jobs]
+        ranked = _stage("rank", None, timings, rank_variants, texts)
+        variant_drafts = [
+            {"text": texts[r["index"]], "archive": r["archive"], "peer": r["peer"],
+             "too_similar": r["too_similar"]}
+            for r in ranked
+        ]
+        draft = variant_drafts[0]["text"]
 
-    # ------- image (only once) ---------------------------------
-    image_url  = state.get("image_url")
-    image_done = state.get("image_done", False)
-
-    if with_image and not image_done:
+    if image_job is not None:
         try:
-            img_prompt = f"Create an engaging {channel} image about '{topic}'."
-            image_url  = create_image(img_prompt, channel.lower())["url"]
+            image_url  = image_job.result()["url"]
             image_done = True
             #  ⇓⇓⇓  write flag into state so a 2nd pass in same cycle sees it
             state["image_url"]  = image_url
@@ -95,12 +241,17 @@ Return ONLY the post text."""
         except Exception as e:
             draft += f"\n\n(Note: image generation error – {e})"
 
+    timings["total"] = round((time.perf_counter() - t0) * 1000, 1)
+    logger.info("draft stages (ms): %s", timings)
+
     # ------- return --------------------------------------------
     return {
         "draft"        : draft,
+        "variant_drafts": variant_drafts,
         "image_url"    : image_url,
         "image_done"   : image_done,
         "channel"      : channel,
         "waiting_for_qa": True,
         "result"       : None,
+        "timings"      : timings,
     }
\ No newline at end of file
@@ -6,10 +6,10 @@ Image Agent for generating social media images using OpenAI's DALL·E 3.
 import os
 import uuid
 import logging
+from functools import lru_cache
 from pathlib import Path
 import requests
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,9 +17,14 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 IMAGES_DIR = Path("data/images")
-IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+
+
+@lru_cache(maxsize=1)
+def _client():
+    """OpenAI client, built on the first image request."""
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 def create_image(prompt: str, channel: str) -> dict:
@@ -35,7 +40,7 @@ def create_image(prompt: str, channel: str) -> dict:
     """
     try:
         logger.info(f"Generating image with DALL·E 3 for channel: {channel}")
-        response = client.images.generate(
+        response = _client().images.generate(
             model="dall-e-3",
             prompt=prompt,
             size="1024x1024",
@@ -47,6 +52,7 @@ def create_image(prompt: str, channel: str) -> dict:
 
         image_url = response.data[0].url
         image_id = str(uuid.uuid4())
+        IMAGES_DIR.mkdir(parents=True, exist_ok=True)
         image_path = IMAGES_DIR / f"{channel}_{image_id}.png"
 
         logger.info(f"Downloading image from {image_url}")
@@ -1,10 +1,215 @@
 # tools/rag_tool.py
-from kb import get_query_engine
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
 
-def rag_search(question: str, top_k: int = 5) -> str:
+import numpy as np
+
+from llama_index.core.schema import QueryBundle
+
+from kb import fingerprint, get_query_engine, keyword_hits, retrieve
+from memory.embeddings import embed_query
+
+CACHE_PATH = Path("memory/rag_cache.jsonl")
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_S = 24 * 3600
+CACHE_THRESHOLD = 0.92          # cosine; MiniLM vectors are unit-length
+
+
+# ── semantic answer cache ──────────────────────────────────────────
+class _SemanticCache:
+    """
+    LRU + TTL cache of rag_search answers keyed on the query embedding
+    (`lookup`), or on the exact question for the keyword path (`get`).
+    Persisted to CACHE_PATH as JSON lines – a {"kb_version"} header, then
+    one appended line per stored answer – and wiped whenever the KB
+    fingerprint changes.  The file is rewritten only when that happens
+    or once it holds twice `max_entries` lines.
+    """
+
+    def __init__(self, path: Path, max_entries: int, ttl_s: float, threshold: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._kb_version: Optional[str] = None
+        self._loaded = False
+        self._lines = 0                 # entry lines currently in the file
+
+    # -- persistence ---------------------------------------------------
+    def _load(self) -> None:
+        self._loaded = True
+        if not self.path.exists():
+            return
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        for n, line in enumerate(lines):
+            try:
+                e = json.loads(line)
+            except ValueError:
+                continue  # torn append – the line is simply lost
+            if n == 0:
+                self._kb_version = e.get("kb_version")
+                continue
+            self._entries.pop(e["question"], None)
+            self._entries[e["question"]] = e
+            self._lines += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _rewrite(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(json.dumps({"kb_version": self._kb_version}) + "\n")
+            for e in self._entries.values():
+                f.write(json.dumps(e) + "\n")
+        os.replace(tmp, self.path)
+        self._lines = len(self._entries)
+
+    def _append(self, entry: Dict) -> None:
+        if self._lines >= 2 * self.max_entries or not self.path.exists():
+            self._rewrite()
+            return
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._lines += 1
+
+    # -- housekeeping --------------------------------------------------
+    def _sync(self) -> None:
+        if not self._loaded:
+            self._load()
+        version = hashlib.sha1(repr(fingerprint()).encode()).hexdigest()
+        if version != self._kb_version:
+            self._entries.clear()
+            self._kb_version = version
+            self._rewrite()
+        cutoff = time.time() - self.ttl_s
+        for q in [q for q, e in self._entries.items() if e["ts"] < cutoff]:
+            del self._entries[q]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self._lines = 0
+            if self.path.exists():
+                self.path.unlink()
+
+    # -- public --------------------------------------------------------
+    def get(self, question: str, top_k: int) -> Optional[str]:
+        """Answer stored for exactly `question`; needs no embedding."""
+        with self._lock:
+            self._sync()
+            hit = self._entries.get(question)
+            if hit is None or hit["top_k"] != top_k:
+                return None
+            self._entries.move_to_end(question)
+            return hit["answer"]
+
+    def lookup(self, vec: np.ndarray, top_k: int) -> Optional[str]:
+        with self._lock:
+            self._sync()
+            cands = [
+                e for e in self._entries.values()
+                if e["top_k"] == top_k and e["vec"] is not None
+            ]
+            if not cands:
+                return None
+            mat = np.asarray([e["vec"] for e in cands], dtype="float32")
+            sims = mat @ vec
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                return None
+            hit = cands[best]
+            self._entries.move_to_end(hit["question"])
+            return hit["answer"]
+
+    def store(self, question: str, vec: Optional[np.ndarray], top_k: int, answer: str) -> None:
+        """`vec=None` stores an answer reachable by `get` only."""
+        with self._lock:
+            self._sync()
+            entry = {
+                "question": question,
+                "vec": None if vec is None else np.round(vec, 5).tolist(),
+                "top_k": top_k,
+                "answer": answer,
+                "ts": time.time(),
+            }
+            self._entries[question] = entry
+            self._entries.move_to_end(question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._append(entry)
+
+
+_CACHE = _SemanticCache(CACHE_PATH, CACHE_MAX_ENTRIES, CACHE_TTL_S, CACHE_THRESHOLD)
+
+
+def clear_cache() -> None:
+    """Forget every cached answer (memory and disk)."""
+    _CACHE.clear()
+
+
+# ── public tools ───────────────────────────────────────────────────
+def rag_search(question: str, top_k: int = 5, use_cache: bool = True) -> str:
     """
     LangChain-compatible function; given a question, returns an
-    evidence-grounded answer from the vector store.
+    evidence-grounded answer from the vector store.  Questions that
+    BM25 alone answers confidently skip the query embedding (and are
+    cached on the exact question); near-identical questions are answered
+    from the semantic cache.
     """
+    lexical = keyword_hits(question, top_k)
+    if lexical is not None:
+        hit = _CACHE.get(question, top_k) if use_cache else None
+        if hit is not None:
+            return hit
+        engine = get_query_engine(top_k)
+        answer = str(engine.synthesize(QueryBundle(question), lexical))
+        if use_cache:
+            _CACHE.store(question, None, top_k, answer)
+        return answer
+
+    if use_cache:
+        vec = embed_query(question)
+        hit = _CACHE.lookup(vec, top_k)
+        if hit is not None:
+            return hit
+
     engine = get_query_engine(top_k)
-    return str(engine.query(question))
\ No newline at end of file
+    answer = str(engine.query(question))
+    if use_cache:
+        _CACHE.store(question, vec, top_k, answer)
+    return answer
+
+
+def rag_facts(question: str, top_k: int = 3) -> List[Dict]:
+    """
+    Retrieval-only variant of `rag_search`: returns the top-k raw chunks
+    (text, rank_score, via, source) without a Gemini synthesis round trip.
+    """
+    return retrieve(question, top_k)
+
+
+def format_facts(facts: List[Dict], max_chars: int = 600) -> str:
+    """Render chunks from `rag_facts` as a numbered block for a prompt."""
+    if not facts:
+        return "(no facts found)"
+    lines = []
+    for i, f in enumerate(facts, 1):
+        text = " ".join(f["text"].split())
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit(" ", 1)[0] + " …"
+        lines.append(f"[{i}] ({f['source']}) {text}")
+    return "\n".join(lines)
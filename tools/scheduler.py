@@ -3,8 +3,8 @@ Channel-aware offline Scheduler.
 
 Data files
 ----------
-memory/posts.json       – all approved posts
-memory/schedule.json    – scheduled items
+memory/posts.sqlite     – all approved posts (memory/post_store.py)
+memory/schedule.sqlite  – scheduled items (memory/schedule_store.py)
 
 Supported commands
 ------------------
@@ -12,24 +12,28 @@ show queue | show <channel> queue
 show posts | show <channel> posts
 show scheduled posts | show scheduled <channel> posts
 show history
+show dispatch
 schedule last [<channel>] post for|on <date>
 schedule <id-prefix> for|on <date>
+schedule all|<n> [<channel>] posts every <weekday|day|week|n days> [starting <date>]
+schedule all|<n> [<channel>] posts across next month|this month|next week|next <n> weeks|<month>
 remove last [<channel>]
 remove <id-prefix> [from <date>]
 help | ?
 """
 
 from __future__ import annotations
-import re, shlex
-from typing import List, Dict
+import re, shlex, calendar, datetime
+from typing import Iterator, List, Dict, Tuple
 from dateutil import parser as dparse          # python-dateutil
 
-from memory.post_store import _load as load_posts
+from memory import store_cache                 # cached reads, see memory/store_cache.py
+from memory.post_store import latest_post
 from memory.schedule_store import (
     add_to_queue,
-    get_queue,
+    add_many_to_queue,
+    free_slots,
     remove_from_queue,
-    map_post_id_to_date,
 )
 
 # ────────────────────────────────────────────────────────────────
@@ -72,6 +76,153 @@ def fmt(rows: List[Dict]) -> str:
         for r in rows
     )
 
+# ────────────────────────────────────────────────────────────────
+# Bulk / recurring scheduling
+# ────────────────────────────────────────────────────────────────
+_BULK = re.compile(
+    r"^schedule\s+(?P<count>all|\d+)\s+(?:(?P<ch>[a-z ]+?)\s+)?posts?\s+"
+    r"(?:(?:every|each)\s+(?P<rule>.+?)(?:\s+(?:starting|from|beginning)\s+(?P<start>.+))?"
+    r"|across\s+(?P<period>.+))$"
+)
+_WEEKDAY = {name.lower(): i for i, name in enumerate(calendar.day_name)}
+_WEEKDAY.update({name[:3]: i for name, i in list(_WEEKDAY.items())})
+_WEEKDAY.update({"tues": 1, "thur": 3, "thurs": 3})
+_MONTH = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTH.update({name[:3]: i for name, i in list(_MONTH.items())})
+
+def _recurring(rule: str, start: datetime.date) -> Iterator[str] | None:
+    """every tuesday | monday and thursday | day | week | other week | 3 days"""
+    words = [w.rstrip("s") if w.rstrip("s") in _WEEKDAY else w
+             for w in re.findall(r"[a-z]+|\d+", rule)]
+    if not words:
+        return None
+    days = {_WEEKDAY[w] for w in words if w in _WEEKDAY}
+    if days:
+        keep, step = (lambda d: d.weekday() in days), 1
+    else:
+        n = int(next((w for w in words if w.isdigit()), 2 if "other" in words else 1))
+        if words[-1] in {"day", "days", "daily"}:
+            step = n
+        elif words[-1] in {"week", "weeks", "weekly"}:
+            step = 7 * n
+        elif words[-1] in {"fortnight", "fortnightly"}:
+            step = 14 * n
+        else:
+            return None
+        keep = lambda d: True
+    def gen() -> Iterator[str]:
+        d = start
+        while True:
+            if keep(d):
+                yield d.isoformat()
+            d += datetime.timedelta(days=step)
+    return gen()
+
+def _period(text: str, today: datetime.date) -> Tuple[datetime.date, datetime.date] | None:
+    """next month | this month | next week | this week | next 6 weeks | next 10 days | june [2026]"""
+    words = text.split()
+    tomorrow = today + datetime.timedelta(days=1)
+    def month(year: int, m: int):
+        return (datetime.date(year, m, 1),
+                datetime.date(year, m, calendar.monthrange(year, m)[1]))
+    if words[:2] == ["next", "month"]:
+        return month(today.year + today.month // 12, today.month % 12 + 1)
+    if words[:2] == ["this", "month"]:
+        return tomorrow, month(today.year, today.month)[1]
+    if words[:2] in (["next", "week"], ["this", "week"]):
+        monday = today - datetime.timedelta(days=today.weekday())
+        if words[0] == "next":
+            monday += datetime.timedelta(days=7)
+        return max(monday, tomorrow), monday + datetime.timedelta(days=6)
+    if len(words) >= 3 and words[0] == "next" and words[1].isdigit():
+        unit = {"day": 1, "days": 1, "week": 7, "weeks": 7}.get(words[2])
+        if unit:
+            return tomorrow, today + datetime.timedelta(days=int(words[1]) * unit)
+    if words and words[0] in _MONTH:
+        m = _MONTH[words[0]]
+        year = int(words[1]) if len(words) > 1 and words[1].isdigit() else \
+            today.year + (m < today.month)
+        first, last = month(year, m)
+        return max(first, tomorrow), last
+    return None
+
+def _spread(free: List[str], n: int) -> List[str]:
+    """n dates spaced evenly through `free` (all of it if n ≥ len(free))."""
+    if n >= len(free):
+        return free
+    return [free[i * len(free) // n] for i in range(n)]
+
+def bulk_schedule(text: str) -> str | None:
+    """
+    `schedule all|<n> [<channel>] posts every … | across …`.  Unscheduled
+    posts (oldest first) get free (channel, date) slots from the store's
+    slot index, and the whole batch is queued in one write.  None if
+    `text` is not a bulk command.
+    """
+    m = _BULK.match(text)
+    if not m:
+        return None
+    ch = norm_ch(m["ch"]) if m["ch"] else None
+    if m["ch"] and not ch:
+        return f"Unknown channel '{m['ch']}'."
+    today = datetime.date.today()
+
+    if m["period"]:
+        span = _period(m["period"], today)
+        if not span:
+            return f"Couldn't understand period '{m['period']}'."
+    else:
+        start = today + datetime.timedelta(days=1)
+        if m["start"]:
+            start_iso = iso(m["start"])
+            if not start_iso:
+                return f"Couldn't parse date '{m['start']}'."
+            start = datetime.date.fromisoformat(start_iso)
+        if _recurring(m["rule"], start) is None:
+            return f"Couldn't understand 'every {m['rule']}'."
+
+    scheduled = store_cache.scheduled_dates()
+    pending = sorted(
+        (p for p in store_cache.posts()
+         if p["id"] not in scheduled and (ch is None or p["channel"] == ch)),
+        key=lambda p: p["datetime"],
+    )
+    by_channel: Dict[str, List[Dict]] = {}
+    for p in pending:
+        by_channel.setdefault(p["channel"], []).append(p)
+    if not by_channel:
+        return f"No unscheduled {ch + ' ' if ch else ''}posts."
+
+    items: List[Dict] = []
+    short = 0
+    for channel, posts in by_channel.items():
+        want = len(posts) if m["count"] == "all" else min(int(m["count"]), len(posts))
+        if m["period"]:
+            first, last = span
+            days = ((first + datetime.timedelta(days=i)).isoformat()
+                    for i in range((last - first).days + 1))
+            dates = _spread(free_slots(channel, days), want)
+        else:
+            dates = free_slots(channel, _recurring(m["rule"], start), want)
+        short += want - len(dates)
+        items += [
+            {"post_id": p["id"], "channel": channel, "text": p["text"],
+             "scheduled_for": d, "image_url": p.get("image_url")}
+            for p, d in zip(posts, dates)
+        ]
+
+    errors = add_many_to_queue(items)               # one transaction for the batch
+    done = [it for it, err in zip(items, errors) if not err]
+    if not done:
+        return "No free slots in that range."
+    lines = [f"Scheduled {len(done)} post{'s' if len(done) != 1 else ''} "
+             f"({done[0]['scheduled_for']} → {max(it['scheduled_for'] for it in done)})."]
+    if short:
+        lines.append(f"{short} post(s) left unscheduled: not enough free dates.")
+    if len(done) < len(items):
+        lines.append(f"{len(items) - len(done)} slot(s) were taken meanwhile; run the command again.")
+    return "\n".join(lines)
+
 # ────────────────────────────────────────────────────────────────
 # MAIN entry – called by LangChain as a Tool
 # ────────────────────────────────────────────────────────────────
@@ -80,8 +231,7 @@ def scheduler_tool(user_request: str, state: Dict | None = None) -> str:
     if not toks:
         return "Unrecognised scheduler command. Type 'help'."
 
-    posts      = load_posts()
-    sched_map  = map_post_id_to_date()
+    # nothing is loaded up front: each branch reads only the store it needs
     cmd        = toks[0]
 
     # --------------------------- show history ---------------------
@@ -108,19 +258,37 @@ def scheduler_tool(user_request: str, state: Dict | None = None) -> str:
             "  show posts | show <channel> posts\n"
             "  show scheduled posts | show scheduled <channel> posts\n"
             "  show history\n"
+            "  show dispatch\n"
             "  schedule last [<channel>] post for <date>\n"
             "  schedule <id> for <date>\n"
+            "  schedule all|<n> [<channel>] posts every <tuesday|day|week> [starting <date>]\n"
+            "  schedule all|<n> [<channel>] posts across next month|next week|<month>\n"
             "  remove last [<channel>] | remove <id> [from <date>]\n"
         )
 
     # --------------------------- SHOW -----------------------------
+    if cmd == "show" and "dispatch" in toks:
+        from dispatcher import read_metrics
+        m = read_metrics()
+        if not m:
+            return "Dispatcher has not run yet (python dispatcher.py)."
+        return (
+            f"Dispatcher ({m['updated']}): {m['sent']} sent, {m['failed']} failed, "
+            f"{m.get('skipped', 0)} skipped as too late, "
+            f"{m['retries']} retries, {m['per_min'] if m['per_min'] is not None else 'n/a'}/min, "
+            f"lag p50 {m['lag_p50_s'] or 0}s p95 {m['lag_p95_s'] or 0}s, "
+            f"{m['queued']} queued, {m['overdue']} overdue"
+        )
+
     if cmd == "show":
         # ----- queue or scheduled -----
         if "queue" in toks or ("scheduled" in toks and "posts" in toks):
             ch = next((norm_ch(t) for t in toks if norm_ch(t)), None)
-            rows = get_queue(ch)
+            rows = store_cache.queue(ch)
             rows_fmt = [
-                {"when": r["scheduled_for"], "channel": r["channel"],
+                {"when": r["scheduled_for"] + (f" [{r['status'].upper()}]"
+                                               if r.get("status", "queued") != "queued" else ""),
+                 "channel": r["channel"],
                  "id": r["post_id"], "text": r["text"], "image_url": r.get("image_url")}
                 for r in rows
             ]
@@ -130,8 +298,9 @@ def scheduler_tool(user_request: str, state: Dict | None = None) -> str:
         if "posts" in toks:
             ch          = next((norm_ch(t) for t in toks if norm_ch(t)), None)
             only_sched  = "scheduled" in toks
+            sched_map   = store_cache.scheduled_dates()
             rows: List[Dict] = []
-            for p in posts:
+            for p in store_cache.posts():
                 if ch and p["channel"] != ch:
                     continue
                 if only_sched and p["id"] not in sched_map:
@@ -147,6 +316,11 @@ def scheduler_tool(user_request: str, state: Dict | None = None) -> str:
 
     # --------------------------- SCHEDULE -------------------------
     if cmd == "schedule":
+        # schedule all|<n> [channel] posts every … | across …
+        bulk = bulk_schedule(" ".join(toks))
+        if bulk is not None:
+            return bulk
+
         # schedule last [channel] post for/on DATE
         if toks[1] == "last":
             # detect optional channel token(s)
@@ -157,18 +331,18 @@ def scheduler_tool(user_request: str, state: Dict | None = None) -> str:
             except ValueError:
                 idx = toks.index("on")
             date_expr = " ".join(toks[idx + 1:])
-            post = latest(posts, ch)
+            post = latest_post(ch)
             if not post:
                 return "No posts available."
             date_iso = iso(date_expr)
             if not date_iso:
                 return f"Couldn't parse date '{date_expr}'."
-            err = add_to_queue(post["id"], post["channel"], post["text"], date_iso)
+            err = add_to_queue(post["id"], post["channel"], post["text"], date_iso, post.get("image_url"))
             return "Scheduled." if not err else f"Error: {err}"
 
         # schedule <id> for/on DATE
         pid = toks[1]
-        post = next((p for p in posts if p["id"].startswith(pid)), None)
+        post = store_cache.find_post(pid)
         if not post:
             return f"Post '{pid}' not found."
         try:
@@ -179,21 +353,24 @@ def scheduler_tool(user_request: str, state: Dict | None = None) -> str:
         date_iso  = iso(date_expr)
         if not date_iso:
             return f"Couldn't parse date '{date_expr}'."
-        err = add_to_queue(post["id"], post["channel"], post["text"], date_iso)
+        err = add_to_queue(post["id"], post["channel"], post["text"], date_iso, post.get("image_url"))
         return "Scheduled." if not err else f"Error: {err}"
 
     # --------------------------- REMOVE ---------------------------
     if cmd in {"remove", "unschedule"}:
         if toks[1] == "last":
             ch = next((norm_ch(t) for t in toks[2:] if norm_ch(t)), None)
-            cand = [p for p in posts if p["id"] in sched_map]
+            sched_map = store_cache.scheduled_dates()
+            cand = [p for pid in sched_map if (p := store_cache.get_post(pid))]
             target = latest(cand, ch)
             if not target:
                 return "Nothing to remove."
             remove_from_queue(target["id"])
             return "Removed."
 
-        pid = toks[1]
+        pid = store_cache.find_scheduled(toks[1])
+        if not pid:
+            return "Nothing matched."
         try:
             idx = toks.index("from")
             date_iso = iso(" ".join(toks[idx + 1:]))